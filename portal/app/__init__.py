@@ -12,20 +12,31 @@ from .model import Permission
 from .model import ProblemType
 
 from . import default_config
+from .schema import upgrade_schema
+from .schema import migrate_enum_columns
+from .schema import rebuild_tables
+from .ticket_search import create_search_index
+from . import assets
+from . import dispatcher
+from . import presence
+from . import rate_limit
+from . import ticket_journal
+from . import ticket_sweeper
+from .util import read_config_data
 
 from time import sleep
 from sys import stderr
 
 import sys
 import os
-import json
 
 # NOTE: DO NOT change the name of 'create_app()', it is used by gunicorn and flask
 def create_app():
     app = Flask(__name__)
 
-    # Tell Flask it is behind a proxy, for accurate result when using url_for with external = True
-    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    # Tell Flask it is behind a proxy, for accurate result when using url_for with external = True,
+    # and so request.remote_addr is the client's address (used to rate limit ticket submissions) rather than nginx's
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 
     # Make trailing slashes optional
     app.url_map.strict_slashes = False
@@ -34,11 +45,18 @@ def create_app():
     db.init_app(app)
     sess.init_app(app)
     login_manager.init_app(app)
+    assets.init_app(app)
 
     _create_db_models(app)
     _register_blueprints(app)
+    _register_commands(app)
     _add_default_admin(app)
     _setup_jinja_globals(app)
+    dispatcher.init_app(app)
+    presence.init_app(app)
+    rate_limit.init_app(app)
+    ticket_journal.init_app(app)
+    ticket_sweeper.init_app(app)
     return app
 
 def _setup_env(app: Flask):
@@ -59,6 +77,13 @@ def _register_blueprints(app: Flask):
     app.register_blueprint(auth)
     app.register_blueprint(admin)
 
+def _register_commands(app: Flask):
+    from .commands import backfill_ticket_courses_command
+    from .commands import backfill_ticket_durations_command
+
+    app.cli.add_command(backfill_ticket_courses_command)
+    app.cli.add_command(backfill_ticket_durations_command)
+
 def _create_db_models(app: Flask):
     # NOTE: Import model scripts here...
     from . import model
@@ -82,6 +107,15 @@ def _create_db_models(app: Flask):
             with app.app_context():
                 db.create_all()
 
+                # create_all() does not touch existing tables, convert enum names stored by older versions,
+                # rebuild tables whose primary key changed and add any columns or indexes added to the models since
+                migrate_enum_columns(db.engine, db.metadata)
+                rebuild_tables(db.engine, db.metadata)
+                upgrade_schema(db.engine, db.metadata)
+
+                # The full-text index of the tickets depends on the database, so it is not part of the models
+                create_search_index(db.engine)
+
             # We succeeded! Break out of this loop
             return
 
@@ -113,25 +147,16 @@ def _add_default_admin(app: Flask):
         except Exception as e:
             print(e, file=stderr)
 
-def _read_in_config_data():
-    # read in app configuration json to display on homepage
-    project_dir = os.path.dirname(os.path.realpath(__file__))
-
-    # with open("../portal/app/appconfig.json", 'r') as f:
-    with open(f'{project_dir}/appconfig.json', 'r') as f:
-        data = json.load(f)
-    return data
-
 def _setup_jinja_globals(app: Flask):
     app.jinja_env.globals['current_user'] = current_user
     app.jinja_env.globals['Mode'] = Mode
     app.jinja_env.globals['Status'] = Status
     app.jinja_env.globals['Permission'] = Permission
-    app.jinja_env.globals['ConfigData'] = _read_in_config_data()
+    app.jinja_env.globals['ConfigData'] = read_config_data()
     app.jinja_env.globals['ProblemType'] = ProblemType
 
-    from .blueprints.auth import build_auth_url
-    app.jinja_env.globals['build_auth_url'] = build_auth_url
-
     from . import model
     app.jinja_env.globals['model'] = model
+
+    from . import catalog
+    app.jinja_env.globals['catalog'] = catalog
@@ -0,0 +1,41 @@
+from .cache import get_cache
+from .cache import bumps_version
+
+from .model import Message
+
+from datetime import datetime
+from typing import NamedTuple
+
+# Name of the version counter bumped by every route that changes the messages
+MESSAGES_VERSION = 'messages'
+
+class MessageSnapshot(NamedTuple):
+    id: int
+    message: str
+    start_date: datetime
+    end_date: datetime
+
+def active_messages():
+    """
+    Returns the messages that should currently be displayed on the home page.
+
+    The active messages are cached by the worker along with the next time the set can change on its own,
+    which is the earliest start date of a message yet to be displayed or end date of a displayed message.
+    The database is only queried again once that time has passed or an admin changed the messages.
+    """
+    return get_cache('announcements', MESSAGES_VERSION, _load_active_messages).get()
+
+def bumps_messages_version(func):
+    """Decorator for routes that add, change or remove messages."""
+    return bumps_version(MESSAGES_VERSION)(func)
+
+def _load_active_messages():
+    now = datetime.now()
+
+    # Messages that already ended can never become active again, skip them
+    upcoming = Message.query.filter(Message.end_date > now).order_by(Message.start_date, Message.id).all()
+
+    active = tuple(MessageSnapshot(m.id, m.message, m.start_date, m.end_date) for m in upcoming if m.start_date < now)
+    boundaries = [ m.end_date for m in active ] + [ m.start_date for m in upcoming if m.start_date >= now ]
+
+    return active, min(boundaries, default=None)
@@ -0,0 +1,113 @@
+# NOTE: This module only depends on the standard library (and optionally brotli) so the nginx image can run it
+#       on its own to build the same static files as the portal, see nginx/Dockerfile
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Fingerprinted files are written to this folder inside the static folder, next to the manifest
+DIST_FOLDER = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Images like png or jpeg are already compressed, only precompress text based files
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.ico', '.json', '.txt', '.html')
+
+def build(static_folder: str) -> dict:
+    """
+    Copies every file in 'static_folder' to 'static_folder/dist' with a hash of its content in the name
+    (e.g. css/main-style.css becomes dist/css/main-style.0123456789ab.css), along with gzip and brotli
+    compressed copies that nginx can serve as they are. The names are saved in a manifest which maps
+    the original file names to the fingerprinted ones, and is returned.
+
+    Since names change whenever the content does, the files can be cached by browsers forever.
+    NOTE: references between static files (e.g. url() in css) are not rewritten.
+    """
+    dist_folder = os.path.join(static_folder, DIST_FOLDER)
+    shutil.rmtree(dist_folder, ignore_errors=True)
+
+    manifest = {}
+
+    for root, dirs, files in os.walk(static_folder):
+        # Never fingerprint a previous build
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist_folder)
+
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            stem, extension = os.path.splitext(filename)
+            fingerprinted = f'{DIST_FOLDER}/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+            target = os.path.join(static_folder, fingerprinted)
+
+            _write(target, data)
+
+            if extension.lower() in COMPRESSIBLE_EXTENSIONS:
+                # mtime is fixed so every build of the same file gives the same output
+                _write_if_smaller(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0), data)
+
+                if brotli is not None:
+                    _write_if_smaller(target + '.br', brotli.compress(data), data)
+
+            manifest[filename] = fingerprinted
+
+    os.makedirs(dist_folder, exist_ok=True)
+
+    with open(os.path.join(dist_folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+
+    return manifest
+
+def load_manifest(static_folder: str) -> dict:
+    """Returns the manifest of the last build, or an empty manifest if the static files were never built."""
+    try:
+        with open(os.path.join(static_folder, DIST_FOLDER, MANIFEST_NAME), 'r') as f:
+            return json.load(f)
+
+    except FileNotFoundError:
+        return {}
+
+def init_app(app):
+    """
+    Makes url_for('static', filename=...) return the fingerprinted file if the static files were built,
+    otherwise the original file is used (e.g. when developing).
+    """
+    app.extensions['static_manifest'] = load_manifest(app.static_folder)
+
+    @app.url_defaults
+    def _fingerprint_static_url(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            manifest = app.extensions['static_manifest']
+            values['filename'] = manifest.get(values['filename'], values['filename'])
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def _write_if_smaller(path: str, compressed: bytes, data: bytes):
+    if len(compressed) < len(data):
+        _write(path, compressed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fingerprints and precompresses the static files of the portal.')
+    parser.add_argument('static_folder', nargs='?', default=os.path.join(os.path.dirname(os.path.realpath(__file__)), 'static'),
+                        help='folder containing the static files (default: app/static)')
+
+    args = parser.parse_args()
+    manifest = build(args.static_folder)
+
+    compression = 'gzip and brotli' if brotli is not None else 'gzip (install brotli for brotli)'
+    print(f'Built {len(manifest)} static files with {compression} into {os.path.join(args.static_folder, DIST_FOLDER)}')
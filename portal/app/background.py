@@ -0,0 +1,122 @@
+from flask import Flask
+
+from sqlalchemy import or_
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .model import Lease
+
+from datetime import datetime
+from datetime import timedelta
+from sys import stderr
+
+import os
+import socket
+import threading
+
+# NOTE: Tasks are run by a thread of each worker, but only the worker holding a leader task's lease runs it.
+#       The threads are started by the first request each worker handles, as threads started while gunicorn
+#       preloads the app would not survive forking the workers.
+
+_start_lock = threading.Lock()
+
+class LeaderTask:
+    """
+    A function run every 'interval' seconds by whichever worker holds the lease called 'name'.
+    Tasks that are not 'leader' tasks are run by every worker, e.g. to write out work each worker holds on its own.
+    """
+
+    def __init__(self, name: str, func, interval: float, leader: bool = True):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.leader = leader
+
+def register_leader_task(app: Flask, name: str, func, interval: float):
+    """Registers a task to run in the background of the app, see LeaderTask. The function is called inside an app context."""
+    _register_task(app, LeaderTask(name, func, interval))
+
+def register_worker_task(app: Flask, name: str, func, interval: float):
+    """Registers a task to run in the background of every worker of the app, without taking a lease."""
+    _register_task(app, LeaderTask(name, func, interval, leader=False))
+
+def acquire_lease(name: str, holder: str, seconds: float) -> bool:
+    """
+    Takes or renews the lease 'name' for 'seconds' if it is free, expired or already held by 'holder'.
+    Returns whether 'holder' now holds the lease. A single conditional UPDATE decides between competing workers.
+    """
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=seconds)
+
+    renew = update(Lease) \
+        .where(Lease.name == name, or_(Lease.holder == holder, Lease.expires_at < now)) \
+        .values(holder=holder, expires_at=expires_at)
+
+    try:
+        if db.session.execute(renew).rowcount == 1:
+            db.session.commit()
+            return True
+
+        # Either someone else holds the lease or it was never taken, only the latter can be inserted
+        db.session.add(Lease(name, holder, expires_at))
+        db.session.commit()
+        return True
+
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+def stop_leader_tasks(app: Flask):
+    """Stops the background tasks of the app in this worker, they finish their current run first."""
+    if 'leader_tasks_stop' in app.extensions:
+        app.extensions['leader_tasks_stop'].set()
+
+def worker_name() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+def _register_task(app: Flask, task: LeaderTask):
+    tasks = app.extensions.setdefault('leader_tasks', {})
+
+    if not tasks:
+        app.extensions['leader_tasks_stop'] = threading.Event()
+        app.before_request(lambda: _start_tasks(app))
+
+    tasks[task.name] = task
+
+def _start_tasks(app: Flask):
+    pid = os.getpid()
+
+    if app.extensions.get('leader_tasks_pid') == pid or not app.config['BACKGROUND_TASKS_ENABLED']:
+        return
+
+    with _start_lock:
+        if app.extensions.get('leader_tasks_pid') == pid:
+            return
+
+        for task in app.extensions['leader_tasks'].values():
+            threading.Thread(target=_run, args=(app, task), name=f'leader-{task.name}', daemon=True).start()
+
+        app.extensions['leader_tasks_pid'] = pid
+
+def _run(app: Flask, task: LeaderTask):
+    holder = worker_name()
+    lease_seconds = app.config['LEADER_LEASE_SECONDS']
+    stop = app.extensions['leader_tasks_stop']
+
+    while not stop.is_set():
+        is_leader = False
+
+        with app.app_context():
+            try:
+                is_leader = not task.leader or acquire_lease(task.name, holder, lease_seconds)
+
+                if is_leader:
+                    task.func()
+
+            except Exception as e:
+                db.session.rollback()
+                print(f'Background task {task.name} failed: {e}', file=stderr)
+
+        # Other workers only need to check back about when the lease could expire
+        stop.wait(task.interval if is_leader else max(task.interval, lease_seconds / 3))
@@ -22,15 +22,21 @@ from app.model import SectionMode
 from app.model import Season
 
 from datetime import datetime
+from datetime import timedelta
 
 from app.extensions import db
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 
 from app.util import str_empty
 from app.util import strip_or_none
 from app.util import permission_required
 from app.util import build_days_of_week_string
 
+from app import catalog
+from app import routing
+from app.announcements import bumps_messages_version
+
 import sys
 import io
 
@@ -52,6 +58,7 @@ def view_problem_types():
 
 @admin.route('/problems/add', methods=["POST"])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def add_problem_type():
     problemType = strip_or_none(request.form.get("problemType"))
 
@@ -77,6 +84,7 @@ def add_problem_type():
 
 @admin.route('/problems/remove', methods=["POST"])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def remove_problem_type():
     problemTypeID = strip_or_none(request.form.get("problemTypeID"))
 
@@ -103,6 +111,7 @@ def remove_problem_type():
 
 @admin.route('/problems/edit', methods=["POST"])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def edit_problem_type():
     problemTypeID = strip_or_none(request.form.get("problemTypeID"))
     description = strip_or_none(request.form.get("description"))
@@ -134,24 +143,40 @@ def edit_problem_type():
 @admin.route('/reports')
 @permission_required(Permission.Admin)
 def reports_form():
-    return render_template('download-report.html')
+    courses = Course.query.order_by(Course.department, Course.number).all()
+    semesters = Semester.query.order_by(Semester.start_date.desc()).all()
+    return render_template('download-report.html', courses=courses, semesters=semesters)
 
 @admin.route('/reports/download', methods=["POST"])
 @permission_required(Permission.Admin)
 def generate_reports():
 
     createDate = request.form.get("creationDate")
-    courseName = strip_or_none(request.form.get("course"))
+    courseId = strip_or_none(request.form.get("course"))
+    semesterId = strip_or_none(request.form.get("semester"))
 
-    if courseName:
-        tickets = Ticket.query.filter(Ticket.time_created >= createDate, Ticket.course == courseName).all()
+    try:
+        courseId = int(courseId) if courseId else None
+        semesterId = int(semesterId) if semesterId else None
 
-    else:
-        tickets = Ticket.query.filter(Ticket.time_created >= createDate).all()
+    except ValueError:
+        flash('Could not generate report, invalid course or semester', category='error')
+        return redirect(url_for('admin.reports_form'))
+
+    query = Ticket.query.filter(Ticket.time_created >= createDate)
+
+    if courseId is not None:
+        query = query.filter(Ticket.course_id == courseId)
+
+    if semesterId is not None:
+        query = query.join(Section, Ticket.section_id == Section.id).filter(Section.semester_id == semesterId)
+
+    tickets = query.all()
 
     header = [
         'Student Email', 'Student Name', 'Course', 'Section', 'Assignment Name', 'Specific Question', 'Problem Type', 'Time Created', 'Time Claimed',
-        'Status', 'Time Closed', 'Session Duration', 'Mode', 'Tutor Notes', 'Tutor Id', 'Successful Session'
+        'Status', 'Time Closed', 'Session Duration', 'Mode', 'Tutor Notes', 'Tutor Id', 'Successful Session', 'Group Session',
+        'Auto Closed'
     ]
 
     with io.StringIO() as out:
@@ -160,10 +185,12 @@ def generate_reports():
 
         for ticket in tickets:
             # TODO: Will need to query course and section too!
+            duration = timedelta(seconds=ticket.service_seconds) if ticket.service_seconds is not None else None
 
             csv_writer.writerow([ ticket.student_email, ticket.student_name, ticket.course, ticket.section, ticket.assignment_name,
-                                  ticket.specific_question, ticket.get_problem(), ticket.time_created, ticket.time_claimed, ticket.status,
-                                  ticket.time_closed, ticket.mode, ticket.tutor_notes, ticket.tutor_id, ticket.successful_session ])
+                                  ticket.specific_question, catalog.get_problem_type(ticket.problem_type), ticket.time_created, ticket.time_claimed, ticket.status,
+                                  ticket.time_closed, duration, ticket.mode, ticket.tutor_notes, ticket.tutor_id, ticket.successful_session,
+                                  ticket.group_id, ticket.auto_closed ])
 
         payload = out.getvalue()
 
@@ -173,10 +200,11 @@ def generate_reports():
 @permission_required(Permission.Admin)
 def view_tutors():
 
-    # NOTE: Cannot use inequality operators < > <= >= on enum from database as only
-    #       the enum name is actually persisted.
-    #
-    return render_template('admin-tutors.html')
+    # NOTE: Run each query once here, the template needs both lists more than once
+    tutors = User.get_tutors().options(selectinload(User.courses)).all()
+    pending = User.get_pending().all()
+    courses = Course.query.order_by(Course.department, Course.number).all()
+    return render_template('admin-tutors.html', tutors=tutors, pending=pending, courses=courses)
 
 @admin.route('/tutors/add', methods=['POST'])
 @permission_required(Permission.Admin)
@@ -204,6 +232,9 @@ def add_tutor():
             user.tutor_is_active = True
             user.permission = permission
             db.session.commit()
+
+            # The user may have been a tutor before, with courses
+            routing.tutor_changed(user)
             flash('New user successfully added!', category='success')
 
         else:
@@ -282,6 +313,7 @@ def edit_tutor():
 
         else:
             _attempt_edit_user(user, active, new_permission)
+            routing.tutor_changed(user)
             flash('User successfully updated!', category='success')
 
     except ValueError:
@@ -296,15 +328,54 @@ def edit_tutor():
 
     return redirect(url_for('admin.view_tutors'))
 
+@admin.route('/tutors/courses', methods=['POST'])
+@permission_required(Permission.Admin)
+def edit_tutor_courses():
+    user_id = strip_or_none(request.form.get("userID"))
+    course_ids = request.form.getlist("courses")
+
+    try:
+        user: User = User.query.get(user_id)
+        courses = Course.query.filter(Course.id.in_([ int(id) for id in course_ids ])).all()
+
+        if not user or user.permission < Permission.Tutor:
+            flash('Could not update courses, tutor does not exist!', category='error')
+
+        elif user != current_user and current_user.permission <= user.permission:
+            flash('Cannot update courses of user of higher or equal permission level as yourself!', category='error')
+
+        elif len(courses) != len(set(course_ids)):
+            flash('Could not update courses, course does not exist!', category='error')
+
+        else:
+            user.courses = courses
+            db.session.commit()
+            routing.tutor_changed(user)
+            flash('Courses successfully updated!', category='success')
+
+    except ValueError:
+        flash('Could not update courses, input values invalid!', category='error')
+
+    except IntegrityError:
+        db.session.rollback()
+        flash('Could not update courses, invalid data!', category='error')
+
+    except Exception as e:
+        flash('Could not update courses, unknown reason!', category='error')
+        print(f'Could not update courses, {e}', file=sys.stderr)
+
+    return redirect(url_for('admin.view_tutors'))
+
 @admin.route('/courses')
 @permission_required(Permission.Admin)
 def view_courses():
     # get all courses, just for validation in html
-    courses = Course.query.all()
+    courses = Course.get_all_with_sections().all()
     return render_template('admin-course.html', courses=courses)
 
 @admin.route('/courses/add', methods=["POST"])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def add_course():
 
     courseDepartment = strip_or_none(request.form.get("courseDepartment"))
@@ -341,6 +412,7 @@ def add_course():
 
 @admin.route('/courses/remove', methods=['POST'])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def remove_course():
 
     course_id = strip_or_none(request.form.get("courseID"))
@@ -367,6 +439,7 @@ def remove_course():
 
 @admin.route('/courses/edit', methods=['POST'])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def edit_course():
     course_id = strip_or_none(request.form.get("courseID"))
     newDept = strip_or_none(request.form.get("updateCourseDept"))
@@ -426,6 +499,7 @@ def edit_course():
 
 @admin.route('/courses/toggle-display', methods=['POST'])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def toggle_display():
     course_id = request.form.get("toggleID")
     try:
@@ -457,6 +531,7 @@ def view_semesters():
 
 @admin.route('/semesters/add', methods=["POST"])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def add_semester():
 
     year = strip_or_none(request.form.get("yearInput"))
@@ -499,6 +574,7 @@ def add_semester():
 
 @admin.route('/semesters/remove', methods=['POST'])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def remove_semester():
 
     semester_id = strip_or_none(request.form.get("semesterID"))
@@ -526,6 +602,7 @@ def remove_semester():
 
 @admin.route('/semesters/edit', methods=['POST'])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def edit_semester():
     semester_id = strip_or_none(request.form.get("semesterID"))
     newYear = strip_or_none(request.form.get("yearUpdate"))
@@ -590,6 +667,7 @@ def view_professors():
 
 @admin.route('/professors/add', methods=["POST"])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def add_professor():
 
     firstName = strip_or_none(request.form.get("firstNameInput"))
@@ -616,6 +694,7 @@ def add_professor():
 
 @admin.route('/professors/remove', methods=['POST'])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def remove_professor():
 
     professor_id = strip_or_none(request.form.get("professorID"))
@@ -643,6 +722,7 @@ def remove_professor():
 
 @admin.route('/professors/edit', methods=['POST'])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def edit_professor():
     professor_id = strip_or_none(request.form.get("professorID"))
     newFName = strip_or_none(request.form.get("fnameUpdate")).lower()
@@ -689,14 +769,15 @@ def edit_professor():
 @permission_required(Permission.Admin)
 def view_sections():
     # get all courses, just for validation in html
-    sections = Section.query.all()
+    sections = Section.get_all_with_details().all()
     semesters = Semester.query.all()
     courses = Course.query.all()
-    professors = Professor.query.all()
+    professors = catalog.professors()
     return render_template('admin-sections.html', sections=sections, semesters=semesters, courses=courses, professors=professors, SectionMode=SectionMode)
 
 @admin.route('/sections/add', methods=["POST"])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def add_section():
 
     semester = strip_or_none(request.form.get("semesterInput"))
@@ -753,6 +834,7 @@ def add_section():
 
 @admin.route('/sections/remove', methods=['POST'])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 def remove_section():
 
     section_id = strip_or_none(request.form.get("sectionID"))
@@ -780,6 +862,7 @@ def remove_section():
 
 @admin.route('/sections/edit', methods=['POST'])
 @permission_required(Permission.Admin)
+@catalog.bumps_catalog_version
 # flake8: noqa: C901
 def edit_section():
     section_id = strip_or_none(request.form.get("sectionID"))
@@ -870,6 +953,7 @@ def view_messages():
 
 @admin.route('/messages/add', methods=["POST"])
 @permission_required(Permission.Admin)
+@bumps_messages_version
 def add_message():
 
     message = strip_or_none(request.form.get("message"))
@@ -888,6 +972,7 @@ def add_message():
 
 @admin.route('/messages/remove', methods=["POST"])
 @permission_required(Permission.Admin)
+@bumps_messages_version
 def remove_message():
     message_id = strip_or_none(request.form.get("messageID"))
     try:
@@ -941,6 +1026,10 @@ def _attempt_delete_super_user(user: User):
 
     db.session.commit()
 
+    # Deleted users never signed in, so they were never routed to
+    if user.is_complete():
+        routing.tutor_changed(user)
+
 def _attempt_edit_user(user: User, active, permission=None):
     try:
         if permission:
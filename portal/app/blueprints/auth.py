@@ -57,6 +57,14 @@ def authorized():
 
     return redirect(url_for("views.index"))
 
+@auth.route("/login")
+def login():
+    """
+    Redirects to the Microsoft sign-in page. The auth flow is only started here, when the user actually
+    wants to sign in, so pages linking to this route stay the same for every anonymous visitor.
+    """
+    return redirect(build_auth_url())
+
 @auth.route("/logout")
 @login_required
 def logout():
@@ -123,7 +131,8 @@ def _user_from_claims(token_claims: str):
             db.session.rollback()
             raise e
 
-    # TODO: Check if user is active tutor/admin and set them as actively working
+    # NOTE: Tutors are not clocked in by signing in, they clock in from the board which then keeps
+    #       them working through heartbeats (see app/presence.py)
 
     return user
 
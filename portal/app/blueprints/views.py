@@ -4,8 +4,15 @@ from flask import flash
 from flask import url_for
 from flask import redirect
 from flask import render_template
+from flask import jsonify
+from flask import session
+from flask import abort
+from flask import current_app
 
 from flask_login import current_user
+from sqlalchemy import func
+from sqlalchemy import or_
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 
 from app.util import strip_or_none
@@ -15,24 +22,59 @@ from app.util import permission_required
 from app.model import Ticket
 from app.model import Mode
 from app.model import Permission
-from app.model import Message
 from app.model import ProblemType
-
-from datetime import datetime
+from app.model import Status
+from app.model import TicketGroup
 
 from app.extensions import db
+from app import catalog
+from app import presence
+from app import rate_limit
+from app import routing
+from app import similar_tickets
+from app import ticket_journal
+from app import ticket_queue
+from app import ticket_search
+from app.announcements import active_messages
+from app.page_cache import cache_anonymous_page
 from werkzeug.datastructures import ImmutableMultiDict
 
 import sys
 
 views = Blueprint('views', __name__)
 
+# Most tickets a session remembers for /my-tickets
+MY_TICKETS_LIMIT = 10
+
+# Most courses or sections returned by one search of /api/catalog/search
+CATALOG_SEARCH_LIMIT = 50
+
+# Most similar tickets suggested to a student writing a question, and shown for each ticket on the board
+SIMILAR_TICKETS_LIMIT = 5
+
+# Most characters of another student's question shown to a student writing a similar one
+SIMILAR_QUESTION_PREVIEW = 120
+
+# Most tickets updated by one request to /api/tickets/bulk
+BULK_ACTION_LIMIT = 200
+
+# Tickets shown per page of /search-tickets
+SEARCH_PAGE_SIZE = 25
+
+# Longest submission key accepted from the ticket form, see Ticket.submission_key
+SUBMISSION_KEY_LENGTH = 64
+
 @views.route("/")
+@cache_anonymous_page
 def index():
-    messages = Message.query.filter(Message.start_date < datetime.now(), Message.end_date > datetime.now())
-    return render_template('index.html', messages=messages)
+    messages = active_messages()
+
+    # Number of tutors working right now that can tutor each course
+    availability = [ (course, routing.count_available(course.id)) for course in catalog.courses() ]
+    return render_template('index.html', messages=messages, availability=availability)
 
 @views.route('/create-ticket', methods=['POST', 'GET'])
+@cache_anonymous_page
 def create_ticket():
     """
     Serves the HTTP route /create-ticket. Shows a ticket create form on GET request.
@@ -52,31 +94,131 @@ def create_ticket():
     the passed in create-ticket.html template which is the form that students use to create/submit tickets.
 
     Student login is required to access this page.
+
+    The form is the same for every anonymous student, so GET requests without a session are served from the page cache.
+
+    Submissions are rate limited per email, session and IP address (see app/rate_limit.py), which is checked before
+    the form is validated. Students with MAX_OPEN_TICKETS tickets that are not closed yet can not submit another one.
+
+    The form carries a one-time submission key (see static/js/submission-key.js). The key is unique in the Tickets table,
+    so a submission received twice (e.g. a double click or a refreshed page) fails to insert and the first ticket is used.
+
+    With TICKET_JOURNAL_ENABLED valid tickets are written to the worker's journal and inserted in a batch a few
+    milliseconds later (see app/ticket_journal.py).
     """
     if request.method == 'GET':
         # Render create-ticket template if GET request or if there was an error in submission data
         return render_template('create-ticket.html')
 
+    email = current_user.email if current_user.is_authenticated else strip_or_none(request.form.get("email"))
+    retry_after = rate_limit.limit_ticket_submission(email, _session_id(), request.remote_addr)
+
+    if retry_after:
+        abort(429, retry_after=retry_after)
+
+    max_open_tickets = current_app.config['MAX_OPEN_TICKETS']
+
+    if max_open_tickets and not str_empty(email) and _count_unresolved_tickets(email) >= max_open_tickets:
+        # The ticket that reached the limit may have been submitted by this very form already
+        ticket = _find_submitted_ticket(_submission_key(request.form), email)
+
+        if ticket is not None:
+            return _ticket_submitted(ticket)
+
+        flash(f'Could not submit ticket, you already have {max_open_tickets} tickets waiting for help!', category='error')
+        return redirect(url_for('views.create_ticket'))
+
     ticket = _attempt_create_ticket(request.form)
 
-    if ticket:
-        try:
-            db.session.add(ticket)
-            db.session.commit()
+    if ticket is None:
+        return redirect(url_for('views.create_ticket'))
 
-        except IntegrityError:
-            db.session.rollback()
-            flash('Could not submit ticket, invalid data', category='error')
+    if current_app.config['TICKET_JOURNAL_ENABLED']:
+        return _journal_ticket(ticket)
 
-        except Exception as e:
-            flash('Could not submit ticket, unknown reason', category='error')
-            print(f'Failed to create ticket: {e}', file=sys.stderr)
+    return _insert_ticket(ticket)
 
-        else:
-            flash('Ticket created successfully!', category='success')
-            return redirect(url_for('views.index'))
+@views.route('/my-tickets')
+def my_tickets():
+    """
+    Serves the HTTP route /my-tickets. Shows the student the status of the tickets they submitted recently,
+    with the position of their open tickets in the queue and an estimated wait. The page polls /my-tickets/status.
 
-    return redirect(url_for('views.create_ticket'))
+    Signed in students see every ticket submitted with their email, guests the tickets submitted in their session.
+    """
+    if current_user.is_authenticated:
+        for ticket_id in db.session.execute(
+                select(Ticket.id).where(Ticket.student_email == current_user.email, Ticket.status != Status.Closed).order_by(Ticket.id)).scalars():
+            _remember_ticket(ticket_id)
+
+    tickets = _ticket_statuses()
+    return render_template('my-tickets.html', tickets=tickets)
+
+@views.route('/my-tickets/status')
+def my_tickets_status():
+    """
+    Returns the status of the tickets shown by /my-tickets as JSON. Open tickets are answered from the queue kept in
+    memory by the worker (see app/ticket_queue.py), only tickets that left the queue are read from the database.
+    """
+    tickets = _ticket_statuses()
+
+    for ticket in tickets:
+        ticket['status'] = str(ticket['status'])
+
+    return jsonify(tickets=tickets)
+
+@views.route('/api/catalog/search')
+def search_catalog():
+    """
+    Serves the HTTP route /api/catalog/search, which forms use to look courses and sections up as they are typed
+    rather than listing every option in the page. Returns JSON with up to 'limit' (at most CATALOG_SEARCH_LIMIT):
+    - courses whose code, name or a word of their name starts with 'q', or if 'course' is given
+    - sections of that course (as entered on a ticket, e.g. 'CSCI 1620') in the current semester whose number starts with 'q'
+
+    Searches are answered from prefix indexes of the catalog cached by the worker (see app/catalog.py), without any queries.
+    """
+    text = request.args.get('q', '')
+    limit = min(request.args.get('limit', CATALOG_SEARCH_LIMIT, type=int), CATALOG_SEARCH_LIMIT)
+    course = request.args.get('course')
+
+    if course is not None:
+        course_id = catalog.find_course_id(course)
+        sections = catalog.search_sections(course_id, text, limit) if course_id else []
+        response = jsonify(sections=[ { 'id': s.id, 'value': f'{s.section_number:03d}', 'label': str(s) } for s in sections ])
+
+    else:
+        courses = catalog.search_courses(text, limit)
+        response = jsonify(courses=[ { 'id': c.id, 'value': f'{c.department} {c.number}', 'label': str(c) } for c in courses ])
+
+    # Browsers may reuse results for as long as the cached pages they are used from
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['PAGE_CACHE_MAX_AGE']
+    return response
+
+@views.route('/api/similar-tickets')
+def search_similar_tickets():
+    """
+    Serves the HTTP route /api/similar-tickets, used by the ticket form to show students recent questions like the one
+    they are writing. Returns JSON with up to SIMILAR_TICKETS_LIMIT tickets of the course 'course' similar to the
+    'assignment' and 'question', with their assignment name, the start of their question and their status but nothing
+    about who asked them. Nothing is returned unless the course is in the catalog.
+    """
+    course_id = catalog.find_course_id(request.args.get('course'))
+
+    if course_id is None:
+        return jsonify(tickets=[])
+
+    ids = similar_tickets.similar_to_question(course_id, request.args.get('assignment'), request.args.get('question'), SIMILAR_TICKETS_LIMIT)
+
+    if not ids:
+        return jsonify(tickets=[])
+
+    rows = { row.id: row for row in db.session.execute(
+        select(Ticket.id, Ticket.assignment_name, Ticket.specific_question, Ticket.status).where(Ticket.id.in_(ids))) }
+
+    return jsonify(tickets=[
+        { 'id': id, 'assignment': rows[id].assignment_name, 'question': _preview(rows[id].specific_question), 'status': str(rows[id].status) }
+        for id in ids if id in rows ])
 
 @views.route('/view-tickets')
 @permission_required(Permission.Tutor)
@@ -88,10 +230,44 @@ def view_tickets():
     Utilizes the flask funciton 'render_template' to render the passed in view-tickets.html template which is
     used to display all tickets to tutors to be able to claim individual tickets.
 
+    Tutors that were given courses (see CanTutor) only see the open tickets of those courses, and the open tickets
+    that are not linked to any course, unless they ask for all of them with ?all. Open tickets list the other open
+    tickets that look like the same question (see app/similar_tickets.py), and the open tickets about the same
+    assignment of the same course, which can be claimed together as a group session.
+
     Student login is required to access this page.
     """
-    tickets = Ticket.query.all()
-    return render_template('view_tickets.html', tickets=tickets)
+    show_all = request.args.get('all') is not None
+    courses = routing.tutor_courses(current_user.id)
+    query = Ticket.query
+
+    if courses and not show_all:
+        query = query.filter(or_(Ticket.status != Status.Open, Ticket.course_id.is_(None), Ticket.course_id.in_(courses)))
+
+    tickets = query.all()
+    shift = presence.current_shift(current_user) if current_user.tutor_is_working else None
+
+    # Open tickets asking about the same thing can be helped together
+    open_tickets = [ ticket for ticket in tickets if ticket.status == Status.Open ]
+    similar = similar_tickets.similar_open_tickets(open_tickets, SIMILAR_TICKETS_LIMIT)
+
+    return render_template('view_tickets.html', tickets=tickets, filtered=bool(courses) and not show_all, show_all=show_all, shift=shift,
+                           similar=similar, groups=_open_ticket_groups(open_tickets))
+
+@views.route('/search-tickets')
+@permission_required(Permission.Tutor)
+def search_tickets():
+    """
+    Serves the HTTP route /search-tickets. Searches every ticket by assignment name, question and tutor notes for the words
+    in 'q', best match first, and shows page 'page' of SEARCH_PAGE_SIZE tickets. See app/ticket_search.py.
+
+    Tutor permission is required to access this page.
+    """
+    query = strip_or_none(request.args.get('q')) or ''
+    page = max(request.args.get('page', 1, type=int), 1)
+    tickets, has_more = ticket_search.search_tickets(query, page, SEARCH_PAGE_SIZE)
+
+    return render_template('search-tickets.html', query=query, page=page, tickets=tickets, has_more=has_more)
 
 @views.route('/update-ticket', methods=["POST"])
 @permission_required(Permission.Tutor)
@@ -103,29 +279,124 @@ def update_ticket():
     # get the tutors to display for edit ticket modal if the user presses it
     ticketID = request.form.get("ticketID")
     ticket: Ticket = Ticket.query.get(ticketID)
-
-    # TODO: Check to make state is valid before changing it!!
+    action = request.form.get("action")
 
     if ticket is None:
         flash('Could not update ticket status. Ticket not found in database.', category='error')
 
-    elif request.form.get("action") == "Claim":
-        ticket.claim(current_user)
-        db.session.commit()
-        flash('Ticket claimed!', category='info')
+    elif action not in Ticket.TRANSITIONS:
+        flash('Did not change ticket status. Unknown action.', category='error')
 
-    elif request.form.get("action") == "Close":
+    elif action == "Claim":
+        # Only claims the ticket if nobody else (e.g. the dispatcher) claimed it first
+        if Ticket.claim_if_open(ticket.id, current_user.id, ticket.time_created):
+            db.session.commit()
+            ticket_queue.ticket_left(ticket.id)
+            flash('Ticket claimed!', category='info')
+
+        else:
+            db.session.rollback()
+            flash('Could not claim ticket, it was already claimed.', category='error')
+
+    elif ticket.status not in Ticket.TRANSITIONS[action][0]:
+        flash(f'Did not change ticket status. The ticket is {str(ticket.status).lower()}.', category='error')
+
+    elif action == "Close":
         ticket.close()
         db.session.commit()
+        ticket_queue.ticket_left(ticket.id)
         flash('Ticket closed!', category='info')
 
-    elif request.form.get("action") == "Open":
+    else:
         ticket.reopen()
         db.session.commit()
+        ticket_queue.ticket_opened(ticket)
         flash('Ticket opened!', category='info')
 
+    return redirect(url_for('views.view_tickets'))
+
+@views.route('/api/tickets/bulk', methods=["POST"])
+@permission_required(Permission.Tutor)
+def bulk_update_tickets():
+    """
+    Serves the HTTP route /api/tickets/bulk, which applies a board action (Claim, Close or Open) to many tickets at once,
+    e.g. to close the tickets left claimed at the end of a shift. Takes the 'action' and the ticket 'ids' as a JSON object,
+    or as the form fields 'action' and 'ticketID', and updates the tickets in one transaction (see Ticket.apply_action).
+
+    Returns JSON with the number of tickets updated and the outcome and status of each ticket, or status 400 for an unknown
+    action or no or more than BULK_ACTION_LIMIT ticket ids.
+    """
+    action, ids = _bulk_action()
+
+    if action not in Ticket.TRANSITIONS or not ids or len(ids) > BULK_ACTION_LIMIT:
+        return jsonify(error=f'Expected an action ({", ".join(Ticket.TRANSITIONS)}) and 1 to {BULK_ACTION_LIMIT} ticket ids.'), 400
+
+    outcomes = Ticket.apply_action(action, ids, current_user.id)
+    db.session.commit()
+
+    updated = [ ticket_id for ticket_id, (outcome, _) in outcomes.items() if outcome == 'updated' ]
+
+    if action == 'Open':
+        for ticket in Ticket.query.filter(Ticket.id.in_(updated)):
+            ticket_queue.ticket_opened(ticket)
+
     else:
-        flash('Did not change ticket status. Unknown action.', category='error')
+        for ticket_id in updated:
+            ticket_queue.ticket_left(ticket_id)
+
+    return jsonify(action=action, updated=len(updated), tickets=[
+        { 'id': ticket_id, 'outcome': outcome, 'status': str(status) if status else None } for ticket_id, (outcome, status) in outcomes.items() ])
+
+@views.route('/claim-group', methods=["POST"])
+@permission_required(Permission.Tutor)
+def claim_group():
+    """
+    Handles the HTTP request when a tutor claims the open tickets 'ticketID' about the same assignment of a course as one
+    group session (see TicketGroup). The tickets are claimed in one UPDATE, those claimed by someone else first are skipped.
+    """
+    ids = request.form.getlist('ticketID', type=int)
+    tickets = Ticket.query.filter(Ticket.id.in_(ids), Ticket.status == Status.Open).order_by(Ticket.id).all()
+
+    # Only tickets that still belong together, they may have been edited since the board was loaded
+    tickets = [ ticket for ticket in tickets if _group_key(ticket) == _group_key(tickets[0]) ]
+
+    if not tickets:
+        flash('Could not claim tickets, they were already claimed.', category='error')
+        return redirect(url_for('views.view_tickets'))
+
+    group = TicketGroup(current_user.id, tickets[0].course_id, tickets[0].assignment_name)
+    db.session.add(group)
+    db.session.flush()
+
+    claimed = group.claim(tickets)
+
+    if claimed:
+        db.session.commit()
+
+        for ticket_id in claimed:
+            ticket_queue.ticket_left(ticket_id)
+
+        flash(f'Claimed {len(claimed)} tickets as a group session!', category='info')
+
+    else:
+        db.session.rollback()
+        flash('Could not claim tickets, they were already claimed.', category='error')
+
+    return redirect(url_for('views.view_tickets'))
+
+@views.route('/close-group', methods=["POST"])
+@permission_required(Permission.Tutor)
+def close_group():
+    """Handles the HTTP request when a tutor closes the group session 'groupID', closing all its tickets that are still claimed at once."""
+    group = db.session.get(TicketGroup, request.form.get('groupID', type=int) or 0)
+
+    if group is None:
+        flash('Could not close group session. Group session not found in database.', category='error')
+
+    else:
+        closed = group.close()
+        db.session.commit()
+        flash(f'Closed {closed} tickets of the group session!', category='info')
 
     return redirect(url_for('views.view_tickets'))
 
@@ -144,6 +415,178 @@ def edit_ticket():
 
     return redirect(url_for('views.view_tickets'))
 
+@views.route('/heartbeat', methods=["POST"])
+@permission_required(Permission.Tutor)
+def heartbeat():
+    """
+    Sent by the tutor board every few seconds while it is open. Only recorded in memory, see app/presence.py.
+    Tells the board whether the tutor is still clocked in, they are clocked out when their heartbeats stop.
+    """
+    presence.heartbeat(current_user)
+    return jsonify(working=bool(current_user.tutor_is_working))
+
+@views.route('/clock-in', methods=["POST"])
+@permission_required(Permission.Tutor)
+def clock_in():
+    presence.clock_in(current_user)
+    flash('Clocked in!', category='info')
+    return redirect(url_for('views.view_tickets'))
+
+@views.route('/clock-out', methods=["POST"])
+@permission_required(Permission.Tutor)
+def clock_out():
+    presence.clock_out(current_user)
+    flash('Clocked out!', category='info')
+    return redirect(url_for('views.view_tickets'))
+
+def _bulk_action():
+    data = request.get_json(silent=True) if request.is_json else { 'action': request.form.get('action'), 'ids': request.form.getlist('ticketID') }
+
+    if not isinstance(data, dict) or not isinstance(data.get('ids'), list):
+        return None, None
+
+    try:
+        # Ticket ids in the order given, without repeats
+        return data.get('action'), list(dict.fromkeys(int(ticket_id) for ticket_id in data['ids']))
+
+    except (TypeError, ValueError):
+        return None, None
+
+def _group_key(ticket: Ticket):
+    # Tickets not linked to a course are grouped by the course code the students typed
+    course = ticket.course_id if ticket.course_id is not None else catalog.course_code(ticket.course)
+    return course, ' '.join((ticket.assignment_name or '').lower().split())
+
+def _open_ticket_groups(tickets: list):
+    """Returns the ids of the open tickets about the same assignment of the same course as each ticket, for the tickets that have some."""
+    groups = {}
+
+    for ticket in tickets:
+        groups.setdefault(_group_key(ticket), []).append(ticket.id)
+
+    return { ticket_id: ids for ids in groups.values() if len(ids) > 1 for ticket_id in ids }
+
+def _remember_ticket(ticket_id: int):
+    remembered = session.get('my_tickets', [])
+
+    if ticket_id not in remembered:
+        session['my_tickets'] = (remembered + [ ticket_id ])[-MY_TICKETS_LIMIT:]
+
+def _remember_submission(submission_key: str):
+    session['my_submissions'] = (session.get('my_submissions', []) + [ submission_key ])[-MY_TICKETS_LIMIT:]
+
+def _resolve_submissions():
+    # Journaled tickets (see app/ticket_journal.py) are remembered by id once they were inserted
+    submissions = session.get('my_submissions')
+
+    if not submissions:
+        return
+
+    inserted = dict(db.session.execute(select(Ticket.submission_key, Ticket.id).where(Ticket.submission_key.in_(submissions))).all())
+
+    for submission_key in submissions:
+        if submission_key in inserted:
+            _remember_ticket(inserted[submission_key])
+
+    session['my_submissions'] = [ submission_key for submission_key in submissions if submission_key not in inserted ]
+
+def _ticket_statuses():
+    """Returns the status, queue position and estimated wait in minutes of each ticket remembered by the session."""
+    _resolve_submissions()
+    queue = ticket_queue.get_queue()
+    statuses = {}
+
+    for ticket_id in session.get('my_tickets', []):
+        position = queue.position(ticket_id)
+
+        if position is not None:
+            wait_minutes = _minutes(queue.estimated_wait(position))
+            statuses[ticket_id] = { 'id': ticket_id, 'status': Status.Open, 'position': position, 'wait_minutes': wait_minutes }
+
+    # Tickets no longer in the queue were claimed or closed, or are too new for the queue of this worker
+    others = [ ticket_id for ticket_id in session.get('my_tickets', []) if ticket_id not in statuses ]
+
+    if others:
+        for ticket_id, status in db.session.execute(select(Ticket.id, Ticket.status).where(Ticket.id.in_(others))):
+            statuses[ticket_id] = { 'id': ticket_id, 'status': status, 'position': None, 'wait_minutes': None }
+
+    return [ statuses[ticket_id] for ticket_id in session.get('my_tickets', []) if ticket_id in statuses ]
+
+def _insert_ticket(ticket: Ticket):
+    try:
+        db.session.add(ticket)
+        db.session.commit()
+
+    except IntegrityError:
+        db.session.rollback()
+
+        # Inserting the same submission key twice fails, there is no need to look for it beforehand
+        submitted = _find_submitted_ticket(ticket.submission_key, ticket.student_email)
+
+        if submitted is not None:
+            return _ticket_submitted(submitted)
+
+        flash('Could not submit ticket, invalid data', category='error')
+
+    except Exception as e:
+        flash('Could not submit ticket, unknown reason', category='error')
+        print(f'Failed to create ticket: {e}', file=sys.stderr)
+
+    else:
+        ticket_queue.ticket_opened(ticket)
+        similar_tickets.ticket_added(ticket)
+        return _ticket_submitted(ticket)
+
+    return redirect(url_for('views.create_ticket'))
+
+def _journal_ticket(ticket: Ticket):
+    try:
+        ticket_journal.journal_ticket(ticket)
+
+    except OSError as e:
+        flash('Could not submit ticket, unknown reason', category='error')
+        print(f'Failed to journal ticket: {e}', file=sys.stderr)
+        return redirect(url_for('views.create_ticket'))
+
+    # The ticket gets its id once it is inserted, until then the session knows it by its submission key
+    _remember_submission(ticket.submission_key)
+
+    flash('Ticket created successfully!', category='success')
+    return redirect(url_for('views.index'))
+
+def _ticket_submitted(ticket: Ticket):
+    _remember_ticket(ticket.id)
+
+    flash('Ticket created successfully!', category='success')
+    return redirect(url_for('views.index'))
+
+def _submission_key(form: ImmutableMultiDict):
+    key = strip_or_none(form.get("submission_key"))
+
+    # Keys that do not fit the column are ignored, the ticket is still created
+    return key if key and len(key) <= SUBMISSION_KEY_LENGTH else None
+
+def _find_submitted_ticket(submission_key: str, email: str):
+    """Returns the ticket created by the submission with this key, as long as it was submitted with the same email."""
+    if submission_key is None:
+        return None
+
+    ticket = db.session.execute(select(Ticket).where(Ticket.submission_key == submission_key)).scalar()
+    return ticket if ticket is not None and ticket.student_email == email else None
+
+def _session_id():
+    # Sessions that were just started by this request are new for every request of a client that drops its cookies
+    if current_app.config['SESSION_COOKIE_NAME'] in request.cookies:
+        return getattr(session, 'sid', None)
+
+def _count_unresolved_tickets(email: str) -> int:
+    # Counted through the student_email index
+    unresolved = select(func.count()).select_from(Ticket).where(Ticket.student_email == email, Ticket.status != Status.Closed)
+    return db.session.execute(unresolved).scalar()
+
+def _minutes(wait):
+    return None if wait is None else max(round(wait.total_seconds() / 60), 1)
+
 # TODO: Use flask-wtf for form handling and validation
 def _attempt_create_ticket(form: ImmutableMultiDict):
     """
@@ -153,8 +596,12 @@ def _attempt_create_ticket(form: ImmutableMultiDict):
         - assignment: must be non-empty
         - question: must be non-empty
         - mode: must be valid model.Mode
+        - course: must be a displayed course, if any courses are displayed
+        - section: must be a current section of the course, if the course has any
 
         returns a Ticket object if values are valid, None otherwise.
+
+    The problem type, course and section are checked against the catalog cached by the worker (see app/catalog.py), without any queries.
     """
 
     # If the user is logged in, use their name and email
@@ -172,7 +619,12 @@ def _attempt_create_ticket(form: ImmutableMultiDict):
     assignment = strip_or_none(form.get("assignment"))
     question = strip_or_none(form.get("question"))
     problem_id = strip_or_none(form.get("problem"))
-    problem: ProblemType = ProblemType.query.get(problem_id)
+    problem = catalog.get_problem_type(problem_id)
+
+    # Link the ticket to the course and section it is for
+    course_id = catalog.find_course_id(course)
+    section_id = catalog.find_section_id(course_id, section)
+    course_error = _check_course(course_id, section)
 
     if str_empty(email):
         flash('Could not submit ticket, email must not be empty!', category='error')
@@ -189,22 +641,37 @@ def _attempt_create_ticket(form: ImmutableMultiDict):
     elif problem_id is not None and not problem:
         flash('Could not submit ticket, problem type is not valid!', category='error')
 
-    # TODO: Check if course is a valid from a list of options
-    # TODO: Check if section is valid from a list of options
+    elif course_error:
+        flash(course_error, category='error')
 
     else:
         mode_val = strip_or_none(form.get("mode"))
-        mode = None
 
         try:
-            if mode_val:
-                mode = Mode(int(mode_val))
+            mode = Mode(int(mode_val)) if mode_val else None
 
         except ValueError:
             flash('Could not submit ticket, must select a valid mode!', category='error')
 
         else:
-            return Ticket(email, name, course, section, assignment, question, problem_id, mode)
+            return Ticket(email, name, course, section, assignment, question, problem_id, mode, course_id, section_id, _submission_key(form))
+
+def _check_course(course_id: int, section: str):
+    """Returns why the course or section entered on a ticket is not valid, or None if they are."""
+    if course_id is None and catalog.courses():
+        return 'Could not submit ticket, course is not valid!'
+
+    if not catalog.is_current_section(course_id, section):
+        return 'Could not submit ticket, section is not valid!'
+
+def _preview(text: str):
+    """Returns the start of the text, cut at a word, for showing other students' questions."""
+    text = text or ''
+
+    if len(text) <= SIMILAR_QUESTION_PREVIEW:
+        return text
+
+    return text[:SIMILAR_QUESTION_PREVIEW].rsplit(' ', 1)[0] + '...'
 
 def _attempt_edit_ticket(ticket: Ticket):
     # get info back from popup modal form
@@ -227,6 +694,11 @@ def _attempt_edit_ticket(ticket: Ticket):
         # new info for section came back, update it for current ticket
         ticket.section = section
 
+    if course or section:
+        # keep the linked course and section in line with the text
+        ticket.course_id = catalog.find_course_id(ticket.course)
+        ticket.section_id = catalog.find_section_id(ticket.course_id, ticket.section) if ticket.course_id else None
+
     if assignment != ticket.assignment_name:
         # new info for assignment came back, update it for current ticket
         ticket.assignment_name = assignment
@@ -0,0 +1,147 @@
+from flask import current_app
+from flask import g
+from flask import has_app_context
+
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .model import CacheVersion
+
+from datetime import datetime
+from functools import wraps
+
+import threading
+import time
+
+class VersionedCache:
+    """
+    A value built from the database which is kept in memory by a worker and shared by every request it handles.
+
+    The value is rebuilt when the version counter 'version_name' (see bump_version()) changes, which is checked
+    at most once every 'poll_interval' seconds, so reading the value does not touch the database in the common case.
+    The loader returns the value together with the datetime at which it goes stale on its own (or None if it never does),
+    e.g. when a message should start being displayed.
+    """
+
+    def __init__(self, version_name: str, loader, poll_interval: float):
+        self.version_name = version_name
+        self.loader = loader
+        self.poll_interval = poll_interval
+
+        # The value and its generation, which is incremented every time the value is rebuilt.
+        # They are kept in one tuple so they can be read together without a lock.
+        self._current = (None, 0)
+        self._version = None
+        self._expires_at = None
+        self._next_poll = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        if time.monotonic() >= self._next_poll or self._expired():
+            self._refresh()
+
+        value, generation = self._current
+
+        # Remember which caches (and which generation of them) the current request used, see app/page_cache.py
+        if has_app_context():
+            g.setdefault('versioned_caches', {})[self] = generation
+
+        return value
+
+    @property
+    def generation(self):
+        """Incremented every time the value is rebuilt, can be used to tell if the value changed."""
+        return self._current[1]
+
+    def update(self, func):
+        """
+        Replaces the value with func(value) without reloading it, e.g. to apply a change this worker just made
+        straight away. Nothing is done if the value was not loaded yet, it will be loaded with the change on the next read.
+        """
+        with self._lock:
+            value, generation = self._current
+
+            if self._version is not None:
+                self._current = (func(value), generation + 1)
+
+    def invalidate(self):
+        """Forces the value to be checked against the version counter on the next read."""
+        self._version = None
+        self._next_poll = 0.0
+
+    def _refresh(self):
+        with self._lock:
+            # Another thread may have refreshed the value while we were waiting for the lock
+            if time.monotonic() < self._next_poll and not self._expired():
+                return
+
+            # Read the version before loading, so a change made while loading is picked up by the next poll
+            version = get_version(self.version_name)
+
+            if version != self._version or self._expired():
+                value, self._expires_at = self.loader()
+                self._current = (value, self.generation + 1)
+                self._version = version
+
+            self._next_poll = time.monotonic() + self.poll_interval
+
+    def _expired(self):
+        return self._expires_at is not None and datetime.now() >= self._expires_at
+
+def get_cache(name: str, version_name: str, loader) -> VersionedCache:
+    """Returns the cache called 'name' of the current app, creating it the first time it is used."""
+    caches = current_app.extensions.setdefault('versioned_caches', {})
+    cache = caches.get(name)
+
+    if cache is None:
+        cache = caches.setdefault(name, VersionedCache(version_name, loader, current_app.config['CACHE_POLL_INTERVAL']))
+
+    return cache
+
+def get_version(name: str) -> int:
+    version = db.session.execute(select(CacheVersion.version).where(CacheVersion.name == name)).scalar()
+    return version or 0
+
+def bump_version(name: str, invalidate: bool = True):
+    """
+    Increments the version counter 'name' so every worker rebuilds the caches depending on it.
+    Caches of the current worker are invalidated straight away, others notice within one poll interval.
+    Pass invalidate=False when the caches of the current worker were already updated (see VersionedCache.update()).
+    """
+    increment = update(CacheVersion).where(CacheVersion.name == name).values(version=CacheVersion.version + 1)
+
+    try:
+        if db.session.execute(increment).rowcount == 0:
+            db.session.add(CacheVersion(name, 1))
+
+        db.session.commit()
+
+    except IntegrityError:
+        # Another worker created the counter at the same time, increment theirs instead
+        db.session.rollback()
+        db.session.execute(increment)
+        db.session.commit()
+
+    if not invalidate:
+        return
+
+    for cache in current_app.extensions.get('versioned_caches', {}).values():
+        if cache.version_name == name:
+            cache.invalidate()
+
+def bumps_version(name: str):
+    """Decorator for routes that change cached data, bumps the version counter 'name' after the route has run."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+
+            finally:
+                # The route may have failed half way with a pending transaction, don't commit that with the version
+                db.session.rollback()
+                bump_version(name)
+        return wrapper
+    return decorator
@@ -0,0 +1,238 @@
+from .cache import get_cache
+from .cache import bumps_version
+
+from .model import Course
+from .model import ProblemType
+from .model import Professor
+from .model import Section
+from .model import Semester
+
+from bisect import bisect_left
+from datetime import date
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+from types import MappingProxyType
+from typing import NamedTuple
+
+import re
+
+# Name of the version counter bumped by every route that changes the catalog
+CATALOG_VERSION = 'catalog'
+
+# Department and number at the start of a course as entered on a ticket, e.g. 'CSCI 1620', 'csci-1620' or 'CSCI 1620: Java I'
+COURSE_CODE_PATTERN = re.compile(r'^\s*([A-Za-z]+)\s*-?\s*([0-9A-Za-z]+)')
+SECTION_NUMBER_PATTERN = re.compile(r'\d+')
+
+class ProblemTypeSnapshot(NamedTuple):
+    id: int
+    problem_type: str
+
+    def __str__(self):
+        return self.problem_type
+
+class CourseSnapshot(NamedTuple):
+    id: int
+    department: str
+    number: str
+    course_name: str
+
+    def __str__(self):
+        return f'{self.department} {self.number}: {self.course_name}'
+
+class SectionSnapshot(NamedTuple):
+    id: int
+    section_number: int
+    section_mode: object
+    days_of_week: str
+    start_time: object
+    end_time: object
+    course_id: int
+    semester_id: int
+    professor_id: int
+
+    def __str__(self):
+        return f'{self.section_number} - {self.section_mode}'
+
+class ProfessorSnapshot(NamedTuple):
+    id: int
+    first_name: str
+    last_name: str
+
+    def __str__(self):
+        return f'{self.first_name} {self.last_name}'
+
+class PrefixIndex:
+    """
+    Sorted (key, id) pairs, finds the ids of the keys starting with a given prefix with a binary search.
+    Keys are normalized with search_key(), an id may be indexed under several keys.
+    """
+
+    def __init__(self, entries):
+        self._entries = sorted(set((search_key(key), id) for key, id in entries))
+
+    def search(self, prefix: str, limit: int):
+        """Returns the ids of up to 'limit' keys starting with 'prefix', in the order of their keys and without duplicates."""
+        prefix = search_key(prefix)
+        ids = {}
+
+        for key, id in self._entries[bisect_left(self._entries, (prefix,)):]:
+            if not key.startswith(prefix) or len(ids) >= limit:
+                break
+
+            ids.setdefault(id, None)
+
+        return list(ids)
+
+class Catalog(NamedTuple):
+    """
+    Immutable snapshot of the catalog: every problem type, every course that is on display, the sections
+    of the current semester(s) and every professor. Lookups by id are provided for each of them.
+    """
+    problem_types: tuple
+    courses: tuple
+    sections: tuple
+    professors: tuple
+    problem_types_by_id: MappingProxyType
+    courses_by_id: MappingProxyType
+    sections_by_id: MappingProxyType
+    professors_by_id: MappingProxyType
+
+    # Course ids by course_code(), section ids by (course id, section number)
+    course_ids_by_code: MappingProxyType
+    section_ids_by_number: MappingProxyType
+
+    # The section numbers of the current semester(s) by course id, courses without current sections are left out
+    section_numbers_by_course: MappingProxyType
+
+    # Course ids by their code, name and each word of their name, section ids by their course id and number (see search_courses())
+    course_search: PrefixIndex
+    section_search: PrefixIndex
+
+def get_catalog() -> Catalog:
+    """
+    Returns the catalog snapshot cached by this worker. It is rebuilt when the catalog version is bumped
+    by an admin (see bumps_catalog_version()) and at midnight, as that is when the current semester may change.
+    """
+    return get_cache('catalog', CATALOG_VERSION, _load_catalog).get()
+
+def problem_types():
+    return get_catalog().problem_types
+
+def courses():
+    return get_catalog().courses
+
+def sections():
+    return get_catalog().sections
+
+def professors():
+    return get_catalog().professors
+
+def get_problem_type(id):
+    """Returns the problem type snapshot with the given id or None, the id may be a string from a form."""
+    try:
+        return get_catalog().problem_types_by_id.get(int(id))
+
+    except (TypeError, ValueError):
+        return None
+
+def find_course_id(course: str):
+    """Returns the id of the displayed course matching the course as entered on a ticket, or None."""
+    return get_catalog().course_ids_by_code.get(course_code(course))
+
+def find_section_id(course_id: int, section: str):
+    """Returns the id of the current section of the given course matching the section as entered on a ticket, or None."""
+    return get_catalog().section_ids_by_number.get((course_id, section_number(section)))
+
+def is_current_section(course_id: int, section: str):
+    """
+    Returns whether the section as entered on a ticket is a current section of the given course.
+    Any section is accepted for courses without current sections, and for tickets not linked to a course.
+    """
+    numbers = get_catalog().section_numbers_by_course.get(course_id)
+    return not numbers or section_number(section) in numbers
+
+def search_courses(text: str, limit: int):
+    """Returns up to 'limit' displayed courses whose code (e.g. 'CSCI 1620'), name or a word of their name starts with 'text'."""
+    catalog = get_catalog()
+    return [ catalog.courses_by_id[id] for id in catalog.course_search.search(text, limit) ]
+
+def search_sections(course_id: int, text: str, limit: int):
+    """Returns up to 'limit' current sections of the course whose number (e.g. '001' or '1') starts with 'text'."""
+    catalog = get_catalog()
+    return [ catalog.sections_by_id[id] for id in catalog.section_search.search(f'{course_id}:{search_key(text)}', limit) ]
+
+def search_key(text: str):
+    """Returns the text lowercased and with runs of whitespace replaced by a single space, as searched for in a PrefixIndex."""
+    return ' '.join((text or '').lower().split())
+
+def course_code(course: str):
+    """Returns the normalized (department, number) at the start of a course name, e.g. ('CSCI', '1620'), or None."""
+    match = COURSE_CODE_PATTERN.match(course or '')
+    return (match.group(1).upper(), match.group(2).upper()) if match else None
+
+def section_number(section: str):
+    """Returns the first number in a section name, e.g. 1 for '001' or 850 for '850 - Remote', or None."""
+    match = SECTION_NUMBER_PATTERN.search(section or '')
+    return int(match.group()) if match else None
+
+def bumps_catalog_version(func):
+    """Decorator for routes that change the problem types, courses, semesters, sections or professors."""
+    return bumps_version(CATALOG_VERSION)(func)
+
+def _load_catalog():
+    today = date.today()
+
+    problem_types = tuple(ProblemTypeSnapshot(p.id, p.problem_type) for p in ProblemType.query.order_by(ProblemType.id))
+
+    courses = tuple(
+        CourseSnapshot(c.id, c.department, c.number, c.course_name)
+        for c in Course.query.filter(Course.on_display.is_(True)).order_by(Course.department, Course.number))
+
+    sections = tuple(
+        SectionSnapshot(s.id, s.section_number, s.section_mode, s.days_of_week, s.start_time, s.end_time, s.course_id, s.semester_id, s.professor_id)
+        for s in Section.query.join(Semester).filter(Semester.start_date <= today, Semester.end_date >= today).order_by(Section.section_number))
+
+    professors = tuple(
+        ProfessorSnapshot(p.id, p.first_name, p.last_name)
+        for p in Professor.query.order_by(Professor.last_name, Professor.first_name))
+
+    course_ids_by_code = MappingProxyType({ (c.department.upper(), c.number.upper()): c.id for c in courses })
+    section_ids_by_number = MappingProxyType({ (s.course_id, s.section_number): s.id for s in sections })
+
+    section_numbers = {}
+
+    for s in sections:
+        section_numbers.setdefault(s.course_id, set()).add(s.section_number)
+
+    section_numbers_by_course = MappingProxyType({ course_id: frozenset(numbers) for course_id, numbers in section_numbers.items() })
+
+    catalog = Catalog(
+        problem_types, courses, sections, professors,
+        _index(problem_types), _index(courses), _index(sections), _index(professors),
+        course_ids_by_code, section_ids_by_number, section_numbers_by_course,
+        PrefixIndex(_course_search_keys(courses)), PrefixIndex(_section_search_keys(sections)))
+
+    # The current semester may change at midnight, so reload by then
+    return catalog, datetime.combine(today + timedelta(days=1), time())
+
+def _course_search_keys(courses: tuple):
+    for c in courses:
+        yield str(c), c.id
+        yield f'{c.department}{c.number}', c.id
+        yield c.number, c.id
+
+        for word in c.course_name.split():
+            yield word, c.id
+
+def _section_search_keys(sections: tuple):
+    for s in sections:
+        if s.section_number is None:
+            continue
+
+        # Keyed by course id, the separator keeps the sections of course 1 from matching the prefix of course 12's
+        yield f'{s.course_id}:{s.section_number:03d}', s.id
+        yield f'{s.course_id}:{s.section_number}', s.id
+
+def _index(snapshots: tuple):
+    return MappingProxyType({ snapshot.id: snapshot for snapshot in snapshots })
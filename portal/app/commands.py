@@ -0,0 +1,158 @@
+from flask.cli import with_appcontext
+
+from sqlalchemy import bindparam
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import update
+
+from .extensions import db
+from .model import Course
+from .model import Section
+from .model import Semester
+from .model import Status
+from .model import Ticket
+
+from .catalog import course_code
+from .catalog import section_number
+from .sql import seconds_between
+
+from collections import defaultdict
+
+import click
+import time
+
+# NOTE: Commands are run with 'flask --app app <command>' from the 'portal/' directory,
+#       or 'docker exec portal flask --app app <command>' in production.
+
+@click.command('backfill-ticket-courses')
+@click.option('--batch-size', default=500, show_default=True, help='Number of tickets to update per transaction.')
+@click.option('--pause', default=0.1, show_default=True, help='Seconds to wait between batches, to leave room for other queries.')
+@with_appcontext
+def backfill_ticket_courses_command(batch_size: int, pause: float):
+    """
+    Links tickets made before tickets had a course_id and section_id to their course and section,
+    based on the course and section text entered by the student.
+
+    Tickets are updated in small batches of short transactions so the portal can keep running while this runs.
+    It can be stopped and run again at any time, tickets that were already linked are skipped.
+    """
+    scanned, linked = backfill_ticket_courses(batch_size, pause, click.echo)
+    click.echo(f'Done, linked {linked} of {scanned} tickets to a course')
+
+def backfill_ticket_courses(batch_size: int = 500, pause: float = 0.0, log=None):
+    """Returns how many unlinked tickets were looked at and how many of them were linked to a course."""
+    courses = db.session.execute(select(Course.id, Course.department, Course.number))
+    course_ids = { (department.upper(), number.upper()): id for id, department, number in courses }
+
+    # Every section a ticket could refer to, along with the dates of its semester to pick the right one
+    sections = defaultdict(list)
+    query = select(Section.id, Section.course_id, Section.section_number, Semester.start_date, Semester.end_date) \
+        .outerjoin(Semester, Section.semester_id == Semester.id)
+
+    for id, course_id, number, start_date, end_date in db.session.execute(query):
+        sections[(course_id, number)].append((id, start_date, end_date))
+
+    # Only fill in tickets that are still not linked, in case the ticket was edited since it was read
+    link = update(Ticket.__table__) \
+        .where(Ticket.__table__.c.id == bindparam('ticket_id'), Ticket.__table__.c.course_id.is_(None)) \
+        .values(course_id=bindparam('new_course_id'), section_id=bindparam('new_section_id'))
+
+    scanned = 0
+    linked = 0
+    last_id = 0
+
+    while True:
+        # Walk the tickets in id order so every batch is an index range scan, and each ticket is only looked at once per run
+        batch = db.session.execute(
+            select(Ticket.id, Ticket.course, Ticket.section, Ticket.time_created)
+            .where(Ticket.id > last_id, Ticket.course_id.is_(None), Ticket.course.is_not(None))
+            .order_by(Ticket.id)
+            .limit(batch_size)).all()
+
+        if not batch:
+            db.session.commit()
+            break
+
+        last_id = batch[-1].id
+        updates = []
+
+        for ticket in batch:
+            course_id = course_ids.get(course_code(ticket.course))
+
+            if course_id is not None:
+                section_id = _find_section_id(sections.get((course_id, section_number(ticket.section)), []), ticket.time_created)
+                updates.append({ 'ticket_id': ticket.id, 'new_course_id': course_id, 'new_section_id': section_id })
+
+        if updates:
+            db.session.execute(link, updates)
+
+        db.session.commit()
+
+        scanned += len(batch)
+        linked += len(updates)
+
+        if log is not None:
+            log(f'Linked {linked} of {scanned} tickets (up to ticket {last_id})')
+
+        if pause:
+            time.sleep(pause)
+
+    return scanned, linked
+
+def _find_section_id(candidates: list, time_created):
+    """Picks the section whose semester the ticket was created in, or the only section if there is one."""
+    created = time_created.date() if time_created is not None else None
+
+    for id, start_date, end_date in candidates:
+        if created is not None and start_date is not None and start_date <= created <= end_date:
+            return id
+
+    return candidates[0][0] if len(candidates) == 1 else None
+
+@click.command('backfill-ticket-durations')
+@click.option('--batch-size', default=1000, show_default=True, help='Number of ticket ids to update per transaction.')
+@click.option('--pause', default=0.1, show_default=True, help='Seconds to wait between batches, to leave room for other queries.')
+@with_appcontext
+def backfill_ticket_durations_command(batch_size: int, pause: float):
+    """
+    Fills in the wait and service durations of tickets claimed or closed before they were stored.
+
+    The durations are computed by the database in batches of ticket ids, each in its own short transaction.
+    It can be stopped and run again at any time, tickets that already have their durations are skipped.
+    """
+    updated = backfill_ticket_durations(batch_size, pause, click.echo)
+    click.echo(f'Done, filled in {updated} durations')
+
+def backfill_ticket_durations(batch_size: int = 1000, pause: float = 0.0, log=None):
+    """Returns how many durations were filled in, a closed ticket missing both its wait and service duration counts twice."""
+    tickets = Ticket.__table__.c
+    first, last = db.session.execute(select(func.min(tickets.id), func.max(tickets.id))).one()
+    db.session.commit()
+
+    if first is None:
+        return 0
+
+    updated = 0
+
+    for start in range(first, last + 1, batch_size):
+        in_batch = tickets.id.between(start, start + batch_size - 1)
+
+        wait = update(Ticket.__table__) \
+            .where(in_batch, tickets.wait_seconds.is_(None), tickets.time_claimed.is_not(None)) \
+            .values(wait_seconds=seconds_between(tickets.time_created, tickets.time_claimed))
+
+        service = update(Ticket.__table__) \
+            .where(in_batch, tickets.service_seconds.is_(None), tickets.status == Status.Closed) \
+            .where(tickets.time_claimed.is_not(None), tickets.time_closed.is_not(None)) \
+            .values(service_seconds=seconds_between(tickets.time_claimed, tickets.time_closed))
+
+        updated += db.session.execute(wait).rowcount + db.session.execute(service).rowcount
+        db.session.commit()
+
+        if log is not None:
+            log(f'Updated {updated} durations (up to ticket {min(start + batch_size - 1, last)})')
+
+        if pause:
+            time.sleep(pause)
+
+    return updated
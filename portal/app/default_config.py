@@ -30,3 +30,73 @@ SESSION_TYPE = 'sqlalchemy'
 
 # We set the db for Flask-Session here, before the tables are created
 SESSION_SQLALCHEMY = db
+
+# Workers cache rarely changing data (e.g. courses and problem types) in memory, this is how often
+# in seconds each worker checks whether another worker has changed that data. See app/cache.py
+CACHE_POLL_INTERVAL = 5
+
+# Pages which are the same for every anonymous visitor (e.g. the home page) are cached by the workers,
+# this is how long in seconds browsers and nginx may reuse them before revalidating. See app/page_cache.py
+PAGE_CACHE_MAX_AGE = 10
+
+# Background tasks (e.g. the ticket dispatcher) run on one worker at a time, which holds the task's lease.
+# If that worker stops renewing it, another worker takes the task over after this many seconds. See app/background.py
+BACKGROUND_TASKS_ENABLED = True
+LEADER_LEASE_SECONDS = 15
+
+# Hand open tickets out to free, qualified tutors automatically instead of waiting for them to be claimed.
+# The dispatcher assigns tickets every DISPATCHER_INTERVAL seconds and re-reads every open ticket every
+# DISPATCHER_RESYNC_INTERVAL seconds. See app/dispatcher.py
+DISPATCHER_ENABLED = False
+DISPATCHER_INTERVAL = 1.0
+DISPATCHER_RESYNC_INTERVAL = 60
+
+# Tutor boards send a heartbeat every PRESENCE_HEARTBEAT_INTERVAL seconds, each worker writes the heartbeats it received
+# to the database at most every PRESENCE_FLUSH_INTERVAL seconds. Clocked in tutors without a heartbeat for PRESENCE_TIMEOUT
+# seconds are clocked out, which is checked every PRESENCE_SWEEP_INTERVAL seconds. See app/presence.py
+PRESENCE_HEARTBEAT_INTERVAL = 30
+PRESENCE_FLUSH_INTERVAL = 10
+PRESENCE_TIMEOUT = 120
+PRESENCE_SWEEP_INTERVAL = 15
+
+# Students see the position of their open tickets and an estimated wait, from the open tickets each worker keeps in memory.
+# Changes made by other workers are read every QUEUE_REFRESH_INTERVAL seconds, the estimated wait is based on how many
+# tickets were taken over the last QUEUE_RATE_WINDOW seconds. See app/ticket_queue.py
+QUEUE_REFRESH_INTERVAL = 3
+QUEUE_RATE_WINDOW = 1800
+
+# Ticket submissions are limited per student (by email and by session) and per IP address, as (tickets, seconds): bursts
+# of up to that many tickets are allowed, refilled evenly over that many seconds. Limited submissions get a 429 response.
+# Students can have at most MAX_OPEN_TICKETS tickets that are not closed yet (0 for no limit). See app/rate_limit.py
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_PER_STUDENT = (5, 60)
+RATE_LIMIT_PER_IP = (60, 60)
+RATE_LIMIT_CLEANUP_INTERVAL = 300
+MAX_OPEN_TICKETS = 3
+
+# With TICKET_JOURNAL_ENABLED, submitted tickets are validated and written to an append-only journal file of the worker
+# instead of being inserted one by one. Each worker inserts its journaled tickets in one transaction every
+# TICKET_JOURNAL_FLUSH_INTERVAL seconds, journals of workers that are gone are taken over every TICKET_JOURNAL_RECOVERY_INTERVAL
+# seconds, also once it is disabled. The journals are kept in TICKET_JOURNAL_DIR (instance/ticket-journal by default).
+# See app/ticket_journal.py
+TICKET_JOURNAL_ENABLED = False
+TICKET_JOURNAL_DIR = None
+TICKET_JOURNAL_FLUSH_INTERVAL = 0.05
+TICKET_JOURNAL_RECOVERY_INTERVAL = 10
+
+# Tutors and students are shown recent tickets of the same course asking about the same thing, found by comparing the
+# words of their assignment names and questions. Each worker keeps the tickets of the last SIMILAR_TICKETS_DAYS days
+# (at most SIMILAR_TICKETS_MAX of them) in memory and reads new ones every SIMILAR_TICKETS_REFRESH_INTERVAL seconds.
+# Tickets are similar from a cosine similarity of SIMILAR_TICKETS_THRESHOLD (0 to 1). See app/similar_tickets.py
+SIMILAR_TICKETS_DAYS = 30
+SIMILAR_TICKETS_MAX = 20000
+SIMILAR_TICKETS_REFRESH_INTERVAL = 5
+SIMILAR_TICKETS_THRESHOLD = 0.5
+
+# Tickets still open or claimed after the center closed are closed by one of the workers every TICKET_SWEEPER_INTERVAL
+# seconds, once TICKET_SWEEPER_GRACE_MINUTES passed since closing time, TICKET_SWEEPER_BATCH_SIZE tickets per transaction.
+# The hours of the center are read from the Config table, or app/appconfig.json. See app/ticket_sweeper.py
+TICKET_SWEEPER_ENABLED = True
+TICKET_SWEEPER_INTERVAL = 300
+TICKET_SWEEPER_GRACE_MINUTES = 30
+TICKET_SWEEPER_BATCH_SIZE = 500
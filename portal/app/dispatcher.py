@@ -0,0 +1,147 @@
+from flask import Flask
+from flask import current_app
+
+from sqlalchemy import func
+from sqlalchemy import select
+
+from .extensions import db
+from .model import Mode
+from .model import Permission
+from .model import Status
+from .model import Ticket
+from .model import User
+
+from . import background
+from . import routing
+from . import ticket_queue
+
+from datetime import timedelta
+from heapq import heapify
+from heapq import heappop
+from heapq import heappush
+from typing import NamedTuple
+
+import time
+
+# Tickets are handed out oldest first, in-person tickets are treated as if they were made this much earlier,
+# since those students are waiting in the room
+MODE_HEAD_START = { Mode.InPerson: timedelta(minutes=2) }
+
+class QueuedTicket(NamedTuple):
+    priority: float
+    id: int
+    course_id: int
+    time_created: object
+
+class Dispatcher:
+    """
+    Hands open tickets out to working tutors that are not busy with another ticket and can tutor the ticket's course.
+
+    The open tickets are kept in a heap ordered by priority (see MODE_HEAD_START). Every tick only the tickets
+    created since the last tick are read, through the primary key; all open tickets are only read again through
+    the status index every 'resync_interval' seconds, to pick up tickets that were reopened or claimed by hand.
+    """
+
+    def __init__(self, resync_interval: float):
+        self.resync_interval = resync_interval
+
+        self._heap = []
+        self._last_id = 0
+        self._next_resync = 0.0
+
+        # When each tutor was last given a ticket, the tutor who waited the longest gets the next one
+        self._last_assigned = {}
+
+    def tick(self):
+        """Assigns as many queued tickets as there are free tutors for, returns a list of (ticket id, tutor id)."""
+        if time.monotonic() >= self._next_resync:
+            self._resync()
+
+        else:
+            self._load_new()
+
+        if not self._heap:
+            return []
+
+        free_tutors = self._free_tutors()
+        assignments = []
+        unassigned = []
+        unservable_courses = set()
+
+        while self._heap and free_tutors:
+            ticket = heappop(self._heap)
+
+            tutor_id = None
+            if ticket.course_id not in unservable_courses:
+                tutor_id = self._pick_tutor(free_tutors, ticket.course_id)
+
+            if tutor_id is None:
+                # Keep the ticket queued for when a qualified tutor is free
+                unservable_courses.add(ticket.course_id)
+                unassigned.append(ticket)
+                continue
+
+            # A ticket claimed by hand in the mean time is not claimed again, it is simply dropped from the queue
+            if Ticket.claim_if_open(ticket.id, tutor_id, ticket.time_created):
+                free_tutors.discard(tutor_id)
+                self._last_assigned[tutor_id] = time.monotonic()
+                assignments.append((ticket.id, tutor_id))
+
+        db.session.commit()
+
+        for ticket_id, _ in assignments:
+            ticket_queue.ticket_left(ticket_id)
+
+        for ticket in unassigned:
+            heappush(self._heap, ticket)
+
+        return assignments
+
+    def _pick_tutor(self, free_tutors: set, course_id: int):
+        candidates = [ tutor_id for tutor_id in free_tutors if routing.can_take(tutor_id, course_id) ]
+        return min(candidates, key=lambda tutor_id: (self._last_assigned.get(tutor_id, 0.0), tutor_id), default=None)
+
+    def _free_tutors(self):
+        busy = select(Ticket.tutor_id).where(Ticket.status == Status.Claimed, Ticket.tutor_id.is_not(None))
+
+        query = select(User.id).where(
+            User.tutor_is_working.is_(True), User.tutor_is_active.is_(True), User.permission >= Permission.Tutor,
+            User.oid.is_not(None), User.id.not_in(busy))
+
+        return set(db.session.execute(query).scalars())
+
+    def _resync(self):
+        self._last_id = db.session.execute(select(func.max(Ticket.id))).scalar() or 0
+        self._heap = [ _queued(row) for row in db.session.execute(_open_tickets()) ]
+        heapify(self._heap)
+        self._next_resync = time.monotonic() + self.resync_interval
+
+    def _load_new(self):
+        # NOTE: A ticket committed after a ticket with a higher id was read is only picked up by the next resync
+        for row in db.session.execute(_open_tickets().where(Ticket.id > self._last_id).order_by(Ticket.id)):
+            heappush(self._heap, _queued(row))
+            self._last_id = row.id
+
+def init_app(app: Flask):
+    """Runs the dispatcher in the background of one of the workers if DISPATCHER_ENABLED is set."""
+    if app.config['DISPATCHER_ENABLED']:
+        background.register_leader_task(app, 'dispatcher', dispatch, app.config['DISPATCHER_INTERVAL'])
+
+def get_dispatcher() -> Dispatcher:
+    dispatcher = current_app.extensions.get('dispatcher')
+
+    if dispatcher is None:
+        dispatcher = current_app.extensions.setdefault('dispatcher', Dispatcher(current_app.config['DISPATCHER_RESYNC_INTERVAL']))
+
+    return dispatcher
+
+def dispatch():
+    """Runs one tick of the app's dispatcher, returns the assignments it made."""
+    return get_dispatcher().tick()
+
+def _open_tickets():
+    return select(Ticket.id, Ticket.course_id, Ticket.mode, Ticket.time_created).where(Ticket.status == Status.Open)
+
+def _queued(row):
+    priority = (row.time_created - MODE_HEAD_START.get(row.mode, timedelta())).timestamp()
+    return QueuedTicket(priority, row.id, row.course_id, row.time_created)
@@ -2,13 +2,19 @@ from sqlalchemy import Column
 from sqlalchemy import String
 from sqlalchemy import Integer
 from sqlalchemy import DateTime
-from sqlalchemy import Enum
 from sqlalchemy import Boolean
 from sqlalchemy import Text
 from sqlalchemy import Time
 from sqlalchemy import Date
+from sqlalchemy import Double
+from sqlalchemy import case
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.types import TypeDecorator
 
 from sqlalchemy.sql import func
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.declarative import declarative_base
 from .extensions import db
 from flask_login import UserMixin
@@ -25,6 +31,36 @@ class ToStrEnum(enum.Enum):
     def __str__(self) -> str:
         return self.name
 
+class IntegerEnum(TypeDecorator):
+    """
+    Column type for a ToStrEnum that stores the integer value of the enum instead of its name. This way enum columns
+    can be compared with inequality operators in queries (e.g. User.permission >= Permission.Tutor) and indexed compactly.
+
+    Like SQLAlchemy's Enum, names (e.g. 'Fall' from a form) are accepted as well as members. Names are also accepted
+    when reading, for rows stored by the old Enum columns that were not migrated yet (see app/schema.py).
+    """
+    impl = Integer
+    cache_ok = True
+
+    def __init__(self, enum_class):
+        super().__init__()
+        self.enum_class = enum_class
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else self._to_enum(value).value
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self._to_enum(value)
+
+    def _to_enum(self, value):
+        if isinstance(value, self.enum_class):
+            return value
+
+        if isinstance(value, str) and not value.isdigit():
+            return self.enum_class[value]
+
+        return self.enum_class(int(value))
+
 class Status(ToStrEnum):
     """
     This Status class is designed to mimic an enum for values of which a ticket can obtain for its status value.
@@ -96,12 +132,14 @@ class User(db.Model, UserMixin):
 
     id = Column(Integer, primary_key=True, doc='Autonumber primary key for the users table.')
     oid = Column(String(50), unique=True, doc='ID token returned for the requestor. This is returned from MS authentication')
-    permission = Column(Enum(Permission), nullable=False, doc='Specifies permission level of user')
+    permission = Column(IntegerEnum(Permission), nullable=False, index=True, doc='Specifies permission level of user')
     email = Column(String(120), unique=True, nullable=False, doc='Email of user')
     name = Column(String(120), doc='Users name')
     tutor_is_active = Column(Boolean, doc='T/F if the tutor is currently employed')
-    tutor_is_working = Column(Boolean, doc='T/F if the tutor is currently working')
+    tutor_is_working = Column(Boolean, doc='T/F if the tutor is currently working, i.e. clocked in and sending heartbeats (see app/presence.py)')
+    last_seen = Column(DateTime, doc='Time of the last heartbeat of the tutor, written in batches so it may lag by a few seconds.')
     tickets = db.relationship('Ticket', backref='user')
+    courses = db.relationship('Course', secondary='CanTutor', backref='tutors', order_by='[Course.department, Course.number]')
 
     def __init__(self, oidIn, permLevelIn, emailIn, nameIn, isActiveIn, isWorkingIn):
         self.oid = oidIn
@@ -120,10 +158,7 @@ class User(db.Model, UserMixin):
 
     @staticmethod
     def get_tutors():
-        # TODO: Cannot use inequality operators < > <= >= on enum from database as only
-        #       the enum name is actually persisted. Find a way around this while keeping enum column?
-        return User.query.filter(
-            ((User.permission == Permission.Tutor) | (User.permission == Permission.Admin) | (User.permission == Permission.Owner)) & (User.oid != None))
+        return User.query.filter((User.permission >= Permission.Tutor) & (User.oid != None))
 
     @staticmethod
     def get_pending():
@@ -149,49 +184,127 @@ class Ticket(db.Model):
     """
     __tablename__ = 'Tickets'
 
+    # The actions of the tutor board: the statuses a ticket may have for the action to apply, and the status it moves the ticket to
+    TRANSITIONS = {
+        'Claim': ((Status.Open,), Status.Claimed),
+        'Close': ((Status.Open, Status.Claimed), Status.Closed),
+        'Open': ((Status.Closed,), Status.Open),
+    }
+
     id = Column(Integer, primary_key=True, doc='Autonumber primary key for the ticket table.')
-    student_email = Column(String(120), nullable=False, doc='Email of the student making the ticket.')
+    student_email = Column(String(120), nullable=False, index=True, doc='Email of the student making the ticket.')
     student_name = Column(String(120), doc='The name of student making the ticket.')
 
-    # TODO: Need to update these columns to be foreign keys the respective tabels
+    # The course and section as entered by the student, kept for display and for tickets made before course_id/section_id existed
     course = Column(String(120), doc='The specific course this ticket issue is related to.')
     section = Column(String(120), doc='Course section ticket issue is relating to.')
-    #
+    course_id = Column(Integer, db.ForeignKey('Courses.id', ondelete='SET NULL'), index=True,
+                       doc='The course this ticket is related to, if it could be resolved.')
+    section_id = Column(Integer, db.ForeignKey('Sections.id', ondelete='SET NULL'), index=True,
+                        doc='The section this ticket is related to, if it could be resolved.')
 
     assignment_name = Column(String(120), doc='Assignment the student needs help with.')
     specific_question = Column(Text, doc='Student question about the assignment.')
     problem_type = Column(Integer, db.ForeignKey('ProblemTypes.id'), doc='Type of problem the student is having.')
     time_created = Column(DateTime(True), nullable=False, doc='Time the ticket was created.', default=func.now())
-    time_claimed = Column(DateTime(True), doc='Time the ticket was claimed by tutor.')
+    time_claimed = Column(DateTime(True), index=True, doc='Time the ticket was claimed by tutor.')
     time_closed = Column(DateTime(True), doc='Time the tutor marked the ticket as closed.')
-    status = Column(Enum(Status), doc='Status of the ticket. 1=open, 2=claimed, 3=closed.', default=Status.Open)
-    mode = Column(Enum(Mode), doc='Specifies whether the ticket was made for online or in-person help.')
+    status = Column(IntegerEnum(Status), index=True, doc='Status of the ticket. 1=open, 2=claimed, 3=closed.', default=Status.Open)
+    mode = Column(IntegerEnum(Mode), doc='Specifies whether the ticket was made for online or in-person help.')
     tutor_notes = Column(Text, doc='Space for tutors to write notes about student/ticket session.', default="")
     tutor_id = Column(Integer, db.ForeignKey('Users.id'), doc='Foreign key to the tutor who claimed this ticket.')
     successful_session = Column(Boolean, doc='T/F if the tutor was able to help the student with issue on ticket')
-    # session_duration = Column(Time(True), doc='Amount of time the tutor spent on the ticket/student.')
-
-    def __init__(self, sEmailIn, sNameIn, crsIn, secIn, assgnIn, quesIn, prblmIn, modeIn):
+    wait_seconds = Column(Integer, index=True, doc='Seconds from the ticket being created to being claimed, set when claimed.')
+    service_seconds = Column(Integer, index=True, doc='Seconds the tutor spent on the ticket from claiming to closing it, set when closed.')
+    submission_key = Column(String(64), index=True, unique=True,
+                            doc='One-time key generated by the ticket form, the same submission received twice only creates one ticket.')
+    group_id = Column(Integer, db.ForeignKey('TicketGroups.id', ondelete='SET NULL'), index=True,
+                      doc='The group session this ticket was claimed in, if the tutor claimed it together with other tickets.')
+    auto_closed = Column(Boolean, doc='T/F if the ticket was left open or claimed after closing time and closed by the stale ticket sweeper.')
+
+    def __init__(self, sEmailIn, sNameIn, crsIn, secIn, assgnIn, quesIn, prblmIn, modeIn, crsIdIn=None, secIdIn=None, keyIn=None):
         self.student_email = sEmailIn
         self.student_name = sNameIn
         self.course = crsIn
         self.section = secIn
+        self.course_id = crsIdIn
+        self.section_id = secIdIn
         self.assignment_name = assgnIn
         self.specific_question = quesIn
         self.problem_type = prblmIn
         self.mode = modeIn
+        self.submission_key = keyIn
 
     def claim(self, tutor: User):
         self.tutor_id = tutor.id
         self.status = Status.Claimed
         self.time_claimed = datetime.datetime.now()
+        self.wait_seconds = _seconds_between(self.time_created, self.time_claimed)
+
+    @staticmethod
+    def claim_if_open(ticket_id: int, tutor_id: int, time_created: datetime.datetime):
+        """
+        Claims the ticket for the tutor in a single UPDATE, only if it is still open. Returns whether it was claimed,
+        so two tutors (or a tutor and the dispatcher) claiming the same ticket at once can never both get it.
+        The change still has to be committed.
+        """
+        now = datetime.datetime.now()
+        claim = update(Ticket) \
+            .where(Ticket.id == ticket_id, Ticket.status == Status.Open) \
+            .values(tutor_id=tutor_id, status=Status.Claimed, time_claimed=now, wait_seconds=_seconds_between(time_created, now)) \
+            .execution_options(synchronize_session=False)
+
+        return db.session.execute(claim).rowcount == 1
+
+    @staticmethod
+    def apply_action(action: str, ticket_ids: list, tutor_id: int) -> dict:
+        """
+        Applies an action of the tutor board (see TRANSITIONS) to the tickets in a single UPDATE, with the same effect
+        as claim(), close() or reopen() on each of them. Returns the outcome by ticket id: 'updated', 'not found', or 'invalid'
+        if the ticket's status does not allow the action, with the ticket's status afterwards.
+
+        The tickets are locked until the change is committed, so the outcomes stay true while other requests update them.
+        """
+        allowed, target = Ticket.TRANSITIONS[action]
+        rows = db.session.execute(
+            select(Ticket.id, Ticket.status, Ticket.time_created, Ticket.time_claimed).where(Ticket.id.in_(ticket_ids)).with_for_update()).all()
+
+        outcomes = { ticket_id: ('not found', None) for ticket_id in ticket_ids }
+        outcomes.update({ row.id: ('updated', target) if row.status in allowed else ('invalid', row.status) for row in rows })
+        valid = [ row for row in rows if row.status in allowed ]
+
+        if not valid:
+            return outcomes
+
+        now = datetime.datetime.now()
+
+        if action == 'Claim':
+            values = dict(tutor_id=tutor_id, time_claimed=now,
+                          wait_seconds=case({ row.id: _seconds_between(row.time_created, now) for row in valid }, value=Ticket.id))
+
+        elif action == 'Close':
+            values = dict(time_closed=now, service_seconds=case({ row.id: _seconds_between(row.time_claimed, now) for row in valid }, value=Ticket.id))
+
+        else:
+            values = dict(service_seconds=None, group_id=None)
+
+        transition = update(Ticket) \
+            .where(Ticket.id.in_([ row.id for row in valid ]), Ticket.status.in_(allowed)) \
+            .values(status=target, **values) \
+            .execution_options(synchronize_session=False)
+
+        db.session.execute(transition)
+        return outcomes
 
     def close(self):
         self.status = Status.Closed
         self.time_closed = datetime.datetime.now()
+        self.service_seconds = _seconds_between(self.time_claimed, self.time_closed)
 
     def reopen(self):
         self.status = Status.Open
+        self.service_seconds = None
+        self.group_id = None
 
     def calc_duration_open(self):
         if self.time_claimed is None:
@@ -214,6 +327,72 @@ class Ticket(db.Model):
     def __repr__(self):
         return f'Ticket: {self.specific_question} ({self.student_name})'
 
+def _seconds_between(start: datetime.datetime, end: datetime.datetime):
+    if start is None or end is None:
+        return None
+
+    # Timestamps read back from the database may have lost their time zone
+    if (start.tzinfo is None) != (end.tzinfo is None):
+        start, end = start.replace(tzinfo=None), end.replace(tzinfo=None)
+
+    return max(int((end - start).total_seconds()), 0)
+
+class TicketGroup(db.Model):
+    """
+    The TicketGroups table records group sessions, in which a tutor helps the students of several open tickets about the same
+    assignment of a course at once. Every ticket of the group is still claimed and closed, and reported, on its own, with its
+    own wait and the length of the session as its service time.
+    """
+    __tablename__ = 'TicketGroups'
+
+    id = Column(Integer, primary_key=True, doc='Autonumber primary key for the TicketGroups table.')
+    tutor_id = Column(Integer, db.ForeignKey('Users.id'), nullable=False, index=True, doc='The tutor holding the session.')
+    course_id = Column(Integer, db.ForeignKey('Courses.id', ondelete='SET NULL'), doc='The course of the tickets, if they are linked to one.')
+    assignment_name = Column(String(120), doc='The assignment the tickets are about.')
+    time_claimed = Column(DateTime(True), doc='Time the tutor claimed the tickets.')
+    time_closed = Column(DateTime(True), doc='Time the tutor closed the session.')
+    tickets = db.relationship('Ticket', backref='group')
+
+    def __init__(self, tutorIn, courseIn, assignmentIn):
+        self.tutor_id = tutorIn
+        self.course_id = courseIn
+        self.assignment_name = assignmentIn
+
+    def claim(self, tickets: list) -> list:
+        """
+        Claims the tickets that are still open for the group's tutor in a single UPDATE, and returns the ids of the tickets
+        claimed. Tickets claimed by someone else in the mean time are left alone. The group must have been flushed (to get
+        its id) and the change still has to be committed.
+        """
+        self.time_claimed = datetime.datetime.now()
+        waits = { ticket.id: _seconds_between(ticket.time_created, self.time_claimed) for ticket in tickets }
+
+        claim = update(Ticket) \
+            .where(Ticket.id.in_(waits.keys()), Ticket.status == Status.Open) \
+            .values(group_id=self.id, tutor_id=self.tutor_id, status=Status.Claimed, time_claimed=self.time_claimed,
+                    wait_seconds=case(waits, value=Ticket.id)) \
+            .execution_options(synchronize_session=False)
+
+        db.session.execute(claim)
+        return db.session.execute(select(Ticket.id).where(Ticket.group_id == self.id).order_by(Ticket.id)).scalars().all()
+
+    def close(self) -> int:
+        """
+        Closes the tickets of the group that are still claimed in a single UPDATE, and returns how many were closed.
+        The change still has to be committed.
+        """
+        self.time_closed = datetime.datetime.now()
+
+        close = update(Ticket) \
+            .where(Ticket.group_id == self.id, Ticket.status == Status.Claimed) \
+            .values(status=Status.Closed, time_closed=self.time_closed, service_seconds=_seconds_between(self.time_claimed, self.time_closed)) \
+            .execution_options(synchronize_session=False)
+
+        return db.session.execute(close).rowcount
+
+    def __repr__(self):
+        return f'Group session {self.id} of {self.tutor_id} ({self.assignment_name})'
+
 class Message(db.Model):
     """
     The Messages class is the main model for storing messages that the CSLC admins put in place to be displayed on the website.
@@ -266,7 +445,8 @@ class Course(db.Model):
     course_name = Column(String(50), nullable=False, doc='The name of the course itself. E.g., Operating Systems, Java II, etc.')
     on_display = Column(Boolean, doc="T/F if course should be displayed in available courses. This way admin does not need to keep adding/deleting a course.")
     sections = db.relationship('Section', backref='course', cascade="all, delete")
-    # TODO: add in tutors relationship and tickets relationship
+    # NOTE: 'tutors' is added by User.courses
+    # TODO: add in tickets relationship
 
     def __init__(self, depIn, numIn, nameIn, displayIn):
         self.department = depIn
@@ -274,6 +454,14 @@ class Course(db.Model):
         self.course_name = nameIn
         self.on_display = displayIn
 
+    @staticmethod
+    def get_all_with_sections():
+        """
+        Query for every course with its sections loaded up front (one extra query in total),
+        instead of lazily loading the sections of each course while rendering.
+        """
+        return Course.query.options(selectinload(Course.sections))
+
     def __repr__(self):
         return f'{self.department} {self.number}, {self.course_name}, {self.on_display}, Sections: {self.sections}'
 
@@ -293,7 +481,7 @@ class Section(db.Model):
     days_of_week = Column(String(25), doc='The days of the week for a particular course section. E.g. M, T, W, T, F.')
     start_time = Column(Time(True), doc='The start time for the course section.')
     end_time = Column(Time(True), doc='The end time for the course section.')
-    section_mode = Column(Enum(SectionMode), doc='The method of teaching that this section will be taught in. E.g., Remote, In person, etc.')
+    section_mode = Column(IntegerEnum(SectionMode), doc='The method of teaching that this section will be taught in. E.g., Remote, In person, etc.')
     course_id = Column(Integer, db.ForeignKey('Courses.id'), doc='The corresponding course a section is associated with.')
     semester_id = Column(Integer, db.ForeignKey('Semesters.id'), doc='The semester in which a section is offered during.')
     professor_id = Column(Integer, db.ForeignKey('Professors.id'), doc='Specific professor that teaches a particular session.')
@@ -309,6 +497,14 @@ class Section(db.Model):
         self.semester_id = semesterIn
         self.professor_id = profIn
 
+    @staticmethod
+    def get_all_with_details():
+        """
+        Query for every section with its course, professor and semester joined in the same query,
+        instead of lazily loading each of them for every section while rendering.
+        """
+        return Section.query.options(joinedload(Section.course), joinedload(Section.professor), joinedload(Section.semester))
+
     def __repr__(self):
         return f'COURSE: {self.course_id}, SECTION: {self.section_number} - {self.section_mode} - {self.semester_id} - ({self.days_of_week} {self.start_time} \
             to {self.end_time}) - PROF: {self.professor_id}'
@@ -345,7 +541,7 @@ class Semester(db.Model):
 
     id = Column(Integer, primary_key=True, doc='Autonumber primary key for the Semesters table.')
     year = Column(Integer, nullable=False, doc='The year of the semester. E.g., 2023.')
-    season = Column(Enum(Season), nullable=False, doc='The season of the semester. E.g., Fall')
+    season = Column(IntegerEnum(Season), nullable=False, doc='The season of the semester. E.g., Fall')
     start_date = Column(Date, nullable=False, doc='The start date, or first day, of a semester.')
     end_date = Column(Date, nullable=False, doc='The end date, or last day, of a semester.')
     sections = db.relationship('Section', backref='semester')
@@ -362,14 +558,20 @@ class Semester(db.Model):
 class CanTutor(db.Model):
     """
     The CanTutor table is a join table that matches tutors and the available courses that they are able to tutor.
-    For example, say John is a tutor with ID one, and he can tutor courses: A, B, and C. This table will join the
-    tutor John and the list of courses that he can tutor.
+    For example, say John is a tutor with ID one, and he can tutor courses: A, B, and C. This table will have one
+    row for each of those courses, all with John's ID. See User.courses and Course.tutors.
     """
     __tablename__ = 'CanTutor'
 
-    # id = Column(Integer, doc='Autonumber primary key for the CanTutor table.')
-    tutor = Column(Integer, db.ForeignKey('Users.id'), primary_key=True, doc='The tutor that is able to tutor a course.')
-    courses = Column(Integer, db.ForeignKey('Courses.id'), doc='Possible courses that a tutor can tutor.')
+    # NOTE: 'renamed_from' lets schema.rebuild_tables() copy the rows of the table from before it had a composite primary key
+    tutor_id = Column(Integer, db.ForeignKey('Users.id', ondelete='CASCADE'), primary_key=True, info={ 'renamed_from': 'tutor' },
+                      doc='The tutor that is able to tutor a course.')
+    course_id = Column(Integer, db.ForeignKey('Courses.id', ondelete='CASCADE'), primary_key=True, index=True, info={ 'renamed_from': 'courses' },
+                       doc='A course that the tutor is able to tutor.')
+
+    def __init__(self, tutorIn, courseIn):
+        self.tutor_id = tutorIn
+        self.course_id = courseIn
 
 class Config(db.Model):
     """
@@ -397,3 +599,77 @@ class Config(db.Model):
     fri_end = Column(DateTime(True), doc='End time for Fridays', default=datetime.time(hour=16, minute=0))
     sat_start = Column(DateTime(True), doc='Start time for Saturdays', default=datetime.time(hour=10, minute=0))
     sat_end = Column(DateTime(True), doc='End time for Saturdays', default=datetime.time(hour=14, minute=0))
+
+class CacheVersion(db.Model):
+    """
+    The CacheVersions table holds a version counter for each kind of data that the workers keep cached in memory
+    (see app/cache.py). Whenever that data is changed the counter is incremented, and every worker that notices the
+    new version rebuilds its copy of the data. This way all workers pick up changes without having to re-query the data
+    on every request.
+    """
+    __tablename__ = 'CacheVersions'
+
+    name = Column(String(50), primary_key=True, doc='Name of the cached data this version counter is for.')
+    version = Column(Integer, nullable=False, default=0, doc='Incremented every time the cached data changes.')
+
+    def __init__(self, nameIn, versionIn):
+        self.name = nameIn
+        self.version = versionIn
+
+    def __repr__(self):
+        return f'{self.name} (v{self.version})'
+
+class Shift(db.Model):
+    """
+    The Shifts table records when tutors clocked in and out. A shift without a clock out time is the tutor's current shift.
+    Tutors that stop sending heartbeats are clocked out automatically, as of their last heartbeat (see app/presence.py).
+    """
+    __tablename__ = 'Shifts'
+
+    id = Column(Integer, primary_key=True, doc='Autonumber primary key for the Shifts table.')
+    tutor_id = Column(Integer, db.ForeignKey('Users.id', ondelete='CASCADE'), nullable=False, index=True, doc='The tutor working this shift.')
+    clock_in = Column(DateTime, nullable=False, doc='Time the tutor clocked in.')
+    clock_out = Column(DateTime, doc='Time the tutor clocked out, or was last seen if they were clocked out automatically.')
+
+    def __init__(self, tutorIn, clockInIn):
+        self.tutor_id = tutorIn
+        self.clock_in = clockInIn
+
+    def __repr__(self):
+        return f'Shift of {self.tutor_id} ({self.clock_in} - {self.clock_out})'
+
+class Lease(db.Model):
+    """
+    The Leases table lets one worker at a time run a background task (e.g. the ticket dispatcher), see app/background.py.
+    The worker holding a lease renews it before it expires, if it stops doing so another worker takes the lease over.
+    """
+    __tablename__ = 'Leases'
+
+    name = Column(String(50), primary_key=True, doc='Name of the background task this lease is for.')
+    holder = Column(String(120), nullable=False, doc='The worker holding the lease, as host name and process id.')
+    expires_at = Column(DateTime, nullable=False, doc='Time at which another worker may take the lease over.')
+
+    def __init__(self, nameIn, holderIn, expiresIn):
+        self.name = nameIn
+        self.holder = holderIn
+        self.expires_at = expiresIn
+
+    def __repr__(self):
+        return f'{self.name} held by {self.holder} until {self.expires_at}'
+
+class RateLimit(db.Model):
+    """
+    The RateLimits table holds the state of the token buckets limiting how fast tickets are submitted, see app/rate_limit.py.
+    A bucket is stored as the time at which it is full again, a bucket without a row (or with a time in the past) is full.
+    """
+    __tablename__ = 'RateLimits'
+
+    key = Column(String(255), primary_key=True, doc='What is limited, as the kind of identity and its value (e.g. ip:10.0.0.1).')
+    full_at = Column(Double, nullable=False, doc='Time in seconds since the epoch at which the bucket is full again.')
+
+    def __init__(self, keyIn, fullAtIn):
+        self.key = keyIn
+        self.full_at = fullAtIn
+
+    def __repr__(self):
+        return f'{self.key} full at {self.full_at}'
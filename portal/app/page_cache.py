@@ -0,0 +1,108 @@
+from flask import current_app
+from flask import g
+from flask import make_response
+from flask import request
+from flask import session
+
+from datetime import datetime
+from datetime import timezone
+from functools import wraps
+from hashlib import sha1
+from typing import NamedTuple
+
+# Flask-Session marks every new session as permanent and Flask-Login marks it as not fresh,
+# a session holding nothing but these does not need to be stored or sent to the visitor
+_BOOKKEEPING_SESSION_KEYS = { '_permanent', '_fresh' }
+
+class CachedPage(NamedTuple):
+    body: bytes
+    mimetype: str
+    etag: str
+    last_modified: datetime
+
+    # The versioned caches (see app/cache.py) used to render the page and the generation of each that was used
+    dependencies: tuple
+
+def cache_anonymous_page(func):
+    """
+    Decorator for routes rendering a page that is the same for every anonymous visitor.
+
+    The rendered page is kept in memory by the worker and served again until one of the versioned caches
+    it was rendered from (e.g. the catalog or the announcements) changes. Responses get an ETag, Last-Modified
+    and a short public Cache-Control so browsers can revalidate and nginx's proxy_cache can serve them as well.
+
+    Any request that is not a plain GET, or that has a session (e.g. signed in, or with flashed messages to show),
+    goes straight to the route. The page must only depend on data read through versioned caches.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _is_cacheable_request():
+            return func(*args, **kwargs)
+
+        pages = current_app.extensions.setdefault('page_cache', {})
+        page = pages.get(request.path)
+
+        if page is not None and _is_fresh(page):
+            response = current_app.response_class(page.body, mimetype=page.mimetype)
+            _discard_empty_session()
+
+        else:
+            # Only track the caches used by this render
+            g.pop('versioned_caches', None)
+            response = make_response(func(*args, **kwargs))
+            _discard_empty_session()
+
+            if not _is_cacheable_response(response):
+                return response
+
+            page = _create_page(response)
+            pages[request.path] = page
+
+        return _add_cache_headers(response, page)
+    return wrapper
+
+def _is_cacheable_request():
+    if request.method not in ('GET', 'HEAD') or request.args:
+        return False
+
+    # Any session (signed in users, pending flashes, an auth flow, ...) may change the page
+    cookies = (current_app.config['SESSION_COOKIE_NAME'], current_app.config.get('REMEMBER_COOKIE_NAME', 'remember_token'))
+    return not any(name in request.cookies for name in cookies)
+
+def _is_cacheable_response(response):
+    return response.status_code == 200 and not response.headers.get('Set-Cookie') and not session
+
+def _discard_empty_session():
+    if set(session.keys()) <= _BOOKKEEPING_SESSION_KEYS:
+        session.clear()
+        session.modified = False
+
+def _is_fresh(page: CachedPage):
+    for cache, generation in page.dependencies:
+        # Reading the value also picks up changes made by other workers or values that went stale on their own
+        cache.get()
+
+        if cache.generation != generation:
+            return False
+
+    return True
+
+def _create_page(response):
+    body = response.get_data()
+    dependencies = tuple(g.get('versioned_caches', {}).items())
+
+    # HTTP dates have a resolution of one second
+    last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+    return CachedPage(body, response.mimetype, sha1(body).hexdigest(), last_modified, dependencies)
+
+def _add_cache_headers(response, page: CachedPage):
+    response.set_etag(page.etag)
+    response.last_modified = page.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['PAGE_CACHE_MAX_AGE']
+
+    # The page is only shared between visitors without cookies
+    response.vary.add('Cookie')
+
+    # Answers with 304 Not Modified if the client already has this version of the page
+    return response.make_conditional(request)
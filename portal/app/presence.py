@@ -0,0 +1,132 @@
+from flask import Flask
+from flask import current_app
+
+from sqlalchemy import bindparam
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import update
+
+from .cache import bump_version
+from .extensions import db
+from .model import Shift
+from .model import User
+
+from . import background
+from . import routing
+
+from datetime import datetime
+from datetime import timedelta
+
+import threading
+import time
+
+class Heartbeats:
+    """
+    The latest heartbeat of each tutor received by this worker since the last flush. Heartbeats only update this map,
+    the database is written at most once every 'flush_interval' seconds with one batched UPDATE for all of them.
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+
+        self._pending = {}
+        self._next_flush = time.monotonic() + flush_interval
+        self._lock = threading.Lock()
+
+    def beat(self, user_id: int, now: datetime) -> bool:
+        """Records a heartbeat, returns whether the heartbeats are due to be flushed."""
+        with self._lock:
+            self._pending[user_id] = now
+            return time.monotonic() >= self._next_flush
+
+    def take(self) -> dict:
+        """Returns the heartbeats to flush by user id and forgets them."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._next_flush = time.monotonic() + self.flush_interval
+            return pending
+
+def init_app(app: Flask):
+    background.register_leader_task(app, 'presence', clock_out_absent_tutors, app.config['PRESENCE_SWEEP_INTERVAL'])
+
+def heartbeat(user: User):
+    """Records that the user's board is open, the heartbeat is written to the database with the next batch."""
+    if _heartbeats().beat(user.id, datetime.now()):
+        flush()
+
+def flush():
+    """Writes the heartbeats received by this worker to Users.last_seen."""
+    pending = _heartbeats().take()
+
+    if not pending:
+        return
+
+    users = User.__table__.c
+
+    # Another worker may have written a later heartbeat already
+    last_seen = update(User.__table__) \
+        .where(users.id == bindparam('user_id'), or_(users.last_seen.is_(None), users.last_seen < bindparam('seen_at'))) \
+        .values(last_seen=bindparam('seen_at'))
+
+    db.session.execute(last_seen, [ { 'user_id': user_id, 'seen_at': seen_at } for user_id, seen_at in pending.items() ])
+    db.session.commit()
+
+def clock_in(user: User):
+    """Starts a shift for the tutor, if they are not clocked in already."""
+    if user.tutor_is_working:
+        return
+
+    now = datetime.now()
+    db.session.add(Shift(user.id, now))
+    user.tutor_is_working = True
+    user.last_seen = now
+    db.session.commit()
+
+    routing.tutor_changed(user)
+
+def clock_out(user: User, at: datetime = None):
+    """Ends the tutor's current shift now, or at the given time."""
+    _end_shift(user, at or datetime.now())
+    db.session.commit()
+
+    routing.tutor_changed(user)
+
+def clock_out_absent_tutors():
+    """
+    Clocks out the tutors that are clocked in but have not sent a heartbeat in PRESENCE_TIMEOUT seconds,
+    as of their last heartbeat. Returns the users that were clocked out.
+    """
+    flush()
+
+    cutoff = datetime.now() - timedelta(seconds=current_app.config['PRESENCE_TIMEOUT'])
+    absent = db.session.execute(
+        select(User).where(User.tutor_is_working.is_(True), or_(User.last_seen.is_(None), User.last_seen < cutoff))).scalars().all()
+
+    if not absent:
+        return []
+
+    for user in absent:
+        _end_shift(user, user.last_seen or cutoff)
+
+    db.session.commit()
+
+    # Reloading the routing index once is cheaper than applying every change to it
+    bump_version(routing.ROUTING_VERSION)
+    return absent
+
+def current_shift(user: User):
+    return Shift.query.filter(Shift.tutor_id == user.id, Shift.clock_out.is_(None)).order_by(Shift.clock_in.desc()).first()
+
+def _end_shift(user: User, at: datetime):
+    for shift in Shift.query.filter(Shift.tutor_id == user.id, Shift.clock_out.is_(None)):
+        shift.clock_out = max(at, shift.clock_in)
+
+    user.tutor_is_working = False
+
+def _heartbeats() -> Heartbeats:
+    heartbeats = current_app.extensions.get('heartbeats')
+
+    if heartbeats is None:
+        heartbeats = current_app.extensions.setdefault('heartbeats', Heartbeats(current_app.config['PRESENCE_FLUSH_INTERVAL']))
+
+    return heartbeats
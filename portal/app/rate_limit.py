@@ -0,0 +1,117 @@
+from flask import Flask
+from flask import current_app
+
+from sqlalchemy import case
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import update
+from sqlalchemy.dialects import mysql
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .model import RateLimit
+
+from . import background
+
+import math
+import time
+
+def init_app(app: Flask):
+    if app.config['RATE_LIMIT_ENABLED']:
+        background.register_leader_task(app, 'rate_limit', forget_full_buckets, app.config['RATE_LIMIT_CLEANUP_INTERVAL'])
+
+def take(key: str, limit: int, period: float) -> float:
+    """
+    Takes a token from the bucket 'key', which holds 'limit' tokens and is refilled completely every 'period' seconds.
+    Returns 0 if a token was taken, otherwise how many seconds to wait before a token is available.
+
+    The bucket is stored as the time at which it is full again (the generic cell rate algorithm), so taking a token is a
+    single upsert which every worker can run at the same time. It adds a new bucket or takes a token from an existing one,
+    and leaves an empty bucket alone, so a rejected request costs one statement as well. Only core statements are used,
+    the ORM is never involved.
+    """
+    now = time.time()
+    interval = period / limit
+    table = RateLimit.__table__
+
+    # Each token pushes the time the bucket is full again 'interval' further, a bucket can not be emptied further than 'period'
+    has_token = table.c.full_at <= now + period - interval
+    full_at = case((table.c.full_at > now, table.c.full_at), else_=now) + interval
+
+    taken = _take_token(key, now + interval, has_token, full_at)
+    db.session.commit()
+
+    # The bucket can hold at most 'period' seconds worth of tokens, so a token is available within one interval
+    return 0 if taken else interval
+
+def limit_ticket_submission(email: str, session_id: str, ip: str) -> float:
+    """
+    Takes a token from the buckets of every identity known to be submitting a ticket, the email, session and IP address.
+    Returns 0 if the ticket may be submitted, otherwise the seconds to wait before trying again.
+    """
+    config = current_app.config
+
+    if not config['RATE_LIMIT_ENABLED']:
+        return 0
+
+    limits = []
+
+    if email:
+        limits.append((f'email:{email.lower()}', *config['RATE_LIMIT_PER_STUDENT']))
+
+    if session_id:
+        limits.append((f'session:{session_id}', *config['RATE_LIMIT_PER_STUDENT']))
+
+    if ip:
+        limits.append((f'ip:{ip}', *config['RATE_LIMIT_PER_IP']))
+
+    # NOTE: Every bucket is charged even if an earlier one is empty, so a flood from one IP address drains its bucket too
+    retry_after = 0
+
+    for key, limit, period in limits:
+        retry_after = max(retry_after, take(key[:255], limit, period))
+
+    return math.ceil(retry_after)
+
+def forget_full_buckets():
+    """Deletes the buckets that are full again, they behave the same as buckets that were never used."""
+    table = RateLimit.__table__
+    db.session.execute(delete(table).where(table.c.full_at <= time.time()))
+    db.session.commit()
+
+def _take_token(key: str, new_full_at: float, has_token, full_at) -> bool:
+    table = RateLimit.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        # An empty bucket does not match the WHERE of the update, so no row is written
+        upsert = (sqlite if dialect == 'sqlite' else postgresql).insert(table) \
+            .values(key=key, full_at=new_full_at) \
+            .on_conflict_do_update(index_elements=[ table.c.key ], set_={ 'full_at': full_at }, where=has_token)
+
+        return db.session.execute(upsert).rowcount == 1
+
+    if dialect in ('mysql', 'mariadb'):
+        # NOTE: SQLAlchemy connects with CLIENT_FOUND_ROWS, so an unchanged row counts as one row just like an inserted one.
+        #       Instead an empty bucket sets LAST_INSERT_ID(), which is sent back with the result of the statement.
+        upsert = mysql.insert(table) \
+            .values(key=key, full_at=new_full_at) \
+            .on_duplicate_key_update(full_at=case((has_token, full_at), else_=table.c.full_at + 0 * func.last_insert_id(1)))
+
+        return db.session.execute(upsert).lastrowid != 1
+
+    # Without an upsert, either the bucket is empty or it does not exist yet, only the latter can be inserted
+    if db.session.execute(update(table).where(table.c.key == key, has_token).values(full_at=full_at)).rowcount == 1:
+        return True
+
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(table).values(key=key, full_at=new_full_at))
+
+        return True
+
+    except IntegrityError:
+        return False
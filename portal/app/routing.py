@@ -0,0 +1,127 @@
+from .cache import get_cache
+from .cache import bump_version
+
+from .extensions import db
+from .model import CanTutor
+from .model import Permission
+from .model import User
+
+from sqlalchemy import select
+
+from collections import defaultdict
+from types import MappingProxyType
+from typing import NamedTuple
+
+# Name of the version counter bumped every time a tutor's courses, status or permission changes
+ROUTING_VERSION = 'routing'
+
+_NO_TUTORS = frozenset()
+
+class RoutingIndex(NamedTuple):
+    """
+    Immutable snapshot of which active tutors can tutor which courses (see CanTutor), and which of them are working.
+    Tutors without any course and pending tutors, who never signed in, are left out.
+    """
+    # Course ids by tutor id
+    courses_by_tutor: MappingProxyType
+
+    # Ids of the tutors above that are currently working
+    working: frozenset
+
+    # Ids of the working tutors by course id, kept up to date with the two fields above so it can be read in O(1)
+    tutors_by_course: MappingProxyType
+
+    def with_tutor(self, tutor_id: int, courses: frozenset, working: bool):
+        """Returns a copy of the index with the courses and working status of a tutor replaced, an empty set of courses removes the tutor."""
+        old_courses = self.courses_by_tutor.get(tutor_id, _NO_TUTORS)
+        was_working = tutor_id in self.working
+
+        courses_by_tutor = dict(self.courses_by_tutor)
+        working_tutors = set(self.working)
+        tutors_by_course = dict(self.tutors_by_course)
+
+        courses_by_tutor.pop(tutor_id, None)
+        working_tutors.discard(tutor_id)
+
+        if courses:
+            courses_by_tutor[tutor_id] = frozenset(courses)
+
+            if working:
+                working_tutors.add(tutor_id)
+
+        # Only the courses the tutor was or now is available for change
+        if was_working:
+            for course_id in old_courses:
+                remaining = tutors_by_course.pop(course_id) - { tutor_id }
+
+                if remaining:
+                    tutors_by_course[course_id] = remaining
+
+        if tutor_id in working_tutors:
+            for course_id in courses:
+                tutors_by_course[course_id] = tutors_by_course.get(course_id, _NO_TUTORS) | { tutor_id }
+
+        return RoutingIndex(MappingProxyType(courses_by_tutor), frozenset(working_tutors), MappingProxyType(tutors_by_course))
+
+def get_routing() -> RoutingIndex:
+    """
+    Returns the routing index cached by this worker. A worker that changes a tutor applies the change to its own index
+    straight away (see tutor_changed()), other workers reload theirs when they notice the version was bumped.
+    """
+    return get_cache('routing', ROUTING_VERSION, _load_routing).get()
+
+def available_tutors(course_id: int) -> frozenset:
+    """Returns the ids of the active tutors currently working that can tutor the given course."""
+    return get_routing().tutors_by_course.get(course_id, _NO_TUTORS)
+
+def count_available(course_id: int) -> int:
+    return len(available_tutors(course_id))
+
+def tutor_courses(tutor_id: int) -> frozenset:
+    """Returns the ids of the courses the given tutor can tutor, empty if they were not given any."""
+    return get_routing().courses_by_tutor.get(tutor_id, _NO_TUTORS)
+
+def can_take(tutor_id: int, course_id: int) -> bool:
+    """
+    Tells if a tutor can take a ticket for the given course. Tutors that were not given any course can take any ticket,
+    and anyone can take a ticket that is not linked to a course.
+    """
+    courses = tutor_courses(tutor_id)
+    return not courses or course_id is None or course_id in courses
+
+def tutor_changed(user: User):
+    """Applies a change of the courses, status or permission of a tutor to this worker's index, after it was committed."""
+    courses = _NO_TUTORS
+
+    if user.is_complete() and user.tutor_is_active and user.permission >= Permission.Tutor:
+        courses = frozenset(course.id for course in user.courses)
+
+    working = bool(user.tutor_is_working)
+    get_cache('routing', ROUTING_VERSION, _load_routing).update(lambda index: index.with_tutor(user.id, courses, working))
+
+    # This worker is already up to date, the others will reload their index
+    bump_version(ROUTING_VERSION, invalidate=False)
+
+def _load_routing():
+    query = select(CanTutor.tutor_id, CanTutor.course_id, User.tutor_is_working) \
+        .join(User, CanTutor.tutor_id == User.id) \
+        .where(User.tutor_is_active.is_(True), User.permission >= Permission.Tutor, User.oid.is_not(None))
+
+    courses_by_tutor = defaultdict(set)
+    tutors_by_course = defaultdict(set)
+    working = set()
+
+    for tutor_id, course_id, is_working in db.session.execute(query):
+        courses_by_tutor[tutor_id].add(course_id)
+
+        if is_working:
+            working.add(tutor_id)
+            tutors_by_course[course_id].add(tutor_id)
+
+    index = RoutingIndex(
+        MappingProxyType({ tutor_id: frozenset(courses) for tutor_id, courses in courses_by_tutor.items() }),
+        frozenset(working),
+        MappingProxyType({ course_id: frozenset(tutors) for course_id, tutors in tutors_by_course.items() }))
+
+    # The index only changes when a tutor is changed, see tutor_changed()
+    return index, None
@@ -0,0 +1,196 @@
+from sqlalchemy import case
+from sqlalchemy import and_
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import inspect
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import type_coerce
+from sqlalchemy import update
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy import MetaData
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import AddConstraint
+from sqlalchemy.schema import Column
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.schema import Table
+
+from .model import IntegerEnum
+
+from sys import stderr
+
+def upgrade_schema(engine: Engine, metadata: MetaData):
+    """
+    Adds the columns and indexes declared in the models that are missing from existing tables.
+
+    db.create_all() only creates tables that do not exist yet, so columns added to a model after its table was
+    created would otherwise never make it to the database. Only additive changes are made (new columns must be
+    nullable or have a server default), so this is safe to run on every start up and by every worker at once.
+    """
+    inspector = inspect(engine)
+
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = { column['name'] for column in inspector.get_columns(table.name) }
+
+        for column in table.columns:
+            if column.name not in existing_columns:
+                _add_column(engine, table, column)
+
+        existing_indexes = { index['name'] for index in inspector.get_indexes(table.name) }
+
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                print(f'Creating index {index.name} on {table.name}', file=stderr)
+                index.create(engine, checkfirst=True)
+
+def rebuild_tables(engine: Engine, metadata: MetaData):
+    """
+    Recreates the existing tables whose primary key differs from their model, which no ALTER TABLE can change on SQLite.
+
+    The old table is renamed, the table is created again from its model and the old rows are copied over before the old
+    table is dropped. Columns are copied by name, or from the column named by a column's info['renamed_from'].
+    Rows that are duplicates or have no value for the new primary key are dropped, as the new key cannot hold them.
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        primary_key = [ column.name for column in table.primary_key.columns ]
+
+        if inspector.get_pk_constraint(table.name)['constrained_columns'] == primary_key:
+            continue
+
+        print(f'Rebuilding {table.name} with primary key ({", ".join(primary_key)})', file=stderr)
+
+        old_name = f'{table.name}_old'
+
+        with engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {preparer.format_table(table)} RENAME TO {preparer.quote(old_name)}'))
+
+            old = Table(old_name, MetaData(), autoload_with=conn)
+            copied = {}
+
+            for column in table.columns:
+                source = column.name if column.name in old.columns else column.info.get('renamed_from')
+
+                if source in old.columns:
+                    copied[column.name] = old.columns[source]
+
+            table.create(conn)
+
+            keys = [ copied[name].is_not(None) for name in primary_key if name in copied ]
+
+            if len(keys) == len(primary_key):
+                conn.execute(insert(table).from_select(list(copied.keys()), select(*copied.values()).distinct().where(and_(*keys))))
+
+            old.drop(conn)
+
+def migrate_enum_columns(engine: Engine, metadata: MetaData, batch_size: int = 1000):
+    """
+    Converts enum columns that still store enum names (e.g. 'Tutor') into the integer values stored by IntegerEnum
+    columns (e.g. 2). Only tables that still have names in them are touched, so this is safe to run on every start up.
+
+    The names are replaced in batches of rows by primary key so no single transaction locks the whole table. On MySQL
+    the column is first widened from ENUM to VARCHAR so it can hold both, and then converted to INTEGER.
+    SQLite has no column types to change, the values are stored as integers in the existing column.
+    """
+    inspector = inspect(engine)
+    dialect = engine.dialect.name
+
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_types = { column['name']: column['type'] for column in inspector.get_columns(table.name) }
+
+        for column in table.columns:
+            if not isinstance(column.type, IntegerEnum) or column.name not in existing_types:
+                continue
+
+            is_integer = isinstance(existing_types[column.name], Integer)
+
+            with engine.connect() as conn:
+                has_names = conn.execute(select(text('1')).select_from(table).where(_stored_names(column)).limit(1)).first() is not None
+
+            if not has_names and (is_integer or dialect != 'mysql'):
+                continue
+
+            print(f'Migrating {table.name}.{column.name} from enum names to values', file=stderr)
+
+            if dialect == 'mysql' and not is_integer:
+                _modify_column(engine, table, column, 'VARCHAR(50)')
+
+            _replace_enum_names(engine, table, column, batch_size)
+
+            if dialect == 'mysql' and not is_integer:
+                _modify_column(engine, table, column, 'INTEGER')
+
+def _stored_names(column: Column):
+    """Condition for rows storing an enum name in the column, the names are compared as stored rather than converted by IntegerEnum."""
+    return type_coerce(column, String).in_([ member.name for member in column.type.enum_class ])
+
+def _replace_enum_names(engine: Engine, table: Table, column: Column, batch_size: int):
+    values = case({ member.name: member.value for member in column.type.enum_class }, value=type_coerce(column, String))
+    primary_key = table.primary_key.columns.values()[0]
+
+    with engine.connect() as conn:
+        first, last = conn.execute(select(func.min(primary_key), func.max(primary_key))).one()
+
+    if first is None:
+        return
+
+    for start in range(first, last + 1, batch_size):
+        with engine.begin() as conn:
+            conn.execute(
+                update(table)
+                .where(primary_key.between(start, start + batch_size - 1), _stored_names(column))
+                .values({ column.name: values }))
+
+def _modify_column(engine: Engine, table: Table, column: Column, type: str):
+    preparer = engine.dialect.identifier_preparer
+    null = 'NULL' if column.nullable else 'NOT NULL'
+
+    with engine.begin() as conn:
+        conn.execute(text(f'ALTER TABLE {preparer.format_table(table)} MODIFY {preparer.format_column(column)} {type} {null}'))
+
+def _add_column(engine: Engine, table: Table, column: Column):
+    if not column.nullable and column.server_default is None:
+        raise RuntimeError(f'Cannot add column {table.name}.{column.name} to existing rows, it must be nullable or have a server default')
+
+    print(f'Adding column {column.name} to {table.name}', file=stderr)
+
+    dialect = engine.dialect
+    preparer = dialect.identifier_preparer
+    statement = f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {CreateColumn(column).compile(dialect=dialect)}'
+
+    with engine.begin() as conn:
+        if dialect.name == 'sqlite':
+            # SQLite cannot add constraints to an existing table, but accepts a reference as part of the new column
+            for foreign_key in column.foreign_keys:
+                statement += f' REFERENCES {preparer.format_table(foreign_key.column.table)} ({preparer.format_column(foreign_key.column)})'
+
+                if foreign_key.ondelete:
+                    statement += f' ON DELETE {foreign_key.ondelete}'
+
+            conn.execute(text(statement))
+            return
+
+        conn.execute(text(statement))
+
+        # The new column is empty so there is nothing to check, skipping the checks lets MySQL add
+        # the constraint without copying the table
+        if dialect.name == 'mysql':
+            conn.execute(text('SET foreign_key_checks = 0'))
+
+        for foreign_key in column.foreign_keys:
+            conn.execute(AddConstraint(foreign_key.constraint))
+
+        if dialect.name == 'mysql':
+            conn.execute(text('SET foreign_key_checks = 1'))
@@ -0,0 +1,244 @@
+from flask import current_app
+
+from sqlalchemy import select
+
+from .extensions import db
+from .model import Ticket
+
+from collections import Counter
+from collections import deque
+from datetime import datetime
+from datetime import timedelta
+from heapq import nlargest
+
+import math
+import re
+import threading
+import time
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Words that say nothing about what a question is about
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'can', 'do', 'does', 'for', 'from', 'get', 'has', 'have', 'how',
+    'i', 'if', 'in', 'is', 'it', 'its', 'me', 'my', 'not', 'of', 'on', 'or', 'so', 'that', 'the', 'this', 'to', 'was', 'what',
+    'when', 'where', 'why', 'with', 'you'))
+
+# Words are taken rarest first, and the tickets using them become candidates (newest first) until there are CANDIDATE_LIMIT
+# of them. The more common words only add to the score of those candidates, so a lookup does not go through every ticket
+CANDIDATE_LIMIT = 500
+
+# The norm of a ticket's vector is computed again once the number of tickets of its course changed by more than this share
+NORM_TOLERANCE = 0.05
+
+class SimilarityIndex:
+    """
+    TF-IDF vectors of the assignment name and question of the tickets created over the last 'window' seconds (at most
+    'max_tickets' of them), kept in memory by a worker as a sparse inverted index per course: course id -> word -> ticket id -> weight.
+
+    Scoring a question only goes through the tickets of its course sharing its rarest words with it (see CANDIDATE_LIMIT), so
+    a lookup costs about as much as the postings of those words, yet a question asked by many students still finds the
+    others. Word weights (the idf) change as
+    tickets come and go, so scores use the current ones, and the norms of the candidate tickets are kept until the number
+    of tickets of their course moved by more than NORM_TOLERANCE.
+
+    Tickets created by this worker are added straight away (see ticket_added()), tickets created by other workers are
+    read every 'refresh_interval' seconds, through the primary key.
+    """
+
+    def __init__(self, window: float, refresh_interval: float, max_tickets: int):
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self.max_tickets = max_tickets
+
+        # Course id and word weights by ticket id, postings and number of tickets by course id, ticket ids oldest first
+        self._tickets = {}
+        self._norms = {}
+        self._postings = {}
+        self._counts = Counter()
+        self._order = deque()
+
+        self._last_id = 0
+        self._loaded = False
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def similar(self, course_id: int, text: str, limit: int, threshold: float, among: set = None, exclude: int = None):
+        """
+        Returns up to 'limit' (ticket id, cosine similarity) of the indexed tickets of the course most similar to 'text', best first.
+        Only tickets with a similarity of at least 'threshold' and in 'among' (if given) are returned.
+        """
+        self._refresh_if_due()
+        query = _term_weights(text)
+
+        with self._lock:
+            postings = self._postings.get(course_id)
+
+            if not postings or not query:
+                return []
+
+            count = self._counts[course_id]
+            terms = sorted(((weight, postings[word]) for word, weight in query.items() if word in postings), key=lambda term: len(term[1]))
+            scores = Counter()
+            query_norm = 0.0
+
+            # Rarest words first, they find the candidates
+            for weight, tickets in terms:
+                idf = _idf(count, len(tickets))
+                query_norm += (weight * idf) ** 2
+
+                # Looking the candidates up in a common word's postings is cheaper than going through them
+                for ticket_id in scores:
+                    scores[ticket_id] += weight * tickets.get(ticket_id, 0.0) * idf * idf
+
+                if len(scores) < CANDIDATE_LIMIT:
+                    _add_candidates(scores, tickets, weight * idf * idf, among, exclude)
+
+            if not scores:
+                return []
+
+            query_norm = math.sqrt(query_norm)
+            similarities = ((ticket_id, min(score / (query_norm * self._norm(ticket_id, postings, count)), 1.0)) for ticket_id, score in scores.items())
+            return nlargest(limit, (item for item in similarities if item[1] >= threshold), key=lambda item: item[1])
+
+    def add(self, ticket_id: int, course_id: int, text: str, time_created: datetime):
+        with self._lock:
+            # An index that was never used is loaded with the ticket the first time it is used
+            if self._loaded:
+                self._add(ticket_id, course_id, text, time_created)
+
+    def _refresh_if_due(self):
+        if time.monotonic() < self._next_refresh:
+            return
+
+        with self._lock:
+            # Another thread may have refreshed the index while we were waiting for the lock
+            if time.monotonic() < self._next_refresh:
+                return
+
+            since = datetime.now() - timedelta(seconds=self.window)
+
+            # NOTE: A ticket committed after a ticket with a higher id was read is not indexed
+            query = select(Ticket.id, Ticket.course_id, Ticket.assignment_name, Ticket.specific_question, Ticket.time_created) \
+                .where(Ticket.id > self._last_id, Ticket.time_created >= since) \
+                .order_by(Ticket.id.desc()) \
+                .limit(self.max_tickets)
+
+            for row in reversed(db.session.execute(query).all()):
+                self._add(row.id, row.course_id, _text(row.assignment_name, row.specific_question), row.time_created)
+                self._last_id = max(self._last_id, row.id)
+
+            self._loaded = True
+
+            while self._order and (self._order[0][0] < since or len(self._order) > self.max_tickets):
+                self._remove(self._order.popleft()[1])
+
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def _norm(self, ticket_id: int, postings: dict, count: int):
+        norm_count, norm = self._norms.get(ticket_id, (0, 0.0))
+
+        if abs(count - norm_count) > count * NORM_TOLERANCE:
+            _, weights = self._tickets[ticket_id]
+            norm = math.sqrt(sum((weight * _idf(count, len(postings[word]))) ** 2 for word, weight in weights.items())) or 1.0
+            self._norms[ticket_id] = (count, norm)
+
+        return norm
+
+    def _add(self, ticket_id: int, course_id: int, text: str, time_created: datetime):
+        if ticket_id in self._tickets:
+            return
+
+        weights = _term_weights(text)
+        postings = self._postings.setdefault(course_id, {})
+
+        for word, weight in weights.items():
+            postings.setdefault(word, {})[ticket_id] = weight
+
+        self._counts[course_id] += 1
+        self._tickets[ticket_id] = (course_id, weights)
+        self._order.append((time_created, ticket_id))
+
+    def _remove(self, ticket_id: int):
+        course_id, weights = self._tickets.pop(ticket_id, (None, None))
+        self._norms.pop(ticket_id, None)
+
+        if weights is None:
+            return
+
+        postings = self._postings[course_id]
+        self._counts[course_id] -= 1
+
+        for word in weights:
+            postings[word].pop(ticket_id, None)
+
+            if not postings[word]:
+                del postings[word]
+
+def get_index() -> SimilarityIndex:
+    index = current_app.extensions.get('similar_tickets')
+
+    if index is None:
+        config = current_app.config
+        index = current_app.extensions.setdefault('similar_tickets', SimilarityIndex(
+            config['SIMILAR_TICKETS_DAYS'] * 24 * 60 * 60, config['SIMILAR_TICKETS_REFRESH_INTERVAL'], config['SIMILAR_TICKETS_MAX']))
+
+    return index
+
+def similar_to_question(course_id: int, assignment: str, question: str, limit: int, among: set = None):
+    """Returns the ids of up to 'limit' recent tickets of the course similar to the question, most similar first."""
+    threshold = current_app.config['SIMILAR_TICKETS_THRESHOLD']
+    return [ ticket_id for ticket_id, _ in get_index().similar(course_id, _text(assignment, question), limit, threshold, among) ]
+
+def similar_open_tickets(tickets: list, limit: int):
+    """Returns the ids of up to 'limit' other tickets in 'tickets' similar to each of them, by ticket id."""
+    index = get_index()
+    threshold = current_app.config['SIMILAR_TICKETS_THRESHOLD']
+    ids = { ticket.id for ticket in tickets }
+    similar = {}
+
+    for ticket in tickets:
+        text = _text(ticket.assignment_name, ticket.specific_question)
+        matches = index.similar(ticket.course_id, text, limit, threshold, among=ids, exclude=ticket.id)
+
+        if matches:
+            similar[ticket.id] = [ ticket_id for ticket_id, _ in matches ]
+
+    return similar
+
+def ticket_added(ticket: Ticket):
+    """Adds a ticket created by this worker to its index, after it was committed."""
+    index = current_app.extensions.get('similar_tickets')
+
+    if index is not None:
+        index.add(ticket.id, ticket.course_id, _text(ticket.assignment_name, ticket.specific_question), ticket.time_created)
+
+def _add_candidates(scores: Counter, tickets: dict, factor: float, among: set, exclude: int):
+    # The board only looks among its open tickets, there are usually fewer of them than tickets using the word
+    if among is not None and len(among) < len(tickets):
+        ticket_ids = (ticket_id for ticket_id in among if ticket_id in tickets)
+
+    else:
+        ticket_ids = reversed(tickets)
+
+    # Newest first, the postings are in the order the tickets were added
+    for ticket_id in ticket_ids:
+        if len(scores) >= CANDIDATE_LIMIT:
+            break
+
+        if ticket_id not in scores and ticket_id != exclude and (among is None or ticket_id in among):
+            scores[ticket_id] = tickets[ticket_id] * factor
+
+def _text(assignment: str, question: str):
+    return f'{assignment or ""} {question or ""}'
+
+def _term_weights(text: str):
+    """Returns the sublinear term frequency (1 + log(count)) of each word of the text that is not a stop word."""
+
+    # Single digits are kept, they tell 'Lab 3' from 'Lab 4'
+    counts = Counter(word for word in WORD_PATTERN.findall(text.lower()) if word not in STOP_WORDS and (len(word) > 1 or word.isdigit()))
+    return { word: 1.0 + math.log(count) for word, count in counts.items() }
+
+def _idf(count: int, frequency: int):
+    # Smoothed, words in every ticket still count a little
+    return math.log((1 + count) / (1 + frequency)) + 1.0
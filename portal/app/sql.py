@@ -0,0 +1,27 @@
+from sqlalchemy import Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+class seconds_between(FunctionElement):
+    """
+    SQL expression for the whole number of seconds from one datetime column to another,
+    e.g. seconds_between(Ticket.time_created, Ticket.time_claimed). Compiled for each supported database.
+    """
+    type = Integer()
+    inherit_cache = True
+    name = 'seconds_between'
+
+@compiles(seconds_between)
+def _seconds_between_default(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f'CAST(EXTRACT(EPOCH FROM ({compiler.process(end, **kw)} - {compiler.process(start, **kw)})) AS INTEGER)'
+
+@compiles(seconds_between, 'mysql')
+def _seconds_between_mysql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f'TIMESTAMPDIFF(SECOND, {compiler.process(start, **kw)}, {compiler.process(end, **kw)})'
+
+@compiles(seconds_between, 'sqlite')
+def _seconds_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f'CAST(ROUND((julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)})) * 86400) AS INTEGER)'
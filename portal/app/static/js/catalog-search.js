@@ -0,0 +1,47 @@
+// Suggests courses and sections on the ticket form as they are typed, see views.search_catalog.
+(function () {
+    const url = document.currentScript.dataset.url;
+    const course = document.querySelector('input#course[list]');
+    const section = document.querySelector('input#section[list]');
+
+    if (!course || !section) {
+        return;
+    }
+
+    let timer = null;
+
+    function search(params, list, key) {
+        fetch(`${url}?${new URLSearchParams(params)}`, { credentials: 'same-origin' })
+            .then((response) => response.ok ? response.json() : null)
+            .then((results) => {
+                if (!results) {
+                    return;
+                }
+
+                list.replaceChildren(...results[key].map((result) => {
+                    const option = document.createElement('option');
+                    option.value = result.value;
+                    option.label = result.label;
+                    return option;
+                }));
+            });
+    }
+
+    function searchCourses() {
+        search({ q: course.value }, document.getElementById('course-options'), 'courses');
+    }
+
+    function searchSections() {
+        search({ course: course.value, q: section.value }, document.getElementById('section-options'), 'sections');
+    }
+
+    // Wait for a pause in typing before searching
+    course.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(searchCourses, 150);
+    });
+
+    course.addEventListener('change', searchSections);
+    section.addEventListener('focus', searchSections);
+    searchCourses();
+})();
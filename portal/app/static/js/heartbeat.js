@@ -0,0 +1,22 @@
+// Tells the portal the tutor board is still open, see app/presence.py.
+// The board is reloaded when the tutor was clocked in or out elsewhere (e.g. automatically after their heartbeats stopped).
+(function () {
+    const script = document.currentScript;
+    const url = script.dataset.url;
+    const interval = Number(script.dataset.interval) * 1000;
+    const working = script.dataset.working === 'true';
+
+    function beat() {
+        fetch(url, { method: 'POST', credentials: 'same-origin', keepalive: true })
+            .then((response) => response.ok ? response.json() : null)
+            .then((status) => {
+                if (status && status.working !== working) {
+                    window.location.reload();
+                }
+            })
+            .catch(() => {});
+    }
+
+    beat();
+    setInterval(beat, interval);
+})();
@@ -0,0 +1,36 @@
+// Keeps the status, place in queue and estimated wait on the My Tickets page up to date, see views.my_tickets_status.
+(function () {
+    const url = document.currentScript.dataset.url;
+    const interval = 15 * 1000;
+
+    function waitText(ticket) {
+        if (ticket.wait_minutes) {
+            return `About ${ticket.wait_minutes} min`;
+        }
+
+        return ticket.position ? 'Unknown' : '-';
+    }
+
+    function update() {
+        fetch(url, { credentials: 'same-origin' })
+            .then((response) => response.ok ? response.json() : null)
+            .then((status) => {
+                if (!status) {
+                    return;
+                }
+
+                for (const ticket of status.tickets) {
+                    const row = document.querySelector(`#my-tickets tr[data-ticket="${ticket.id}"]`);
+
+                    if (row) {
+                        row.querySelector('[data-field="status"]').textContent = ticket.status;
+                        row.querySelector('[data-field="position"]').textContent = ticket.position || '-';
+                        row.querySelector('[data-field="wait"]').textContent = waitText(ticket);
+                    }
+                }
+            })
+            .catch(() => {});
+    }
+
+    setInterval(update, interval);
+})();
@@ -0,0 +1,44 @@
+// Shows students recent questions like the one they are writing on the ticket form, see views.search_similar_tickets.
+(function () {
+    const url = document.currentScript.dataset.url;
+    const question = document.getElementById('question');
+    const panel = document.getElementById('similar-questions');
+
+    if (!question || !panel) {
+        return;
+    }
+
+    let timer = null;
+
+    function value(id) {
+        const input = document.getElementById(id);
+        return input ? input.value : '';
+    }
+
+    function update() {
+        const params = new URLSearchParams({ course: value('course'), assignment: value('assignment'), question: question.value });
+
+        fetch(`${url}?${params}`, { credentials: 'same-origin' })
+            .then((response) => response.ok ? response.json() : null)
+            .then((results) => {
+                if (!results) {
+                    return;
+                }
+
+                panel.querySelector('ul').replaceChildren(...results.tickets.map((ticket) => {
+                    const item = document.createElement('li');
+                    item.className = 'list-group-item';
+                    item.textContent = `${ticket.assignment}: ${ticket.question} (${ticket.status})`;
+                    return item;
+                }));
+
+                panel.hidden = results.tickets.length === 0;
+            });
+    }
+
+    // Wait for a pause in typing before looking for similar questions
+    question.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(update, 500);
+    });
+})();
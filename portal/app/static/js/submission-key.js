@@ -0,0 +1,20 @@
+// Gives every ticket form a one-time submission key, so submitting the same form twice only creates one ticket.
+// The form page is cached for anonymous students, which is why the key is made here rather than by the server.
+(function () {
+    function newKey() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+
+        const bytes = new Uint8Array(16);
+        crypto.getRandomValues(bytes);
+        return Array.from(bytes, (byte) => byte.toString(16).padStart(2, '0')).join('');
+    }
+
+    // Also runs when the page is restored by the back button, a form filled in again is a new submission
+    window.addEventListener('pageshow', () => {
+        for (const input of document.querySelectorAll('form[data-submission-key] input[name="submission_key"]')) {
+            input.value = newKey();
+        }
+    });
+})();
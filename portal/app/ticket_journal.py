@@ -0,0 +1,270 @@
+from flask import Flask
+from flask import current_app
+
+from sqlalchemy import insert
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .model import Mode
+from .model import Ticket
+
+from . import background
+
+from datetime import datetime
+from itertools import count
+from sys import stderr
+
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+# Journal files are named after the process that owns them, as its process id and a nonce since process ids are reused
+# (e.g. by a restarted container). The active journal of a process is 'journal-<owner>.jsonl', the journals it sealed to
+# be inserted are 'journal-<owner>-<sequence>.batch', and it holds a lock on 'journal-<owner>.lock' for as long as it runs
+JOURNAL_FILE = re.compile(r'^journal-(\d+(?:-[0-9a-f]{12})?)(-[\d-]+)?\.(jsonl|batch|lock)$')
+
+# The Ticket columns written to the journal, everything else is set by the database or later on
+JOURNAL_COLUMNS = ('student_email', 'student_name', 'course', 'section', 'course_id', 'section_id', 'assignment_name',
+                   'specific_question', 'problem_type', 'mode', 'submission_key', 'time_created')
+
+class TicketJournal:
+    """
+    Append-only files in 'directory' holding tickets that were submitted but not inserted yet, one JSON object per line.
+
+    Every worker appends to its own journal and syncs it to disk before the student is told the ticket was submitted.
+    The journal is sealed and inserted in one transaction by the worker's flusher (see flush()). Journals of a process
+    that no longer holds its lock file are claimed by another worker. Every entry has a submission key, so entries
+    inserted by a worker that stopped before deleting its journal are not inserted again.
+    """
+
+    def __init__(self, directory: str, recovery_interval: float):
+        self.directory = directory
+        self.recovery_interval = recovery_interval
+
+        self._file = None
+        self._pid = None
+        self._name = None
+        self._lock_file = None
+        self._sequence = count()
+        self._next_recovery = 0.0
+        self._lock = threading.Lock()
+
+    def append(self, entry: dict):
+        line = json.dumps(entry) + '\n'
+
+        with self._lock:
+            file = self._active_file()
+            file.write(line)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def take_batches(self) -> list:
+        """Seals the active journal and returns the paths of the sealed journals this worker has to insert, oldest first."""
+        with self._lock:
+            owner = self._name if self._pid == os.getpid() else None
+
+            if owner is not None and self._file is not None and self._file.tell() > 0:
+                self._file.close()
+                self._file = None
+                os.rename(self._path(f'journal-{owner}.jsonl'), self._batch_path(owner))
+
+            if time.monotonic() >= self._next_recovery:
+                owner = self._claim_orphans(owner)
+                self._next_recovery = time.monotonic() + self.recovery_interval
+
+        batches = []
+
+        for name in os.listdir(self.directory):
+            match = JOURNAL_FILE.match(name)
+
+            if match and match.group(1) == owner and match.group(3) == 'batch':
+                batches.append(self._path(name))
+
+        return sorted(batches, key=os.path.getmtime)
+
+    def _active_file(self):
+        owner = self._owner()
+
+        if self._file is None:
+            self._file = open(self._path(f'journal-{owner}.jsonl'), 'a', encoding='utf-8')
+
+        return self._file
+
+    def _owner(self) -> str:
+        pid = os.getpid()
+
+        # A journal opened before gunicorn forked the workers belongs to the master, every process gets a name of its own
+        if self._pid != pid:
+            self._pid = pid
+            self._name = f'{pid}-{uuid.uuid4().hex[:12]}'
+            self._file = None
+
+            # The lock is taken before the lock file can be seen, and is only released once the process is gone
+            temporary = self._path(f'journal-{self._name}.lock.tmp')
+            self._lock_file = os.open(temporary, os.O_WRONLY | os.O_CREAT, 0o644)
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            os.rename(temporary, self._path(f'journal-{self._name}.lock'))
+
+        return self._name
+
+    def _claim_orphans(self, owner: str):
+        """Claims every journal of the processes that are gone, returns the owner of the claimed journals."""
+        journals = {}
+
+        for name in os.listdir(self.directory):
+            match = JOURNAL_FILE.match(name)
+
+            if match and match.group(1) != owner:
+                journals.setdefault(match.group(1), []).append(name)
+
+        for orphan, names in journals.items():
+            lock_file = _take_lock(self._path(f'journal-{orphan}.lock'))
+
+            if lock_file is None:
+                continue
+
+            for name in names:
+                if not name.endswith('.lock'):
+                    owner = self._claim(name)
+
+            os.remove(self._path(f'journal-{orphan}.lock'))
+            os.close(lock_file)
+
+        return owner
+
+    def _claim(self, name: str) -> str:
+        owner = self._owner()
+
+        try:
+            # Renaming is atomic, only one of the workers finding the journal gets it
+            os.rename(self._path(name), self._batch_path(owner))
+            print(f'Recovering ticket journal {name}', file=stderr)
+
+        except FileNotFoundError:
+            pass
+
+        return owner
+
+    def _batch_path(self, owner: str):
+        return self._path(f'journal-{owner}-{time.time_ns()}-{next(self._sequence)}.batch')
+
+    def _path(self, name: str):
+        return os.path.join(self.directory, name)
+
+def init_app(app: Flask):
+    """
+    Writes the tickets journaled by each worker to the database every TICKET_JOURNAL_FLUSH_INTERVAL seconds, if enabled.
+    Journals left behind while it was enabled are inserted either way, checking for them every TICKET_JOURNAL_RECOVERY_INTERVAL.
+    """
+    if app.config['TICKET_JOURNAL_ENABLED']:
+        background.register_worker_task(app, 'ticket_journal', flush, app.config['TICKET_JOURNAL_FLUSH_INTERVAL'])
+
+    elif _has_journals(_directory(app)):
+        background.register_worker_task(app, 'ticket_journal', flush, app.config['TICKET_JOURNAL_RECOVERY_INTERVAL'])
+
+def get_journal() -> TicketJournal:
+    journal = current_app.extensions.get('ticket_journal')
+
+    if journal is None:
+        directory = _directory(current_app)
+        os.makedirs(directory, exist_ok=True)
+
+        journal = current_app.extensions.setdefault('ticket_journal', TicketJournal(directory, current_app.config['TICKET_JOURNAL_RECOVERY_INTERVAL']))
+
+    return journal
+
+def journal_ticket(ticket: Ticket):
+    """
+    Writes a validated ticket to this worker's journal instead of the database, it is inserted by the next flush().
+    Tickets without a submission key are given one, which is how the ticket is found again once it was inserted.
+    """
+    ticket.submission_key = ticket.submission_key or uuid.uuid4().hex
+    ticket.time_created = datetime.now()
+
+    entry = { column: getattr(ticket, column) for column in JOURNAL_COLUMNS }
+    entry['mode'] = ticket.mode.value if ticket.mode else None
+    entry['time_created'] = ticket.time_created.isoformat()
+
+    get_journal().append(entry)
+
+def flush():
+    """Inserts the tickets journaled by this worker, one transaction per sealed journal."""
+    for path in get_journal().take_batches():
+        _insert(_read(path))
+        os.remove(path)
+
+def _read(path: str):
+    entries = []
+
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                entries.append(json.loads(line))
+
+            except ValueError:
+                # Only the last line can be cut short, by a worker stopping while writing it, and it was never acknowledged
+                print(f'Skipping incomplete line in ticket journal {path}', file=stderr)
+
+    return entries
+
+def _insert(entries: list):
+    rows = {}
+
+    for entry in entries:
+        entry['mode'] = Mode(entry['mode']) if entry['mode'] is not None else None
+        entry['time_created'] = datetime.fromisoformat(entry['time_created'])
+        rows.setdefault(entry['submission_key'], entry)
+
+    if not rows:
+        return
+
+    # Resubmitted forms and journals replayed after a crash hold tickets that were inserted already
+    inserted = db.session.execute(select(Ticket.submission_key).where(Ticket.submission_key.in_(rows.keys()))).scalars()
+
+    for submission_key in inserted:
+        rows.pop(submission_key)
+
+    if not rows:
+        return
+
+    try:
+        db.session.execute(insert(Ticket.__table__), list(rows.values()))
+        db.session.commit()
+
+    except IntegrityError:
+        db.session.rollback()
+
+        # One bad ticket (e.g. for a course deleted in the mean time) must not hold back the others
+        for row in rows.values():
+            try:
+                db.session.execute(insert(Ticket.__table__), row)
+                db.session.commit()
+
+            except IntegrityError as e:
+                db.session.rollback()
+                print(f'Failed to insert journaled ticket {row["submission_key"]}: {e}', file=stderr)
+
+def _directory(app: Flask) -> str:
+    return app.config['TICKET_JOURNAL_DIR'] or os.path.join(app.instance_path, 'ticket-journal')
+
+def _has_journals(directory: str) -> bool:
+    return os.path.isdir(directory) and any(JOURNAL_FILE.match(name) for name in os.listdir(directory))
+
+def _take_lock(path: str):
+    """Takes the lock file of another process, which only succeeds once it is gone. Returns the open lock file, or None."""
+
+    # Journals named before there were lock files have none, no running process uses such a name
+    lock_file = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return lock_file
+
+    except BlockingIOError:
+        os.close(lock_file)
+        return None
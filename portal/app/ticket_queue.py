@@ -0,0 +1,149 @@
+from flask import current_app
+
+from sqlalchemy import select
+
+from .extensions import db
+from .model import Status
+from .model import Ticket
+
+from bisect import bisect_left
+from bisect import insort
+from collections import deque
+from datetime import datetime
+from datetime import timedelta
+
+import threading
+import time
+
+class TicketQueue:
+    """
+    Ordered view of the open tickets kept in memory by a worker, oldest first, along with the times tickets left the queue
+    over the last 'window' seconds from which the rate at which tutors take tickets is estimated.
+
+    Changes made by this worker are applied straight away (see ticket_opened() and ticket_left()). Changes made by other
+    workers are picked up at most every 'refresh_interval' seconds, by reading the ids of the open tickets through the
+    status index and applying the difference. Reading positions never touches the database otherwise.
+    """
+
+    def __init__(self, window: float, refresh_interval: float):
+        self.window = window
+        self.refresh_interval = refresh_interval
+
+        # Sorted (time created, id) of every open ticket, and the key of each ticket by id
+        self._order = []
+        self._keys = {}
+
+        self._departures = deque()
+        self._loaded = False
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def position(self, ticket_id: int):
+        """Returns the 1-based position of an open ticket, or None if the ticket is not open."""
+        self._refresh_if_due()
+
+        with self._lock:
+            key = self._keys.get(ticket_id)
+            return bisect_left(self._order, key) + 1 if key is not None else None
+
+    def estimated_wait(self, position: int):
+        """Returns the estimated time until the ticket at 'position' is taken, or None if no ticket was taken recently."""
+        with self._lock:
+            self._forget_departures(datetime.now())
+
+            if not self._departures:
+                return None
+
+            # Tickets taken per second over the window
+            rate = len(self._departures) / self.window
+
+        return timedelta(seconds=position / rate)
+
+    def add(self, ticket_id: int, time_created: datetime):
+        with self._lock:
+            # A queue that was never read is loaded with the ticket the first time it is read
+            if self._loaded:
+                self._add(ticket_id, time_created)
+
+    def remove(self, ticket_id: int):
+        with self._lock:
+            self._remove(ticket_id, datetime.now())
+
+    def _refresh_if_due(self):
+        if time.monotonic() < self._next_refresh:
+            return
+
+        with self._lock:
+            # Another thread may have refreshed the queue while we were waiting for the lock
+            if time.monotonic() < self._next_refresh:
+                return
+
+            now = datetime.now()
+
+            if not self._loaded:
+                self._load_departures(now)
+
+            open_tickets = dict(db.session.execute(select(Ticket.id, Ticket.time_created).where(Ticket.status == Status.Open)).all())
+
+            for ticket_id in [ ticket_id for ticket_id in self._keys if ticket_id not in open_tickets ]:
+                self._remove(ticket_id, now)
+
+            for ticket_id, time_created in open_tickets.items():
+                if ticket_id not in self._keys:
+                    self._add(ticket_id, time_created)
+
+            self._loaded = True
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def _load_departures(self, now: datetime):
+        # Seed the rate with the tickets taken before this worker started watching the queue
+        since = now - timedelta(seconds=self.window)
+        claimed = db.session.execute(select(Ticket.time_claimed).where(Ticket.time_claimed >= since).order_by(Ticket.time_claimed)).scalars()
+        self._departures.extend(claimed)
+
+    def _add(self, ticket_id: int, time_created: datetime):
+        if ticket_id in self._keys:
+            return
+
+        key = (time_created, ticket_id)
+        self._keys[ticket_id] = key
+        insort(self._order, key)
+
+    def _remove(self, ticket_id: int, now: datetime):
+        key = self._keys.pop(ticket_id, None)
+
+        if key is None:
+            return
+
+        del self._order[bisect_left(self._order, key)]
+        self._departures.append(now)
+        self._forget_departures(now)
+
+    def _forget_departures(self, now: datetime):
+        since = now - timedelta(seconds=self.window)
+
+        while self._departures and self._departures[0] < since:
+            self._departures.popleft()
+
+def get_queue() -> TicketQueue:
+    queue = current_app.extensions.get('ticket_queue')
+
+    if queue is None:
+        config = current_app.config
+        queue = current_app.extensions.setdefault('ticket_queue', TicketQueue(config['QUEUE_RATE_WINDOW'], config['QUEUE_REFRESH_INTERVAL']))
+
+    return queue
+
+def ticket_opened(ticket: Ticket):
+    """Adds a ticket created or reopened by this worker to its queue, after it was committed."""
+    queue = current_app.extensions.get('ticket_queue')
+
+    if queue is not None:
+        queue.add(ticket.id, ticket.time_created)
+
+def ticket_left(ticket_id: int):
+    """Removes a ticket claimed or closed by this worker from its queue, after it was committed."""
+    queue = current_app.extensions.get('ticket_queue')
+
+    if queue is not None:
+        queue.remove(ticket_id)
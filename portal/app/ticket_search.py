@@ -0,0 +1,102 @@
+from sqlalchemy import inspect
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload
+
+from .extensions import db
+from .model import Ticket
+
+from sys import stderr
+
+import re
+
+# Columns of the Tickets table that are searched
+SEARCH_COLUMNS = ('assignment_name', 'specific_question', 'tutor_notes')
+
+# SQLite: an FTS5 table indexing the Tickets table (without a copy of the text), kept up to date by triggers
+SQLITE_SEARCH_TABLE = 'TicketsSearch'
+
+SQLITE_SEARCH_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_SEARCH_TABLE} USING fts5("
+    f"{', '.join(SEARCH_COLUMNS)}, content='Tickets', content_rowid='id', tokenize='porter unicode61')",
+
+    f"CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_insert AFTER INSERT ON Tickets BEGIN "
+    f"INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES (new.id, {', '.join('new.' + column for column in SEARCH_COLUMNS)}); END",
+
+    f"CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_delete AFTER DELETE ON Tickets BEGIN "
+    f"INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + column for column in SEARCH_COLUMNS)}); END",
+
+    f"CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_update AFTER UPDATE OF {', '.join(SEARCH_COLUMNS)} ON Tickets BEGIN "
+    f"INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + column for column in SEARCH_COLUMNS)}); "
+    f"INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, {', '.join(SEARCH_COLUMNS)}) "
+    f"VALUES (new.id, {', '.join('new.' + column for column in SEARCH_COLUMNS)}); END",
+)
+
+# MySQL: a FULLTEXT index on the Tickets table, which InnoDB keeps up to date itself
+MYSQL_SEARCH_INDEX = 'ft_tickets_search'
+
+WORD_PATTERN = re.compile(r'\w+')
+
+def create_search_index(engine: Engine):
+    """
+    Creates the full-text index of the tickets for the database in use, if it does not exist yet.
+    Tickets written before the index existed are indexed when it is created. Other databases are searched without an index.
+    """
+    if engine.dialect.name == 'sqlite':
+        with engine.begin() as conn:
+            created = not inspect(conn).has_table(SQLITE_SEARCH_TABLE)
+
+            for statement in SQLITE_SEARCH_DDL:
+                conn.execute(text(statement))
+
+            if created:
+                print(f'Indexing tickets in {SQLITE_SEARCH_TABLE}', file=stderr)
+                conn.execute(text(f"INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}) VALUES ('rebuild')"))
+
+    elif engine.dialect.name in ('mysql', 'mariadb'):
+        if MYSQL_SEARCH_INDEX not in { index['name'] for index in inspect(engine).get_indexes(Ticket.__tablename__) }:
+            print(f'Creating index {MYSQL_SEARCH_INDEX} on {Ticket.__tablename__}', file=stderr)
+
+            with engine.begin() as conn:
+                conn.execute(text(f"CREATE FULLTEXT INDEX {MYSQL_SEARCH_INDEX} ON {Ticket.__tablename__} ({', '.join(SEARCH_COLUMNS)})"))
+
+def search_tickets(query: str, page: int, page_size: int):
+    """
+    Returns the tickets on the given page (starting at 1) of the tickets matching the words of the query, best match first,
+    and whether there are more pages. Only the ids of one page are read from the full-text index.
+    """
+    words = WORD_PATTERN.findall(query or '')
+
+    if not words:
+        return [], False
+
+    # Reading one extra ticket tells whether there is a next page, without counting every match
+    offset = (max(page, 1) - 1) * page_size
+    ids = _search_ids(words, page_size + 1, offset)
+
+    tickets = { ticket.id: ticket for ticket in Ticket.query.options(joinedload(Ticket.user)).filter(Ticket.id.in_(ids[:page_size])) }
+    return [ tickets[id] for id in ids[:page_size] if id in tickets ], len(ids) > page_size
+
+def _search_ids(words: list, limit: int, offset: int):
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        # Every word must match, the last one may be the start of a word as it may still be typed
+        match = ' '.join(f'"{word}"' for word in words) + '*'
+        statement = text(f'SELECT rowid FROM {SQLITE_SEARCH_TABLE} WHERE {SQLITE_SEARCH_TABLE} MATCH :match ORDER BY rank LIMIT :limit OFFSET :offset')
+        return db.session.execute(statement, { 'match': match, 'limit': limit, 'offset': offset }).scalars().all()
+
+    if dialect in ('mysql', 'mariadb'):
+        match = f"MATCH ({', '.join(SEARCH_COLUMNS)}) AGAINST (:query IN NATURAL LANGUAGE MODE)"
+        statement = text(f'SELECT id FROM {Ticket.__tablename__} WHERE {match} ORDER BY {match} DESC LIMIT :limit OFFSET :offset')
+        return db.session.execute(statement, { 'query': ' '.join(words), 'limit': limit, 'offset': offset }).scalars().all()
+
+    # Without a full-text index every ticket is scanned, newest first
+    columns = [ getattr(Ticket, column) for column in SEARCH_COLUMNS ]
+    conditions = [ or_(*(column.ilike(f'%{word}%') for column in columns)) for word in words ]
+    return db.session.execute(select(Ticket.id).where(*conditions).order_by(Ticket.id.desc()).limit(limit).offset(offset)).scalars().all()
@@ -0,0 +1,103 @@
+from flask import Flask
+from flask import current_app
+
+from sqlalchemy import select
+from sqlalchemy import update
+
+from .extensions import db
+from .model import Config
+from .model import Status
+from .model import Ticket
+from .util import read_config_data
+
+from . import background
+from . import ticket_queue
+
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+from sys import stderr
+
+# Days of the week as named in appconfig.json and in the columns of the Config table, Monday first (as datetime.weekday())
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+CONFIG_DAYS = ('mon', 'tue', 'wed', 'thur', 'fri', 'sat', None)
+
+def init_app(app: Flask):
+    """Closes stale tickets in the background of one of the workers if TICKET_SWEEPER_ENABLED is set."""
+    if app.config['TICKET_SWEEPER_ENABLED']:
+        background.register_leader_task(app, 'ticket_sweeper', sweep_stale_tickets, app.config['TICKET_SWEEPER_INTERVAL'])
+
+def center_hours() -> dict:
+    """
+    Returns the (opening, closing) time of the center by day of the week (0 is Monday), from the Config table if it has a row
+    or else appconfig.json. The center is closed on days without hours.
+    """
+    config = Config.query.first()
+
+    if config is not None:
+        hours = { day: (getattr(config, f'{name}_start'), getattr(config, f'{name}_end')) for day, name in enumerate(CONFIG_DAYS) if name }
+        return { day: (_time(start), _time(end)) for day, (start, end) in hours.items() if start is not None and end is not None }
+
+    hours = read_config_data().get('hours', {})
+
+    return { day: (_parse_time(hours[f'{name}_start']), _parse_time(hours[f'{name}_end']))
+             for day, name in enumerate(WEEKDAYS) if f'{name}_start' in hours and f'{name}_end' in hours }
+
+def last_closing(now: datetime, hours: dict, grace: timedelta):
+    """Returns the last time the center closed at least 'grace' before 'now', looking back a week, or None if it was closed all week."""
+    for days_ago in range(8):
+        day = (now - timedelta(days=days_ago)).date()
+
+        if day.weekday() in hours:
+            closing = datetime.combine(day, hours[day.weekday()][1])
+
+            if closing + grace <= now:
+                return closing
+
+    return None
+
+def sweep_stale_tickets():
+    """
+    Closes the tickets still open or claimed that were created before the center last closed, once TICKET_SWEEPER_GRACE_MINUTES
+    passed since, and flags them as auto closed. Nobody helped them, so they get no service time. Closes TICKET_SWEEPER_BATCH_SIZE
+    tickets per UPDATE and transaction, so the board is not held up by a long transaction. Returns the number of tickets closed.
+    """
+    config = current_app.config
+    closing = last_closing(datetime.now(), center_hours(), timedelta(minutes=config['TICKET_SWEEPER_GRACE_MINUTES']))
+
+    if closing is None:
+        return 0
+
+    stale = (Ticket.status.in_((Status.Open, Status.Claimed)), Ticket.time_created < closing)
+    swept = 0
+
+    while True:
+        ids = db.session.execute(select(Ticket.id).where(*stale).order_by(Ticket.id).limit(config['TICKET_SWEEPER_BATCH_SIZE'])).scalars().all()
+
+        if not ids:
+            break
+
+        # Tutors may close some of them in the mean time
+        close = update(Ticket) \
+            .where(Ticket.id.in_(ids), *stale) \
+            .values(status=Status.Closed, time_closed=datetime.now(), auto_closed=True) \
+            .execution_options(synchronize_session=False)
+
+        swept += db.session.execute(close).rowcount
+        db.session.commit()
+
+        for ticket_id in ids:
+            ticket_queue.ticket_left(ticket_id)
+
+    if swept:
+        print(f'Closed {swept} tickets left open or claimed since {closing}', file=stderr)
+
+    return swept
+
+def _time(value):
+    # The Config columns are datetimes, of which only the time of day matters
+    return value.time() if isinstance(value, datetime) else value
+
+def _parse_time(value: str) -> time:
+    """Parses a time of day as written in appconfig.json, e.g. '9:00am'."""
+    return datetime.strptime(value.strip().upper(), '%I:%M%p').time()
@@ -10,6 +10,9 @@ from flask_login import current_user
 
 from .model import Permission
 
+import json
+import os
+
 PERMISSION_REQUIRED_REDIRECT = 'views.index'
 
 def strip_or_none(s: str):
@@ -18,6 +21,13 @@ def strip_or_none(s: str):
 def str_empty(s: str):
     return s is not None and not s
 
+def read_config_data():
+    """Reads app/appconfig.json, the room, zoom link and hours of the center shown on the home page."""
+    project_dir = os.path.dirname(os.path.realpath(__file__))
+
+    with open(f'{project_dir}/appconfig.json', 'r') as f:
+        return json.load(f)
+
 def permission_required(permission):
     def decorator(func):
         @wraps(func)
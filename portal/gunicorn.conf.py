@@ -0,0 +1,85 @@
+# gunicorn loads this file automatically when started from the 'portal/' directory (see Dockerfile)
+#
+# NOTE: Every setting can be overridden from the environment without rebuilding the image:
+#       GUNICORN_BIND, GUNICORN_WORKER_CLASS, GUNICORN_WORKERS, GUNICORN_THREADS, GUNICORN_TIMEOUT,
+#       GUNICORN_MAX_REQUESTS. Command line arguments (e.g. -w 3) take precedence over this file.
+
+import os
+
+def cpu_count():
+    """
+    Number of CPUs this process may actually use. Inside a container this is the CPU quota
+    (e.g. docker run --cpus 2) rather than the number of CPUs of the host.
+    """
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+
+    # cgroup v2 quota, formatted as '<quota> <period>' or 'max <period>' when unlimited
+    try:
+        with open('/sys/fs/cgroup/cpu.max', 'r') as f:
+            quota, period = f.read().split()
+
+        if quota != 'max':
+            count = min(count, max(int(quota) // int(period), 1))
+
+    except (OSError, ValueError):
+        pass
+
+    return count
+
+def default_workers(worker_class: str, cpus: int):
+    """
+    Sync workers handle one request at a time so more of them are needed to keep the CPUs busy while
+    others wait on the database. Threaded and async workers overlap that waiting themselves, one worker
+    per CPU (plus one) is enough. Capped so the workers do not exhaust the database's connections.
+    """
+    if worker_class == 'sync':
+        workers = 2 * cpus + 1
+    else:
+        workers = cpus + 1
+
+    return max(2, min(workers, 12))
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# gthread serves several requests per worker, so one slow report download does not block the whole worker.
+# An async worker class (e.g. gevent) can be used for long lived streaming responses if it is installed
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('GUNICORN_WORKERS', default_workers(worker_class, cpu_count())))
+
+# Only used by gthread. Must not exceed the SQLAlchemy connection pool size (5 by default)
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Only used by async workers, the number of simultaneous connections each worker handles
+worker_connections = 1000
+
+# Create the app (connect to the database, create tables, read config) once before forking the workers
+preload_app = True
+
+# Workers that do not respond within this many seconds are killed and restarted
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+
+# Must be longer than the keep-alive timeout of nginx's upstream pool, see nginx/nginx.conf
+keepalive = 5
+
+# Restart workers every so often to contain memory leaks, the jitter keeps them from restarting at the same time
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+# Workers heartbeat through a temporary file, a disk-backed one can block them in containers
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+def post_fork(server, worker):
+    """
+    The database connections opened while preloading the app belong to the master process,
+    drop them in the worker so it opens its own instead of sharing sockets with its siblings.
+    """
+    from app.extensions import db
+
+    with server.app.wsgi().app_context():
+        db.engine.dispose(close=False)
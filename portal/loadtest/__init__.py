@@ -0,0 +1,4 @@
+# NOTE: The load testing harness for the portal. Run it from the 'portal/' directory with:
+#
+#       python -m loadtest --help
+#
@@ -0,0 +1,200 @@
+"""
+Closed-loop load generator for the portal.
+
+Starts the portal the same way the docker image does (gunicorn with 'create_app()'), signs in virtual students,
+tutors and admins through a mock auth app and replays a rush-hour mix at increasing concurrency levels:
+
+    - students load the home page, open the ticket form and submit tickets
+    - tutors poll the ticket board, claim open tickets and close claimed ones
+    - admins download ticket reports
+
+Throughput, error rate and tail latency are reported for every concurrency level.
+
+Example, run from the 'portal/' directory:
+
+    python -m loadtest --levels 1,10,25,50 --duration 30
+
+By default a throwaway SQLite database is used, pass --database-uri to test against MySQL instead.
+"""
+from .scenarios import build_users
+from .stats import LevelResult
+from .stats import format_table
+
+from sys import stderr
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import requests
+
+PORTAL_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+def main(argv=None):
+    args = _parse_args(argv)
+    levels = [ int(level) for level in args.levels.split(',') ]
+    mix = _parse_mix(args.mix)
+
+    server = None
+    base_url = args.url
+
+    if base_url is None:
+        database_uri = args.database_uri or f'sqlite:///{os.path.join(tempfile.mkdtemp(prefix="portal-loadtest-"), "loadtest.db")}'
+        env = _server_env(database_uri, args)
+
+        _seed(env, max(levels), mix)
+        server, base_url = _start_server(env, args.port, args.host)
+
+    try:
+        if args.serve:
+            _serve(server, base_url)
+            return
+
+        results = []
+
+        for level in levels:
+            print(f'Running {level} concurrent users for {args.duration}s (+{args.warmup}s warm up)...', file=stderr)
+            results.append(_run_level(base_url, level, mix, args))
+
+        print(format_table(results))
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({ 'label': args.label, 'levels': [ _level_json(result) for result in results ] }, f, indent=4)
+
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m loadtest', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', default='1,5,10,25,50', help='Comma separated list of concurrent virtual users to test.')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to measure each concurrency level for.')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds to run each level before measuring.')
+    parser.add_argument('--think-time', type=float, default=0, help='Mean seconds a virtual user waits between scenario iterations.')
+    parser.add_argument('--mix', default='student=70,tutor=25,admin=5', help='Relative weights of students, tutors and admins.')
+    parser.add_argument('--workers', type=int, help='Number of gunicorn workers to start, sized from the CPU count by default (see gunicorn.conf.py).')
+    parser.add_argument('--threads', type=int, help='Number of threads per gunicorn worker, for the gthread worker class.')
+    parser.add_argument('--worker-class', help='gunicorn worker class to use, gthread by default.')
+    parser.add_argument('--port', type=int, default=8765, help='Port to run gunicorn on.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind gunicorn to, e.g. 0.0.0.0 to put nginx in front of it.')
+    parser.add_argument('--serve', action='store_true', help='Only seed and start the portal, then wait. Used to test it behind nginx with --url.')
+    parser.add_argument('--database-uri', help='SQLAlchemy URI of the database to use, defaults to a temporary SQLite database.')
+    parser.add_argument('--url', help='Test an already running portal (started with loadtest.wsgi) instead of starting one.')
+    parser.add_argument('--insecure', action='store_true', help='Do not verify SSL certificates, e.g. for a self-signed nginx certificate.')
+    parser.add_argument('--label', default='', help='Label saved with the JSON results.')
+    parser.add_argument('--json', help='Also write the results to this JSON file.')
+    args = parser.parse_args(argv)
+
+    if args.serve and args.url:
+        parser.error('--serve starts its own portal, it cannot be used with --url')
+
+    return args
+
+def _parse_mix(mix: str):
+    weights = { 'student': 0, 'tutor': 0, 'admin': 0 }
+
+    for part in mix.split(','):
+        role, weight = part.split('=')
+        weights[role.strip()] = float(weight)
+
+    return weights
+
+def _server_env(database_uri: str, args):
+    env = dict(os.environ)
+    env['FLASK_SQLALCHEMY_DATABASE_URI'] = database_uri
+
+    # gunicorn is configured by gunicorn.conf.py, the same as in the docker image
+    for name, value in (('GUNICORN_WORKERS', args.workers), ('GUNICORN_THREADS', args.threads), ('GUNICORN_WORKER_CLASS', args.worker_class)):
+        if value is not None:
+            env[name] = str(value)
+
+    # The load test talks plain HTTP to gunicorn, and every worker must agree on the secret key
+    env['FLASK_SESSION_COOKIE_SECURE'] = 'false'
+    env.setdefault('FLASK_SECRET_KEY', '"loadtest"')
+
+    # Every virtual user submits from the same address and keeps submitting tickets, measure the portal rather than its limits
+    env.setdefault('FLASK_RATE_LIMIT_ENABLED', 'false')
+    env.setdefault('FLASK_MAX_OPEN_TICKETS', '0')
+    return env
+
+def _seed(env: dict, max_users: int, mix: dict):
+    """Creates the tutors, admins, problem types and courses the virtual users need in the database."""
+    code = (
+        'import sys\n'
+        'from loadtest.seed import seed\n'
+        'seed(int(sys.argv[1]), int(sys.argv[2]))\n'
+    )
+
+    total = sum(mix.values())
+    tutors = max(round(max_users * mix['tutor'] / total), 1)
+    admins = max(round(max_users * mix['admin'] / total), 1)
+    subprocess.run([ sys.executable, '-c', code, str(tutors), str(admins) ], cwd=PORTAL_DIR, env=env, check=True)
+
+def _start_server(env: dict, port: int, host: str):
+    base_url = f'http://127.0.0.1:{port}'
+    command = [ sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'{host}:{port}', 'loadtest.wsgi:create_app()' ]
+    server = subprocess.Popen(command, cwd=PORTAL_DIR, env=env)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with code {server.returncode}')
+
+        try:
+            requests.get(base_url, timeout=1)
+            return server, base_url
+
+        except requests.RequestException:
+            time.sleep(0.25)
+
+    server.terminate()
+    raise RuntimeError('Timed out waiting for gunicorn to start')
+
+def _serve(server: subprocess.Popen, base_url: str):
+    print(f'Portal running on {base_url}, press Ctrl+C to stop', file=stderr)
+
+    try:
+        server.wait()
+
+    except KeyboardInterrupt:
+        pass
+
+def _run_level(base_url: str, level: int, mix: dict, args):
+    users = build_users(base_url, level, mix, args.think_time, verify=not args.insecure)
+
+    for user in users:
+        user.login()
+
+    start = time.monotonic()
+    measure_after = start + args.warmup
+    deadline = measure_after + args.duration
+
+    # Every virtual user records into its own result to avoid contention, they are merged afterwards
+    results = [ LevelResult(level) for _ in users ]
+    threads = [ threading.Thread(target=user.run, args=(result, deadline, measure_after), daemon=True) for user, result in zip(users, results) ]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    total = LevelResult(level)
+    total.elapsed = args.duration
+    for result in results:
+        total.merge(result)
+
+    return total
+
+def _level_json(result: LevelResult):
+    return { 'overall': result.summary(), 'requests': { name: result.summary(name) for name in result.samples } }
+
+
+if __name__ == '__main__':
+    main()
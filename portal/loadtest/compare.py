@@ -0,0 +1,100 @@
+"""
+Compares two load test results saved with --json, e.g. before and after changing the nginx configuration.
+
+    python -m loadtest --label before --json before.json
+    python -m loadtest --label after --json after.json
+    python -m loadtest.compare before.json after.json
+
+For every concurrency level found in both results, the throughput and latency percentiles of the baseline
+(first file) and the candidate (second file) are printed along with the relative change.
+"""
+from sys import stderr
+
+import argparse
+import json
+import sys
+
+METRICS = ('throughput', 'error_rate', 'p50', 'p95', 'p99')
+
+def compare(baseline: dict, candidate: dict, request: str = None):
+    """
+    Returns a row per concurrency level present in both results, each row maps a metric to a tuple of
+    (baseline value, candidate value, relative change). Only the given request is compared if one is given.
+    """
+    baseline_levels = { level['overall']['concurrency']: _summary(level, request) for level in baseline['levels'] }
+    candidate_levels = { level['overall']['concurrency']: _summary(level, request) for level in candidate['levels'] }
+
+    rows = []
+    for concurrency in sorted(baseline_levels.keys() & candidate_levels.keys()):
+        before = baseline_levels[concurrency]
+        after = candidate_levels[concurrency]
+
+        if before is None or after is None:
+            continue
+
+        row = { 'concurrency': concurrency }
+        for metric in METRICS:
+            row[metric] = (before[metric], after[metric], _change(before[metric], after[metric]))
+
+        rows.append(row)
+
+    return rows
+
+def format_comparison(rows: list, baseline_label: str, candidate_label: str):
+    header = f'{"users":>6} {"metric":>10} {baseline_label[:12]:>12} {candidate_label[:12]:>12} {"change":>9}'
+    lines = [ header, '-' * len(header) ]
+
+    for row in rows:
+        for metric in METRICS:
+            before, after, change = row[metric]
+
+            if metric == 'error_rate':
+                values = f'{before:>12.2%} {after:>12.2%}'
+            else:
+                values = f'{before:>12.1f} {after:>12.1f}'
+
+            lines.append(f'{row["concurrency"]:>6} {metric:>10} {values} {_format_change(change):>9}')
+
+        lines.append('')
+
+    return '\n'.join(lines)
+
+def _summary(level: dict, request: str):
+    if request is None:
+        return level['overall']
+
+    return level['requests'].get(request)
+
+def _change(before: float, after: float):
+    if before == 0:
+        return None
+
+    return (after - before) / before
+
+def _format_change(change):
+    return 'n/a' if change is None else f'{change:+.1%}'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadtest.compare', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline', help='JSON results to compare against.')
+    parser.add_argument('candidate', help='JSON results to compare.')
+    parser.add_argument('--request', help='Only compare this request, e.g. "GET /view-tickets".')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+
+    with open(args.candidate, 'r') as f:
+        candidate = json.load(f)
+
+    rows = compare(baseline, candidate, args.request)
+
+    if not rows:
+        print('The results have no concurrency level in common', file=stderr)
+        sys.exit(1)
+
+    print(format_comparison(rows, baseline.get('label') or 'baseline', candidate.get('label') or 'candidate'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+from .stats import LevelResult
+
+from abc import ABC
+from abc import abstractmethod
+from datetime import date
+
+import random
+import re
+import time
+import requests
+
+# Matches the ticket id of every 'Claim' and 'Close' button on the tutor's board
+CLAIM_PATTERN = re.compile(r'name="ticketID" value="(\d+)">\s*<button[^>]*?value="Claim"', re.DOTALL)
+CLOSE_PATTERN = re.compile(r'name="ticketID" value="(\d+)">\s*<button[^>]*?value="Close"', re.DOTALL)
+
+class VirtualUser(ABC):
+    """
+    A single closed-loop virtual user. Each iteration of the loop sends the next request of the scenario,
+    waits for the response and optionally thinks for a bit before sending another one.
+    """
+
+    def __init__(self, base_url: str, email: str, name: str, think_time: float = 0.0, verify: bool = True):
+        self.base_url = base_url.rstrip('/')
+        self.email = email
+        self.name = name
+        self.think_time = think_time
+        self.http = requests.Session()
+        self.http.verify = verify
+
+    def login(self):
+        """Signs in through the mock auth app, the identity is passed as part of the redirect."""
+        self.http.get(f'{self.base_url}/getAToken', params={ 'email': self.email, 'name': self.name, 'oid': self.email }, allow_redirects=False)
+
+    def run(self, result: LevelResult, deadline: float, measure_after: float):
+        while time.monotonic() < deadline:
+            self.step(result, measure_after)
+
+            if self.think_time:
+                time.sleep(random.uniform(0, 2 * self.think_time))
+
+    @abstractmethod
+    def step(self, result: LevelResult, measure_after: float):
+        """Sends the next request of the scenario."""
+
+    def request(self, result: LevelResult, measure_after: float, name: str, method: str, path: str, **kwargs):
+        start = time.monotonic()
+
+        try:
+            response = self.http.request(method, f'{self.base_url}{path}', allow_redirects=False, timeout=60, **kwargs)
+            ok = response.status_code < 400
+
+        except requests.RequestException:
+            response = None
+            ok = False
+
+        # Requests made while warming up are sent but not measured
+        if start >= measure_after:
+            result.record(name, time.monotonic() - start, ok)
+
+        return response
+
+class Student(VirtualUser):
+    """Visits the home page, opens the ticket form and submits a ticket."""
+
+    def step(self, result, measure_after):
+        self.request(result, measure_after, 'GET /', 'GET', '/')
+        self.request(result, measure_after, 'GET /create-ticket', 'GET', '/create-ticket')
+        self.request(result, measure_after, 'POST /create-ticket', 'POST', '/create-ticket', data={
+            'course': 'CSCI 1620',
+            'section': '001',
+            'assignment': f'Assignment {random.randint(1, 10)}',
+            'question': 'My program does not compile and I do not understand the error message.',
+            'problem': '1',
+            'mode': random.choice(['1', '2'])
+        })
+
+class Tutor(VirtualUser):
+    """Polls the ticket board, claims an open ticket if there is one and closes tickets that were claimed."""
+
+    def step(self, result, measure_after):
+        response = self.request(result, measure_after, 'GET /view-tickets', 'GET', '/view-tickets')
+
+        if response is None or response.status_code != 200:
+            return
+
+        open_ids = CLAIM_PATTERN.findall(response.text)
+        claimed_ids = CLOSE_PATTERN.findall(response.text)
+
+        if open_ids:
+            self.request(result, measure_after, 'POST /update-ticket (claim)', 'POST', '/update-ticket',
+                         data={ 'ticketID': random.choice(open_ids), 'action': 'Claim' })
+
+        elif claimed_ids:
+            self.request(result, measure_after, 'POST /update-ticket (close)', 'POST', '/update-ticket',
+                         data={ 'ticketID': random.choice(claimed_ids), 'action': 'Close' })
+
+class Admin(VirtualUser):
+    """Downloads the ticket report for the current year."""
+
+    def step(self, result, measure_after):
+        self.request(result, measure_after, 'POST /admin/reports/download', 'POST', '/admin/reports/download',
+                     data={ 'creationDate': date.today().replace(month=1, day=1).isoformat(), 'course': '' })
+
+def build_users(base_url: str, count: int, mix: dict, think_time: float, verify: bool = True):
+    """
+    Creates 'count' virtual users split between students, tutors and admins according to the weights in 'mix'.
+    Tutors and admins are named tutorN@loadtest.local and adminN@loadtest.local, which must be seeded beforehand.
+    """
+    total = sum(mix.values())
+    tutors = round(count * mix['tutor'] / total)
+    admins = round(count * mix['admin'] / total)
+    students = max(count - tutors - admins, 0)
+
+    users = []
+    users += [ Student(base_url, f'student{i}@loadtest.local', f'Student {i}', think_time, verify) for i in range(students) ]
+    users += [ Tutor(base_url, f'tutor{i}@loadtest.local', f'Tutor {i}', think_time, verify) for i in range(tutors) ]
+    users += [ Admin(base_url, f'admin{i}@loadtest.local', f'Admin {i}', think_time, verify) for i in range(admins) ]
+    return users
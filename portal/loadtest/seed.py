@@ -0,0 +1,51 @@
+from .wsgi import create_app
+
+from app.extensions import db
+from app.model import Course
+from app.model import Permission
+from app.model import ProblemType
+from app.model import Professor
+from app.model import Section
+from app.model import SectionMode
+from app.model import Season
+from app.model import Semester
+from app.model import User
+
+from datetime import date
+from datetime import timedelta
+
+def seed(tutors: int, admins: int):
+    """
+    Fills the database configured in the environment with everything the virtual users of the load test need:
+    tutors (tutorN@loadtest.local), admins (adminN@loadtest.local), problem types and a course with a section
+    in the current semester. Existing rows are left alone so this can be run against the same database again.
+    """
+    app = create_app()
+
+    with app.app_context():
+        for i in range(tutors):
+            _add_super_user(f'tutor{i}@loadtest.local', Permission.Tutor)
+
+        for i in range(admins):
+            _add_super_user(f'admin{i}@loadtest.local', Permission.Admin)
+
+        if ProblemType.query.count() == 0:
+            for problem in app.jinja_env.globals['ConfigData']['default_prblm_types'].values():
+                db.session.add(ProblemType(problem))
+
+        if Course.query.filter_by(department='CSCI', number='1620').first() is None:
+            today = date.today()
+
+            course = Course('CSCI', '1620', 'Introduction to Computer Science II', True)
+            semester = Semester(today.year, Season.Fall, today - timedelta(days=30), today + timedelta(days=90))
+            professor = Professor('load', 'test')
+            db.session.add_all([ course, semester, professor ])
+            db.session.flush()
+
+            db.session.add(Section(1, 'MonWed', None, None, SectionMode.InPerson, course.id, semester.id, professor.id))
+
+        db.session.commit()
+
+def _add_super_user(email: str, permission: Permission):
+    if User.query.filter_by(email=email).first() is None:
+        db.session.add(User(None, permission, email, None, True, False))
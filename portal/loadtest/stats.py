@@ -0,0 +1,85 @@
+from collections import defaultdict
+
+import math
+
+class LevelResult:
+    """
+    Collects the samples recorded while running the load test at a single concurrency level.
+    A sample is the name of the request, how long it took in seconds and whether it succeeded.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.elapsed = 0.0
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name: str, latency: float, ok: bool):
+        self.samples[name].append(latency)
+        if not ok:
+            self.errors[name] += 1
+
+    def merge(self, other: 'LevelResult'):
+        for name, latencies in other.samples.items():
+            self.samples[name].extend(latencies)
+
+        for name, count in other.errors.items():
+            self.errors[name] += count
+
+    def summary(self, name: str = None):
+        """
+        Returns the throughput, error rate and latency percentiles (in milliseconds) for the given request
+        name or for every request made at this level if no name is given.
+        """
+        if name is None:
+            latencies = [ latency for samples in self.samples.values() for latency in samples ]
+            errors = sum(self.errors.values())
+
+        else:
+            latencies = self.samples.get(name, [])
+            errors = self.errors.get(name, 0)
+
+        latencies = sorted(latencies)
+        count = len(latencies)
+
+        return {
+            'concurrency': self.concurrency,
+            'requests': count,
+            'throughput': count / self.elapsed if self.elapsed else 0.0,
+            'error_rate': errors / count if count else 0.0,
+            'p50': percentile(latencies, 50) * 1000,
+            'p95': percentile(latencies, 95) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': (latencies[-1] if latencies else 0.0) * 1000
+        }
+
+def percentile(sorted_values: list, pct: float):
+    """Nearest-rank percentile of an already sorted list, 0 if the list is empty."""
+    if not sorted_values:
+        return 0.0
+
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+def format_table(results: list):
+    """Formats the overall summary of every concurrency level, followed by a breakdown per request type."""
+    header = f'{"users":>6} {"reqs":>8} {"req/s":>9} {"errors":>8} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"max ms":>9}'
+    lines = [ header, '-' * len(header) ]
+
+    for result in results:
+        lines.append(_format_row(result.summary()))
+
+    names = sorted({ name for result in results for name in result.samples })
+    for name in names:
+        lines.append('')
+        lines.append(name)
+        lines.append('-' * len(header))
+
+        for result in results:
+            lines.append(_format_row(result.summary(name)))
+
+    return '\n'.join(lines)
+
+def _format_row(s: dict):
+    return f'{s["concurrency"]:>6} {s["requests"]:>8} {s["throughput"]:>9.1f} {s["error_rate"]:>8.2%} ' \
+           f'{s["p50"]:>9.1f} {s["p95"]:>9.1f} {s["p99"]:>9.1f} {s["max"]:>9.1f}'
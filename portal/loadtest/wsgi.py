@@ -0,0 +1,45 @@
+from app import extensions
+
+import os
+import uuid
+
+# The auth blueprint asserts these are set, the values don't matter since nothing talks to Microsoft
+os.environ.setdefault('AAD_AUTHORITY', 'https://login.microsoftonline.com/common')
+os.environ.setdefault('AAD_CLIENT_ID', 'LoadTestAppID')
+os.environ.setdefault('AAD_CLIENT_SECRET', 'LoadTestClientSecret')
+os.environ.setdefault('AAD_REDIRECT_PATH', '/getAToken')
+
+class MockAuthApp:
+    """
+    Stand-in for MSAL's ConfidentialClientApplication used while load testing.
+
+    Unlike the mock used by the unit tests this never contacts Microsoft, and the identity of the signed in
+    user is taken from the query string of the redirect (e.g. /getAToken?email=a@b.com&name=A&oid=1234).
+    This way every virtual user of the load test can sign in as someone different through the normal auth route.
+    """
+
+    def __init__(self, client_id, authority=None, client_credential=None, token_cache=None, **_):
+        self.client_id = client_id
+        self.authority = authority
+
+    def initiate_auth_code_flow(self, scopes, redirect_uri=None, **_):
+        return { 'auth_uri': redirect_uri, 'state': uuid.uuid4().hex }
+
+    def acquire_token_by_auth_code_flow(self, auth_code_flow, auth_response, **_):
+        email = auth_response.get('email')
+
+        return {
+            'id_token_claims': {
+                'oid': auth_response.get('oid', email),
+                'name': auth_response.get('name', email),
+                'preferred_username': email
+            }
+        }
+
+# NOTE: DO NOT change the name of 'create_app()', it is used by gunicorn the same way as 'app:create_app()'
+def create_app():
+    # The auth blueprint binds the auth app type when it is imported by create_app(), so this must be set first
+    extensions.auth_app_type = MockAuthApp
+
+    from app import create_app as create_portal_app
+    return create_portal_app()
@@ -3,11 +3,16 @@ from app import extensions
 from flask import Flask
 
 from app.model import db
+from app.model import Mode
 from app.model import Permission
 from app.model import ProblemType
+from app.model import Status
+from app.model import Ticket
 
 from app.blueprints.admin import create_pseudo_super_user
 
+from datetime import datetime
+
 import pytest
 import os
 import shutil
@@ -29,6 +34,9 @@ def app():
     # Cannot be reused, we'll need to automatically delete this folder from disk once tests are done
     os.environ['FLASK_SESSION_TYPE'] = 'filesystem'
 
+    # Background tasks would keep running against the database of every test, tests run them by hand instead
+    os.environ['FLASK_BACKGROUND_TASKS_ENABLED'] = 'false'
+
     # Set the required azure app directory authentication env variables
     os.environ['AAD_AUTHORITY'] = 'https://login.microsoftonline.com/common'
     os.environ['AAD_CLIENT_ID'] = 'DummyAppID'
@@ -110,6 +118,45 @@ def create_super_user(create_auth_client, app: Flask):
 
     return _factory
 
+@pytest.fixture
+def submit_ticket():
+    """Provides a factory function posting the ticket form as a student would, returns the response."""
+
+    # Every field can be changed, extra fields (e.g. submission_key) are posted as well
+    def _factory(client, assignment = 'assignment1', question = 'This is my question?', email = 'student@email.com', environ = None, **fields):
+        return client.post('/create-ticket', data={
+            'email': email,
+            'fullname': 'Student',
+            'course': 'course1',
+            'section': 'section1',
+            'assignment': assignment,
+            'question': question,
+            'mode': Mode.Online.value,
+            **fields
+        }, environ_base=environ or {})
+
+    return _factory
+
+@pytest.fixture
+def add_ticket(app: Flask):
+    """Provides a factory function adding a ticket straight to the database, e.g. to backdate it, returns its id."""
+
+    # Any other column of the ticket (e.g. course or time_claimed) can be given as a keyword argument
+    def _factory(assignment = 'Assignment 1', status = Status.Open, created = None, **columns):
+        with app.app_context():
+            ticket = Ticket('student@email.com', 'Student', 'CSCI 1620', '1', assignment, 'Question?', None, Mode.Online)
+            ticket.time_created = created or datetime.now()
+            ticket.status = status
+
+            for name, value in columns.items():
+                setattr(ticket, name, value)
+
+            db.session.add(ticket)
+            db.session.commit()
+            return ticket.id
+
+    return _factory
+
 @pytest.fixture
 def tutor_client(create_super_user):
     return create_super_user(email='tutor@email.com', permission=Permission.Tutor)
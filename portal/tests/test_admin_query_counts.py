@@ -0,0 +1,92 @@
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from app.model import db
+from app.model import Course
+from app.model import Permission
+from app.model import Professor
+from app.model import Section
+from app.model import SectionMode
+from app.model import Season
+from app.model import Semester
+from app.model import User
+
+from datetime import date
+
+import pytest
+
+@pytest.fixture
+def count_queries(app: Flask):
+    """Provides a function that returns how many SQL statements were executed while getting a page."""
+
+    def _count(client: FlaskClient, url: str):
+        statements = []
+
+        # Warm up any caches first, only the steady state matters
+        client.get(url)
+
+        def _on_execute(conn, cursor, statement, *_):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+
+        event.listen(engine, 'before_cursor_execute', _on_execute)
+        response = client.get(url)
+        event.remove(engine, 'before_cursor_execute', _on_execute)
+
+        assert '200' in response.status
+        return len(statements)
+
+    return _count
+
+def _add_sections(app: Flask, count: int):
+    with app.app_context():
+        semester = Semester(2023, Season.Fall, date(2023, 8, 21), date(2023, 12, 15))
+        db.session.add(semester)
+
+        for i in range(count):
+            course = Course('CSCI', str(1000 + Course.query.count()), f'Course {i}', True)
+            professor = Professor(f'first{i}', f'last{i}')
+            db.session.add_all([ course, professor ])
+            db.session.flush()
+
+            db.session.add(Section(i, 'Mon', None, None, SectionMode.TotallyOnline, course.id, semester.id, professor.id))
+
+        db.session.commit()
+
+def _add_tutors(app: Flask, count: int):
+    with app.app_context():
+        for i in range(User.query.count(), User.query.count() + count):
+            db.session.add(User(f'oid-{i}', Permission.Tutor, f'tutor{i}@email.com', f'Tutor {i}', True, False))
+            db.session.add(User(None, Permission.Tutor, f'pending{i}@email.com', None, True, False))
+
+        db.session.commit()
+
+def test_sections_page_constant_queries(admin_client: FlaskClient, app: Flask, count_queries):
+    _add_sections(app, 2)
+    few = count_queries(admin_client, '/admin/sections')
+
+    _add_sections(app, 10)
+    many = count_queries(admin_client, '/admin/sections')
+
+    assert few == many
+
+def test_courses_page_constant_queries(admin_client: FlaskClient, app: Flask, count_queries):
+    _add_sections(app, 2)
+    few = count_queries(admin_client, '/admin/courses')
+
+    _add_sections(app, 10)
+    many = count_queries(admin_client, '/admin/courses')
+
+    assert few == many
+
+def test_tutors_page_constant_queries(admin_client: FlaskClient, app: Flask, count_queries):
+    _add_tutors(app, 2)
+    few = count_queries(admin_client, '/admin/tutors')
+
+    _add_tutors(app, 10)
+    many = count_queries(admin_client, '/admin/tutors')
+
+    assert few == many
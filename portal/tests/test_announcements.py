@@ -0,0 +1,74 @@
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from app.model import db
+from app.model import Message
+
+from datetime import datetime
+from datetime import timedelta
+
+import time
+
+def _add_message(app: Flask, text: str, start: datetime, end: datetime):
+    with app.app_context():
+        db.session.add(Message(text, start, end))
+        db.session.commit()
+
+def test_index_shows_active_messages(client: FlaskClient, app: Flask):
+    now = datetime.now()
+    _add_message(app, 'Currently displayed', now - timedelta(days=1), now + timedelta(days=1))
+    _add_message(app, 'Already expired', now - timedelta(days=2), now - timedelta(days=1))
+    _add_message(app, 'Not yet displayed', now + timedelta(days=1), now + timedelta(days=2))
+
+    response = client.get('/')
+
+    assert b'Currently displayed' in response.data
+    assert b'Already expired' not in response.data
+    assert b'Not yet displayed' not in response.data
+
+def test_index_does_not_requery_messages(client: FlaskClient, app: Flask):
+    now = datetime.now()
+    _add_message(app, 'Currently displayed', now - timedelta(days=1), now + timedelta(days=1))
+    client.get('/')
+
+    statements = []
+
+    def _on_execute(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', _on_execute)
+    response = client.get('/')
+    event.remove(engine, 'before_cursor_execute', _on_execute)
+
+    assert b'Currently displayed' in response.data
+    assert not [ statement for statement in statements if 'Messages' in statement ]
+
+def test_index_message_starts_at_boundary(client: FlaskClient, app: Flask):
+    now = datetime.now()
+    _add_message(app, 'Starting soon', now + timedelta(seconds=0.5), now + timedelta(days=1))
+
+    response = client.get('/')
+    assert b'Starting soon' not in response.data
+
+    # Nothing bumped the messages version, the cached start date alone should make it show up
+    time.sleep(0.6)
+
+    response = client.get('/')
+    assert b'Starting soon' in response.data
+
+def test_admin_add_message_shows_on_index(admin_client: FlaskClient, app: Flask):
+    admin_client.get('/')
+
+    today = datetime.now().date()
+    admin_client.post('/admin/messages/add', data={
+        'message': 'Closed on Friday',
+        'startDate': (today - timedelta(days=1)).isoformat(),
+        'endDate': (today + timedelta(days=1)).isoformat()
+    })
+
+    response = admin_client.get('/')
+    assert b'Closed on Friday' in response.data
@@ -0,0 +1,36 @@
+from flask import Flask
+from flask import url_for
+
+from app import assets
+
+import gzip
+import shutil
+
+def test_build_fingerprints_static_files(app: Flask, tmp_path):
+    static_folder = tmp_path / 'static'
+    shutil.copytree(app.static_folder, static_folder)
+
+    manifest = assets.build(str(static_folder))
+    fingerprinted = manifest['css/main-style.css']
+
+    assert fingerprinted.startswith('dist/css/main-style.') and fingerprinted.endswith('.css')
+    assert (static_folder / fingerprinted).read_bytes() == (static_folder / 'css/main-style.css').read_bytes()
+
+    # Text files are precompressed, already compressed images are not
+    assert gzip.decompress((static_folder / f'{fingerprinted}.gz').read_bytes()) == (static_folder / 'css/main-style.css').read_bytes()
+    assert not (static_folder / f'{manifest["img/uno-icon-color.png"]}.gz').exists()
+
+    assert assets.load_manifest(str(static_folder)) == manifest
+
+    # Building again gives the same names, so the portal and nginx agree on them
+    assert assets.build(str(static_folder)) == manifest
+
+def test_url_for_uses_manifest(app: Flask):
+    with app.test_request_context():
+        assert url_for('static', filename='css/main-style.css') == '/static/css/main-style.css'
+
+    app.extensions['static_manifest'] = { 'css/main-style.css': 'dist/css/main-style.0123456789ab.css' }
+
+    with app.test_request_context():
+        assert url_for('static', filename='css/main-style.css') == '/static/dist/css/main-style.0123456789ab.css'
+        assert url_for('static', filename='img/favicon.ico') == '/static/img/favicon.ico'
@@ -0,0 +1,81 @@
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from app.model import db
+from app.model import Status
+from app.model import Ticket
+
+from datetime import datetime
+from datetime import timedelta
+
+def _statuses(app: Flask):
+    with app.app_context():
+        return { ticket.id: ticket.status for ticket in Ticket.query }
+
+def test_bulk_claim_and_close(tutor_client: FlaskClient, app: Flask, add_ticket):
+    first = add_ticket(created=datetime.now() - timedelta(minutes=5))
+    second = add_ticket(created=datetime.now() - timedelta(minutes=2))
+    closed = add_ticket(status=Status.Closed)
+
+    response = tutor_client.post('/api/tickets/bulk', json={ 'action': 'Claim', 'ids': [ first, second, closed, 99, first ] })
+
+    assert response.json == { 'action': 'Claim', 'updated': 2, 'tickets': [
+        { 'id': first, 'outcome': 'updated', 'status': 'Claimed' },
+        { 'id': second, 'outcome': 'updated', 'status': 'Claimed' },
+        { 'id': closed, 'outcome': 'invalid', 'status': 'Closed' },
+        { 'id': 99, 'outcome': 'not found', 'status': None } ] }
+
+    with app.app_context():
+        tickets = [ db.session.get(Ticket, id) for id in (first, second) ]
+        assert 299 <= tickets[0].wait_seconds <= 302
+        assert 119 <= tickets[1].wait_seconds <= 122
+        assert tickets[0].tutor_id == tickets[1].tutor_id is not None
+
+    # Form fields work as well
+    response = tutor_client.post('/api/tickets/bulk', data={ 'action': 'Close', 'ticketID': [ first, second ] })
+
+    assert response.json['updated'] == 2
+    assert _statuses(app) == { first: Status.Closed, second: Status.Closed, closed: Status.Closed }
+
+    with app.app_context():
+        assert [ db.session.get(Ticket, id).service_seconds for id in (first, second) ] == [ 0, 0 ]
+
+    response = tutor_client.post('/api/tickets/bulk', json={ 'action': 'Open', 'ids': [ first, closed ] })
+
+    assert response.json['updated'] == 2
+    assert _statuses(app) == { first: Status.Open, second: Status.Closed, closed: Status.Open }
+
+def test_bulk_update_is_one_statement(tutor_client: FlaskClient, app: Flask, add_ticket):
+    ids = [ add_ticket(status=Status.Claimed) for _ in range(40) ]
+    updates = []
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE "Tickets"'):
+            updates.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', _on_execute)
+    response = tutor_client.post('/api/tickets/bulk', json={ 'action': 'Close', 'ids': ids })
+    event.remove(engine, 'before_cursor_execute', _on_execute)
+
+    assert response.json['updated'] == 40
+    assert len(updates) == 1
+
+def test_bulk_rejects_invalid_requests(tutor_client: FlaskClient):
+    for data in ({ 'action': 'Delete', 'ids': [ 1 ] }, { 'action': 'Close', 'ids': [] }, { 'action': 'Close', 'ids': [ 'one' ] },
+                 { 'action': 'Close', 'ids': 1 }, { 'action': 'Close', 'ids': list(range(1000)) }, [ 'Close' ]):
+        assert '400' in tutor_client.post('/api/tickets/bulk', json=data).status
+
+def test_bulk_requires_tutor(auth_client: FlaskClient):
+    assert '302' in auth_client.post('/api/tickets/bulk', json={ 'action': 'Close', 'ids': [ 1 ] }).status
+
+def test_single_update_checks_transition(tutor_client: FlaskClient, app: Flask, add_ticket):
+    id = add_ticket()
+
+    tutor_client.post('/update-ticket', data={ 'ticketID': id, 'action': 'Open' })
+
+    with tutor_client.session_transaction() as session:
+        assert session['_flashes'][-1] == ('error', 'Did not change ticket status. The ticket is open.')
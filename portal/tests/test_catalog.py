@@ -0,0 +1,136 @@
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from app.model import db
+from app.model import CacheVersion
+from app.model import Course
+from app.model import ProblemType
+from app.model import Section
+from app.model import SectionMode
+from app.model import Season
+from app.model import Semester
+
+from app.cache import get_version
+from app.catalog import CATALOG_VERSION
+from app.catalog import PrefixIndex
+
+from app import catalog
+
+from datetime import date
+from datetime import timedelta
+
+def test_catalog_not_requeried(auth_client: FlaskClient, app: Flask):
+    statements = []
+
+    def _on_execute(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    # First render loads the catalog
+    response = auth_client.get('/create-ticket')
+    assert b'This is the first problem type!' in response.data
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', _on_execute)
+    response = auth_client.get('/create-ticket')
+    event.remove(engine, 'before_cursor_execute', _on_execute)
+
+    assert b'This is the first problem type!' in response.data
+    assert not [ statement for statement in statements if 'ProblemTypes' in statement ]
+
+def test_admin_change_bumps_catalog(admin_client: FlaskClient, app: Flask):
+    admin_client.get('/create-ticket')
+
+    with app.app_context():
+        assert get_version(CATALOG_VERSION) == 0
+
+    admin_client.post('/admin/problems/add', data={ 'problemType': 'A brand new problem!' })
+
+    with app.app_context():
+        assert get_version(CATALOG_VERSION) == 1
+
+    # The worker that made the change sees it straight away
+    response = admin_client.get('/create-ticket')
+    assert b'A brand new problem!' in response.data
+
+def test_catalog_reloads_on_version_change(auth_client: FlaskClient, app: Flask):
+    app.config['CACHE_POLL_INTERVAL'] = 0
+    auth_client.get('/create-ticket')
+
+    # Pretend another worker added a problem type, the cached catalog is still used until the version changes
+    with app.app_context():
+        db.session.add(ProblemType('Added by another worker!'))
+        db.session.commit()
+
+    response = auth_client.get('/create-ticket')
+    assert b'Added by another worker!' not in response.data
+
+    with app.app_context():
+        db.session.add(CacheVersion(CATALOG_VERSION, 1))
+        db.session.commit()
+
+    response = auth_client.get('/create-ticket')
+    assert b'Added by another worker!' in response.data
+
+def test_prefix_index():
+    index = PrefixIndex([ ('CSCI 1620: Java I', 1), ('Java', 1), ('CSCI 1840: Java II', 2), ('Java', 2), ('csci  4000', 3), ('Data', 4) ])
+
+    assert index.search('csci', 10) == [ 1, 2, 3 ]
+    assert index.search('CSCI 4', 10) == [ 3 ]
+    assert index.search('jav', 10) == [ 1, 2 ]
+    assert index.search('csci', 2) == [ 1, 2 ]
+    assert index.search('cobol', 10) == []
+
+def test_search_sections_of_course(app: Flask):
+    with app.app_context():
+        today = date.today()
+        semester = Semester(today.year, Season.Fall, today - timedelta(days=30), today + timedelta(days=30))
+        courses = [ Course('CSCI', str(1000 + number), f'Course {number}', True) for number in range(1, 13) ]
+        db.session.add_all([ semester, *courses ])
+        db.session.flush()
+
+        # Course ids 1 and 12, whose keys share a prefix
+        sections = [ Section(number, 'Mon', None, None, SectionMode.InPerson, course.id, semester.id, None)
+                     for course, number in ((courses[0], 1), (courses[11], 2)) ]
+        db.session.add_all(sections)
+        db.session.commit()
+
+        assert [ courses[0].id, courses[11].id ] == [ 1, 12 ]
+        assert [ section.id for section in catalog.search_sections(1, '', 50) ] == [ sections[0].id ]
+        assert [ section.id for section in catalog.search_sections(12, ' 0', 50) ] == [ sections[1].id ]
+
+def test_search_does_not_query(client: FlaskClient, app: Flask):
+    with app.app_context():
+        db.session.add_all([ Course('CSCI', '1620', 'Java I', True), Course('MATH', '1950', 'Calculus I', True), Course('CSCI', '9999', 'Hidden', False) ])
+        db.session.commit()
+
+    # Load the catalog
+    client.get('/api/catalog/search?q=a')
+
+    statements = []
+
+    def _on_execute(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', _on_execute)
+    courses = client.get('/api/catalog/search?q=cs').json['courses']
+    by_word = client.get('/api/catalog/search?q=calc').json['courses']
+    everything = client.get('/api/catalog/search?limit=1').json['courses']
+    event.remove(engine, 'before_cursor_execute', _on_execute)
+
+    assert [ course['label'] for course in courses ] == [ 'CSCI 1620: Java I' ]
+    assert [ course['value'] for course in by_word ] == [ 'MATH 1950' ]
+    assert len(everything) == 1
+    assert statements == []
+
+def test_search_reloads_on_catalog_change(client: FlaskClient, admin_client: FlaskClient, app: Flask):
+    assert client.get('/api/catalog/search?q=csci').json['courses'] == []
+
+    admin_client.post('/admin/courses/add', data={ 'courseDepartment': 'CSCI', 'courseNumber': '1620', 'courseName': 'Java I', 'displayOnIndex': 'on' })
+
+    assert [ course['value'] for course in client.get('/api/catalog/search?q=csci').json['courses'] ] == [ 'CSCI 1620' ]
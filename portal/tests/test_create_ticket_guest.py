@@ -224,3 +224,54 @@ def test_create_ticket_invalid_mode(create_ticket_with_invalid_data, client: Fla
     # Expect redirect back to create ticket page
     assert '302' in response.status
     assert b'href="/create-ticket"' in response.data
+
+def test_create_ticket_resubmitted(client: FlaskClient, app: Flask):
+    form_data = {
+        'email':'test@test.email',
+        'fullname':'John Doe',
+        'assignment':'assignment1',
+        'question':'This is my question?',
+        'mode': Mode.InPerson.value,
+        'submission_key': 'f6d3b0a4-5a8e-4b8e-9a57-1d1c1f0b7c2e'
+    }
+
+    client.post('/create-ticket', data=form_data)
+
+    # A double click or a refreshed page sends the same form again, from the same or a new session
+    for resubmit in (client, app.test_client()):
+        response = resubmit.post('/create-ticket', data=form_data)
+        assert '302' in response.status
+        assert b'href="/"' in response.data
+
+        with resubmit.session_transaction() as session:
+            assert session['_flashes'][-1] == ('success', 'Ticket created successfully!')
+            assert session['my_tickets'] == [ 1 ]
+
+    with app.app_context():
+        assert Ticket.query.count() == 1
+
+    # The key does not give away the ticket of someone else
+    other = app.test_client()
+    other.post('/create-ticket', data={ **form_data, 'email': 'other@test.email' })
+
+    with other.session_transaction() as session:
+        assert session['_flashes'][-1] == ('error', 'Could not submit ticket, invalid data')
+        assert 'my_tickets' not in session
+
+def test_create_ticket_new_submission_key(client: FlaskClient, app: Flask):
+    form_data = {
+        'email':'test@test.email',
+        'fullname':'John Doe',
+        'assignment':'assignment1',
+        'question':'This is my question?',
+        'mode': Mode.InPerson.value
+    }
+
+    client.post('/create-ticket', data={ **form_data, 'submission_key': 'first' })
+    client.post('/create-ticket', data={ **form_data, 'submission_key': 'second' })
+
+    # Forms without a key are never treated as resubmitted
+    client.post('/create-ticket', data=form_data)
+
+    with app.app_context():
+        assert [ ticket.submission_key for ticket in Ticket.query.order_by(Ticket.id) ] == [ 'first', 'second', None ]
@@ -0,0 +1,160 @@
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app.model import db
+from app.model import CanTutor
+from app.model import Course
+from app.model import Mode
+from app.model import Permission
+from app.model import Status
+from app.model import Ticket
+from app.model import User
+
+from app import background
+from app.background import acquire_lease
+from app.dispatcher import dispatch
+
+from datetime import datetime
+from datetime import timedelta
+
+import time
+
+def _add_tutor(app: Flask, email: str, courses: list = (), working: bool = True):
+    with app.app_context():
+        tutor = User(f'oid-{email}', Permission.Tutor, email, email, True, working)
+        db.session.add(tutor)
+        db.session.flush()
+        db.session.add_all([ CanTutor(tutor.id, course_id) for course_id in courses ])
+        db.session.commit()
+        return tutor.id
+
+def _add_course(app: Flask, number: str):
+    with app.app_context():
+        course = Course('CSCI', number, f'Course {number}', True)
+        db.session.add(course)
+        db.session.commit()
+        return course.id
+
+def _tickets(app: Flask):
+    with app.app_context():
+        return { ticket.id: (ticket.status, ticket.tutor_id) for ticket in Ticket.query.all() }
+
+def test_acquire_lease(app: Flask):
+    with app.app_context():
+        assert acquire_lease('task', 'worker-1', 60)
+        assert not acquire_lease('task', 'worker-2', 60)
+
+        # The holder renews its own lease
+        assert acquire_lease('task', 'worker-1', -1)
+
+        # An expired lease is taken over
+        assert acquire_lease('task', 'worker-2', 60)
+        assert not acquire_lease('task', 'worker-1', 60)
+
+def test_dispatch_oldest_first(app: Flask, add_ticket):
+    first = _add_tutor(app, 'first@email.com')
+    second = _add_tutor(app, 'second@email.com')
+    _add_tutor(app, 'away@email.com', working=False)
+
+    newest = add_ticket(created=datetime.now() - timedelta(minutes=1))
+    oldest = add_ticket(created=datetime.now() - timedelta(minutes=10))
+    in_person = add_ticket(created=datetime.now() - timedelta(minutes=9), mode=Mode.InPerson)
+
+    with app.app_context():
+        assignments = dispatch()
+
+    # The in-person ticket is treated as older than it is, the newest ticket waits for a free tutor
+    assert [ ticket_id for ticket_id, _ in assignments ] == [ in_person, oldest ]
+    assert { tutor_id for _, tutor_id in assignments } == { first, second }
+
+    tickets = _tickets(app)
+    assert tickets[newest] == (Status.Open, None)
+    assert tickets[in_person][0] == Status.Claimed
+
+    with app.app_context():
+        assert db.session.get(Ticket, oldest).wait_seconds >= 600
+
+        # Both tutors are busy
+        assert dispatch() == []
+
+        db.session.get(Ticket, in_person).close()
+        db.session.commit()
+
+        assert dispatch() == [ (newest, tickets[in_person][1]) ]
+
+def test_dispatch_qualified_tutors(app: Flask, add_ticket):
+    java = _add_course(app, '1620')
+    data_structures = _add_course(app, '2620')
+
+    java_tutor = _add_tutor(app, 'java@email.com', [ java ])
+    _add_tutor(app, 'ds@email.com', [ data_structures ], working=False)
+
+    ds_ticket = add_ticket(created=datetime.now() - timedelta(minutes=10), course_id=data_structures)
+    java_ticket = add_ticket(created=datetime.now() - timedelta(minutes=5), course_id=java)
+
+    with app.app_context():
+        assert dispatch() == [ (java_ticket, java_tutor) ]
+
+    assert _tickets(app)[ds_ticket] == (Status.Open, None)
+
+def test_dispatch_new_tickets_without_resync(app: Flask, add_ticket):
+    tutor = _add_tutor(app, 'tutor@email.com')
+
+    with app.app_context():
+        assert dispatch() == []
+
+    ticket = add_ticket(created=datetime.now() - timedelta(minutes=1))
+
+    with app.app_context():
+        assert dispatch() == [ (ticket, tutor) ]
+
+def test_dispatch_skips_tickets_claimed_by_hand(tutor_client: FlaskClient, app: Flask, add_ticket):
+    _add_tutor(app, 'first@email.com')
+    ticket = add_ticket(created=datetime.now() - timedelta(minutes=1))
+
+    # Queue the ticket while every tutor is busy
+    with app.app_context():
+        for tutor in User.query.filter(User.oid.is_not(None)).all():
+            tutor.tutor_is_working = False
+
+        db.session.commit()
+        assert dispatch() == []
+
+    tutor_client.post('/update-ticket', data={ 'ticketID': ticket, 'action': 'Claim' })
+    claimed = _tickets(app)[ticket]
+
+    with app.app_context():
+        User.query.filter_by(email='first@email.com').one().tutor_is_working = True
+        db.session.commit()
+
+        assert dispatch() == []
+
+    assert _tickets(app)[ticket] == claimed
+
+def test_claim_already_claimed_ticket(tutor_client: FlaskClient, app: Flask, add_ticket):
+    other = _add_tutor(app, 'other@email.com')
+    ticket = add_ticket(created=datetime.now() - timedelta(minutes=1))
+
+    with app.app_context():
+        assert Ticket.claim_if_open(ticket, other, datetime.now())
+        db.session.commit()
+
+    tutor_client.post('/update-ticket', data={ 'ticketID': ticket, 'action': 'Claim' })
+
+    with tutor_client.session_transaction() as session:
+        assert session['_flashes'] == [ ('error', 'Could not claim ticket, it was already claimed.') ]
+
+    assert _tickets(app)[ticket] == (Status.Claimed, other)
+
+def test_leader_task_runs_on_one_worker(app: Flask):
+    runs = []
+    app.config['BACKGROUND_TASKS_ENABLED'] = True
+    background.register_leader_task(app, 'test', lambda: runs.append(background.worker_name()), 0.01)
+
+    # The first request starts the task
+    app.test_client().get('/')
+    time.sleep(0.2)
+    background.stop_leader_tasks(app)
+
+    assert runs
+    assert set(runs) == { background.worker_name() }
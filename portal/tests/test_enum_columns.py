@@ -0,0 +1,70 @@
+from flask import Flask
+from sqlalchemy import create_engine
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.model import db
+from app.model import Permission
+from app.model import Season
+from app.model import Semester
+from app.model import Status
+from app.model import Ticket
+from app.model import User
+
+from app.schema import migrate_enum_columns
+
+from datetime import date
+
+def test_enum_stored_as_value(app: Flask):
+    with app.app_context():
+        db.session.add(Semester(2023, 'Fall', date(2023, 8, 21), date(2023, 12, 15)))
+        db.session.add(User('oid', Permission.Admin, 'admin@email.com', 'Admin', True, False))
+        db.session.commit()
+
+        assert db.session.execute(text('SELECT season FROM "Semesters"')).scalar() == Season.Fall.value
+        assert db.session.execute(text('SELECT permission FROM "Users"')).scalar() == Permission.Admin.value
+
+        db.session.expire_all()
+        assert Semester.query.one().season == Season.Fall
+
+def test_get_tutors_range_query(app: Flask):
+    with app.app_context():
+        for permission in Permission:
+            db.session.add(User(f'oid-{permission}', permission, f'{permission}@email.com', str(permission), True, False))
+
+        # Pending tutors have not signed in yet
+        db.session.add(User(None, Permission.Tutor, 'pending@email.com', None, True, False))
+        db.session.commit()
+
+        query = User.get_tutors()
+        assert '>=' in str(query.statement)
+        assert sorted(user.email for user in query) == [ 'Admin@email.com', 'Owner@email.com', 'Tutor@email.com' ]
+
+def test_migrate_enum_names():
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine)
+
+    # Rows as stored by the old Enum columns
+    with engine.begin() as conn:
+        for i, permission in enumerate([ 'Student', 'Tutor', 'Owner', 'Tutor' ]):
+            conn.execute(text(f'INSERT INTO "Users" (permission, email) VALUES (\'{permission}\', \'user{i}@email.com\')'))
+
+        conn.execute(text('INSERT INTO "Tickets" (student_email, time_created, status) VALUES (\'student@email.com\', \'2023-01-01\', \'Claimed\')'))
+        conn.execute(text('INSERT INTO "Tickets" (student_email, time_created, status) VALUES (\'student@email.com\', \'2023-01-01\', NULL)'))
+
+    # Old rows can still be read before they are migrated
+    with Session(engine) as session:
+        assert session.get(User, 2).permission == Permission.Tutor
+
+    migrate_enum_columns(engine, db.metadata, batch_size=3)
+
+    with engine.connect() as conn:
+        assert [ row[0] for row in conn.execute(text('SELECT permission FROM "Users" ORDER BY id')) ] == [ 1, 2, 4, 2 ]
+        assert [ row[0] for row in conn.execute(text('SELECT status FROM "Tickets" ORDER BY id')) ] == [ 2, None ]
+
+    with Session(engine) as session:
+        assert session.query(User).filter(User.permission >= Permission.Tutor).count() == 3
+        assert session.get(Ticket, 1).status == Status.Claimed
+
+    # Nothing left to migrate
+    migrate_enum_columns(engine, db.metadata)
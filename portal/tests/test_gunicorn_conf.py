@@ -0,0 +1,28 @@
+import os
+import runpy
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'gunicorn.conf.py')
+
+def test_default_workers():
+    config = runpy.run_path(CONFIG_PATH)
+
+    assert config['default_workers']('sync', 1) == 3
+    assert config['default_workers']('sync', 4) == 9
+    assert config['default_workers']('gthread', 1) == 2
+    assert config['default_workers']('gthread', 4) == 5
+
+    # Never more than the database can handle
+    assert config['default_workers']('sync', 64) == 12
+
+def test_config_from_env(monkeypatch):
+    monkeypatch.setenv('GUNICORN_WORKER_CLASS', 'sync')
+    monkeypatch.setenv('GUNICORN_WORKERS', '7')
+    monkeypatch.setenv('GUNICORN_MAX_REQUESTS', '500')
+
+    config = runpy.run_path(CONFIG_PATH)
+
+    assert config['worker_class'] == 'sync'
+    assert config['workers'] == 7
+    assert config['max_requests'] == 500
+    assert config['max_requests_jitter'] == 50
+    assert config['preload_app']
@@ -0,0 +1,33 @@
+from loadtest.compare import compare
+from loadtest.compare import format_comparison
+
+def _result(label: str, levels: dict):
+    def _summary(concurrency, throughput, p95):
+        return { 'concurrency': concurrency, 'requests': 100, 'throughput': throughput, 'error_rate': 0.0, 'p50': p95 / 2, 'p95': p95, 'p99': p95 * 2, 'max': p95 * 3 }
+
+    return { 'label': label, 'levels': [
+        { 'overall': _summary(c, t, p), 'requests': { 'GET /': _summary(c, t / 2, p) } } for c, (t, p) in levels.items()
+    ] }
+
+def test_compare_common_levels():
+    baseline = _result('direct', { 1: (100.0, 10.0), 10: (200.0, 40.0) })
+    candidate = _result('nginx', { 10: (300.0, 20.0), 25: (350.0, 50.0) })
+
+    rows = compare(baseline, candidate)
+
+    # Only the level both runs have is compared
+    assert [ row['concurrency'] for row in rows ] == [ 10 ]
+    assert rows[0]['throughput'] == (200.0, 300.0, 0.5)
+    assert rows[0]['p95'] == (40.0, 20.0, -0.5)
+
+    # Nothing to compare against
+    assert rows[0]['error_rate'][2] is None
+
+    assert '+50.0%' in format_comparison(rows, 'direct', 'nginx')
+
+def test_compare_single_request():
+    baseline = _result('direct', { 10: (200.0, 40.0) })
+    candidate = _result('nginx', { 10: (300.0, 20.0) })
+
+    assert compare(baseline, candidate, 'GET /')[0]['throughput'] == (100.0, 150.0, 0.5)
+    assert compare(baseline, candidate, 'GET /missing') == []
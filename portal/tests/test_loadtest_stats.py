@@ -0,0 +1,42 @@
+from loadtest.stats import LevelResult
+from loadtest.stats import percentile
+
+def test_percentile_nearest_rank():
+    values = [ float(i) for i in range(1, 101) ]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([], 99) == 0.0
+
+def test_level_summary():
+    result = LevelResult(10)
+    result.elapsed = 2.0
+
+    result.record('GET /', 0.010, True)
+    result.record('GET /', 0.030, True)
+    result.record('POST /create-ticket', 0.050, False)
+    result.record('POST /create-ticket', 0.020, True)
+
+    summary = result.summary()
+    assert summary['concurrency'] == 10
+    assert summary['requests'] == 4
+    assert summary['throughput'] == 2.0
+    assert summary['error_rate'] == 0.25
+    assert round(summary['max']) == 50
+
+    summary = result.summary('POST /create-ticket')
+    assert summary['requests'] == 2
+    assert summary['error_rate'] == 0.5
+
+def test_level_merge():
+    first = LevelResult(2)
+    first.record('GET /', 0.010, True)
+
+    second = LevelResult(2)
+    second.record('GET /', 0.020, False)
+
+    first.merge(second)
+    assert first.summary('GET /')['requests'] == 2
+    assert first.summary('GET /')['error_rate'] == 0.5
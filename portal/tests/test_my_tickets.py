@@ -0,0 +1,93 @@
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from app.model import db
+
+from app.ticket_queue import TicketQueue
+
+from datetime import datetime
+from datetime import timedelta
+
+def _status(client: FlaskClient):
+    return { ticket['id']: ticket for ticket in client.get('/my-tickets/status').json['tickets'] }
+
+def test_queue_positions_and_wait():
+    queue = TicketQueue(window=600, refresh_interval=3600)
+    queue._loaded = True
+    queue._next_refresh = float('inf')
+
+    now = datetime.now()
+    queue.add(1, now - timedelta(minutes=3))
+    queue.add(3, now - timedelta(minutes=1))
+    queue.add(2, now - timedelta(minutes=2))
+
+    assert [ queue.position(id) for id in (1, 2, 3, 4) ] == [ 1, 2, 3, None ]
+    assert queue.estimated_wait(1) is None
+
+    # Two tickets taken over the last 10 minutes, one ticket every 5 minutes
+    queue.remove(1)
+    queue.add(4, now)
+    queue.remove(4)
+
+    assert queue.position(2) == 1
+    assert queue.estimated_wait(2) == timedelta(minutes=10)
+
+def test_my_tickets_guest(client: FlaskClient, tutor_client: FlaskClient, app: Flask, submit_ticket):
+    submit_ticket(client, 'first')
+    submit_ticket(client, 'second')
+
+    # Other students' tickets are not shown, but do count for the position
+    submit_ticket(app.test_client(), 'other')
+
+    response = client.get('/my-tickets')
+    assert '200' in response.status
+    assert b'#1' in response.data
+    assert b'#3' not in response.data
+
+    status = _status(client)
+    assert status.keys() == { 1, 2 }
+    assert (status[1]['status'], status[1]['position']) == ('Open', 1)
+    assert (status[2]['status'], status[2]['position']) == ('Open', 2)
+
+    # Nobody was helped yet, so there is no estimate
+    assert status[1]['wait_minutes'] is None
+
+    tutor_client.post('/update-ticket', data={ 'ticketID': 1, 'action': 'Claim' })
+
+    status = _status(client)
+    assert (status[1]['status'], status[1]['position']) == ('Claimed', None)
+    assert status[2]['position'] == 1
+    assert status[2]['wait_minutes'] is not None
+
+def test_my_tickets_signed_in(auth_client: FlaskClient, app: Flask, submit_ticket):
+    submit_ticket(auth_client, 'first')
+
+    # Tickets from before the session are found by email
+    with auth_client.session_transaction() as session:
+        session.pop('my_tickets')
+
+    assert b'#1' in auth_client.get('/my-tickets').data
+    assert _status(auth_client)[1]['position'] == 1
+
+def test_my_tickets_status_from_memory(client: FlaskClient, app: Flask, submit_ticket):
+    app.config['QUEUE_REFRESH_INTERVAL'] = 3600
+    submit_ticket(client, 'first')
+
+    # Load the queue
+    client.get('/my-tickets/status')
+
+    statements = []
+
+    def _on_execute(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', _on_execute)
+    status = _status(client)
+    event.remove(engine, 'before_cursor_execute', _on_execute)
+
+    assert status[1]['position'] == 1
+    assert statements == []
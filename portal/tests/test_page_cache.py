@@ -0,0 +1,93 @@
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from app.model import db
+from app.model import Message
+
+from datetime import datetime
+from datetime import timedelta
+
+def test_anonymous_page_has_cache_headers(client: FlaskClient):
+    response = client.get('/')
+
+    assert '200' in response.status
+    assert response.headers.get('ETag')
+    assert response.headers.get('Last-Modified')
+    assert 'public' in response.headers.get('Cache-Control')
+    assert 'Cookie' in response.headers.get('Vary')
+
+    # The same page is served again
+    assert client.get('/').headers.get('ETag') == response.headers.get('ETag')
+
+def test_anonymous_page_not_modified(client: FlaskClient):
+    etag = client.get('/create-ticket').headers.get('ETag')
+
+    response = client.get('/create-ticket', headers={ 'If-None-Match': etag })
+
+    assert '304' in response.status
+    assert not response.data
+
+def test_cached_page_does_not_query(client: FlaskClient, app: Flask):
+    client.get('/')
+
+    statements = []
+
+    def _on_execute(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', _on_execute)
+    response = client.get('/')
+    event.remove(engine, 'before_cursor_execute', _on_execute)
+
+    assert '200' in response.status
+    assert not statements
+
+def test_authenticated_page_not_cached(auth_client: FlaskClient):
+    response = auth_client.get('/')
+
+    assert b'WELCOME TO THE UNO CSLC' in response.data
+    assert not response.headers.get('ETag')
+
+def test_page_changes_with_messages(client: FlaskClient, admin_client: FlaskClient):
+    etag = client.get('/').headers.get('ETag')
+
+    today = datetime.now().date()
+    admin_client.post('/admin/messages/add', data={
+        'message': 'Closed on Friday',
+        'startDate': (today - timedelta(days=1)).isoformat(),
+        'endDate': (today + timedelta(days=1)).isoformat()
+    })
+
+    response = client.get('/', headers={ 'If-None-Match': etag })
+
+    assert '200' in response.status
+    assert b'Closed on Friday' in response.data
+    assert response.headers.get('ETag') != etag
+
+def test_page_changes_with_catalog(client: FlaskClient, admin_client: FlaskClient):
+    client.get('/create-ticket')
+
+    admin_client.post('/admin/problems/add', data={ 'problemType': 'A brand new problem!' })
+
+    response = client.get('/create-ticket')
+    assert b'A brand new problem!' in response.data
+
+def test_flashed_message_not_cached(client: FlaskClient):
+    client.get('/')
+
+    # A failed submission flashes an error, which must show up instead of the cached page
+    client.post('/create-ticket', data={ 'email': '', 'fullname': 'John Smith' })
+    response = client.get('/create-ticket')
+
+    assert b'email must not be empty' in response.data
+    assert not response.headers.get('ETag')
+
+    # Once the flash is shown, the page is not cached while the session cookie is still around
+    response = client.get('/create-ticket')
+
+    assert b'email must not be empty' not in response.data
+    assert not response.headers.get('ETag')
@@ -12,6 +12,15 @@ def test_index_no_auth(client: FlaskClient):
     assert '200' in response.status
     assert b'Login' in response.data
 
+    # The page links to our login route, which starts the auth flow
+    assert b'href="/login"' in response.data
+
+def test_login_no_auth(client: FlaskClient):
+    response = client.get('/login')
+
+    # Expect redirect to authority login
+    assert '302' in response.status
+
     # Make sure the login URL is correct
     assert b'https://login.microsoftonline.com/common' in response.data
 
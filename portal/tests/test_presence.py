@@ -0,0 +1,96 @@
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app.model import db
+from app.model import Shift
+from app.model import User
+
+from app import presence
+
+from datetime import datetime
+from datetime import timedelta
+
+def _tutor(app: Flask):
+    with app.app_context():
+        user = User.query.filter_by(email='tutor@email.com').one()
+        return user.tutor_is_working, user.last_seen
+
+def _shifts(app: Flask):
+    with app.app_context():
+        return [ (shift.clock_in, shift.clock_out) for shift in Shift.query.order_by(Shift.id) ]
+
+def test_clock_in_and_out(tutor_client: FlaskClient, app: Flask):
+    response = tutor_client.post('/clock-in')
+    assert '302' in response.status
+
+    working, last_seen = _tutor(app)
+    assert working
+    assert last_seen is not None
+
+    assert b'Clock Out' in tutor_client.get('/view-tickets').data
+
+    # Clocking in twice does not start a second shift
+    tutor_client.post('/clock-in')
+    assert len(_shifts(app)) == 1
+
+    tutor_client.post('/clock-out')
+
+    assert not _tutor(app)[0]
+    (clock_in, clock_out), = _shifts(app)
+    assert clock_in <= clock_out
+
+    assert b'Clock In' in tutor_client.get('/view-tickets').data
+
+def test_heartbeats_are_flushed_in_batches(tutor_client: FlaskClient, app: Flask):
+    app.config['PRESENCE_FLUSH_INTERVAL'] = 3600
+
+    response = tutor_client.post('/heartbeat')
+    assert response.json == { 'working': False }
+
+    # Only kept in memory until the next flush
+    assert _tutor(app)[1] is None
+
+    with app.app_context():
+        presence.flush()
+
+    assert _tutor(app)[1] is not None
+
+def test_heartbeat_requires_tutor(auth_client: FlaskClient):
+    response = auth_client.post('/heartbeat')
+    assert '302' in response.status
+
+def test_absent_tutors_are_clocked_out(tutor_client: FlaskClient, app: Flask):
+    tutor_client.post('/clock-in')
+    last_seen = datetime.now() - timedelta(minutes=10)
+
+    with app.app_context():
+        user = User.query.filter_by(email='tutor@email.com').one()
+        user.last_seen = last_seen
+        db.session.commit()
+
+        assert presence.clock_out_absent_tutors() == [ user ]
+
+    assert _tutor(app) == (False, last_seen)
+
+    # The shift ends when the tutor was last seen, but never before it started
+    (clock_in, clock_out), = _shifts(app)
+    assert clock_out == clock_in
+
+    assert tutor_client.post('/heartbeat').json == { 'working': False }
+
+def test_heartbeats_keep_tutors_clocked_in(tutor_client: FlaskClient, app: Flask):
+    app.config['PRESENCE_FLUSH_INTERVAL'] = 3600
+    tutor_client.post('/clock-in')
+
+    with app.app_context():
+        user = User.query.filter_by(email='tutor@email.com').one()
+        user.last_seen = datetime.now() - timedelta(minutes=10)
+        db.session.commit()
+
+    # The sweep writes the heartbeats held by this worker before looking for absent tutors
+    tutor_client.post('/heartbeat')
+
+    with app.app_context():
+        assert presence.clock_out_absent_tutors() == []
+
+    assert _tutor(app)[0]
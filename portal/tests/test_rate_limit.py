@@ -0,0 +1,104 @@
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from app.model import db
+from app.model import RateLimit
+from app.model import Status
+from app.model import Ticket
+
+from app import rate_limit
+
+def _ticket_count(app: Flask):
+    with app.app_context():
+        return Ticket.query.count()
+
+def test_bucket_refills(app: Flask, monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(rate_limit.time, 'time', lambda: now)
+
+    with app.app_context():
+        assert [ rate_limit.take('test', 3, 30) for _ in range(4) ] == [ 0, 0, 0, 10 ]
+
+        # One token is back every 10 seconds
+        now += 10
+        assert [ rate_limit.take('test', 3, 30) for _ in range(2) ] == [ 0, 10 ]
+
+        now += 60
+        rate_limit.forget_full_buckets()
+        assert RateLimit.query.count() == 0
+
+def test_empty_bucket_costs_one_statement(app: Flask):
+    statements = []
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        rate_limit.take('test', 1, 60)
+
+        event.listen(db.engine, 'before_cursor_execute', _on_execute)
+        retry_after = rate_limit.take('test', 1, 60)
+        event.remove(db.engine, 'before_cursor_execute', _on_execute)
+
+        assert retry_after == 60
+        assert len(statements) == 1
+        assert statements[0].startswith('INSERT INTO "RateLimits"')
+
+def test_limited_by_email(client: FlaskClient, app: Flask, submit_ticket):
+    app.config['RATE_LIMIT_PER_STUDENT'] = (2, 60)
+    app.config['MAX_OPEN_TICKETS'] = 0
+
+    submit_ticket(client)
+    submit_ticket(app.test_client(), email='Student@Email.com')
+
+    # A new session does not get around the limit of the email
+    response = submit_ticket(app.test_client())
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
+    assert _ticket_count(app) == 2
+
+    assert '302' in submit_ticket(app.test_client(), email='other@email.com').status
+
+def test_limited_by_ip_before_any_orm_work(client: FlaskClient, app: Flask, submit_ticket):
+    app.config['RATE_LIMIT_PER_IP'] = (1, 60)
+
+    submit_ticket(client, environ={ 'REMOTE_ADDR': '10.0.0.1' })
+
+    statements = []
+
+    def _on_execute(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', _on_execute)
+    response = submit_ticket(app.test_client(), email='other@email.com', environ={ 'REMOTE_ADDR': '10.0.0.1' })
+    event.remove(engine, 'before_cursor_execute', _on_execute)
+
+    assert response.status_code == 429
+    assert not any('Tickets' in statement for statement in statements)
+
+    assert '302' in submit_ticket(app.test_client(), email='other@email.com', environ={ 'REMOTE_ADDR': '10.0.0.2' }).status
+    assert _ticket_count(app) == 2
+
+def test_open_ticket_cap(client: FlaskClient, app: Flask, submit_ticket):
+    app.config['MAX_OPEN_TICKETS'] = 2
+
+    submit_ticket(client)
+    submit_ticket(client)
+    submit_ticket(client)
+
+    assert _ticket_count(app) == 2
+
+    with client.session_transaction() as session:
+        assert session['_flashes'][-1] == ('error', 'Could not submit ticket, you already have 2 tickets waiting for help!')
+
+    # Closed tickets do not count
+    with app.app_context():
+        Ticket.query.get(1).status = Status.Closed
+        db.session.commit()
+
+    submit_ticket(client)
+    assert _ticket_count(app) == 3
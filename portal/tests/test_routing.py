@@ -0,0 +1,180 @@
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import create_engine
+from sqlalchemy import inspect
+from sqlalchemy import text
+
+from app.model import db
+from app.model import CanTutor
+from app.model import Course
+from app.model import Permission
+from app.model import User
+
+from app import routing
+from app.cache import bump_version
+from app.routing import RoutingIndex
+from app.schema import rebuild_tables
+
+from types import MappingProxyType
+
+def _add_courses(app: Flask, *numbers: str):
+    with app.app_context():
+        courses = [ Course('CSCI', number, f'Course {number}', True) for number in numbers ]
+        db.session.add_all(courses)
+        db.session.commit()
+        return [ course.id for course in courses ]
+
+def _create_tutor(create_super_user):
+    # NOTE: The tutor needs its own oid to sign in next to the admin, pending tutors are not routed to
+    return create_super_user(email='tutor@email.com', oid='tutor-oid', permission=Permission.Tutor)
+
+def _set_working(app: Flask, email: str, working: bool):
+    with app.app_context():
+        user = User.query.filter_by(email=email).one()
+        user.tutor_is_working = working
+        db.session.commit()
+        routing.tutor_changed(user)
+        return user.id
+
+def test_with_tutor_updates_courses_incrementally():
+    empty = RoutingIndex(MappingProxyType({}), frozenset(), MappingProxyType({}))
+
+    index = empty.with_tutor(1, frozenset({ 10, 11 }), True).with_tutor(2, frozenset({ 11 }), True).with_tutor(3, frozenset({ 10 }), False)
+    assert index.tutors_by_course == { 10: { 1 }, 11: { 1, 2 } }
+    assert index.courses_by_tutor[3] == { 10 }
+
+    # Moving a tutor to other courses only touches those courses
+    moved = index.with_tutor(1, frozenset({ 12 }), True)
+    assert moved.tutors_by_course == { 11: { 2 }, 12: { 1 } }
+    assert index.tutors_by_course == { 10: { 1 }, 11: { 1, 2 } }
+
+    # A tutor without courses is removed
+    removed = moved.with_tutor(2, frozenset(), True)
+    assert 2 not in removed.courses_by_tutor
+    assert 2 not in removed.working
+    assert removed.tutors_by_course == { 12: { 1 } }
+
+def test_admin_edit_tutor_courses(admin_client: FlaskClient, create_super_user, app: Flask):
+    _create_tutor(create_super_user)
+    java, data_structures = _add_courses(app, '1620', '2620')
+
+    with app.app_context():
+        tutor_id = User.query.filter_by(email='tutor@email.com').one().id
+        assert routing.count_available(java) == 0
+
+    response = admin_client.post('/admin/tutors/courses', data={ 'userID': tutor_id, 'courses': [ java, data_structures ] })
+    assert '302' in response.status
+
+    with admin_client.session_transaction() as session:
+        assert session['_flashes'] == [ ('success', 'Courses successfully updated!') ]
+
+    with app.app_context():
+        assert db.session.query(CanTutor).filter_by(tutor_id=tutor_id).count() == 2
+        assert routing.tutor_courses(tutor_id) == { java, data_structures }
+
+        # The tutor is not working yet
+        assert routing.count_available(java) == 0
+
+    _set_working(app, 'tutor@email.com', True)
+
+    with app.app_context():
+        assert routing.count_available(java) == 1
+        assert routing.available_tutors(data_structures) == { tutor_id }
+
+    admin_client.post('/admin/tutors/courses', data={ 'userID': tutor_id, 'courses': [ data_structures ] })
+
+    with app.app_context():
+        assert routing.count_available(java) == 0
+        assert routing.count_available(data_structures) == 1
+
+    # Inactive tutors are not routed to
+    admin_client.post('/admin/tutors/edit', data={ 'userID': tutor_id })
+
+    with app.app_context():
+        assert routing.count_available(data_structures) == 0
+        assert routing.tutor_courses(tutor_id) == frozenset()
+
+def test_admin_edit_tutor_courses_invalid(admin_client: FlaskClient, create_super_user, app: Flask):
+    _create_tutor(create_super_user)
+
+    with app.app_context():
+        tutor_id = User.query.filter_by(email='tutor@email.com').one().id
+
+    admin_client.post('/admin/tutors/courses', data={ 'userID': tutor_id, 'courses': [ 42 ] })
+
+    with admin_client.session_transaction() as session:
+        assert session['_flashes'] == [ ('error', 'Could not update courses, course does not exist!') ]
+
+def test_routing_index_reloads_after_version_bump(create_super_user, app: Flask):
+    _create_tutor(create_super_user)
+    java, = _add_courses(app, '1620')
+
+    with app.app_context():
+        assert routing.count_available(java) == 0
+
+        # Change made by another worker, this worker only sees the version bump
+        user = User.query.filter_by(email='tutor@email.com').one()
+        user.tutor_is_working = True
+        db.session.add(CanTutor(user.id, java))
+        db.session.commit()
+
+        bump_version(routing.ROUTING_VERSION)
+
+        assert routing.count_available(java) == 1
+
+def test_view_tickets_only_qualified(admin_client: FlaskClient, create_super_user, app: Flask, add_ticket):
+    tutor_client = _create_tutor(create_super_user)
+    java, data_structures = _add_courses(app, '1620', '2620')
+    add_ticket(course_id=java)
+    add_ticket(course_id=data_structures)
+    add_ticket(course_id=None)
+
+    with app.app_context():
+        tutor_id = User.query.filter_by(email='tutor@email.com').one().id
+
+    # Tutors without courses see every ticket
+    response = tutor_client.get('/view-tickets')
+    assert response.data.count(b'name="ticketID"') == 3
+
+    admin_client.post('/admin/tutors/courses', data={ 'userID': tutor_id, 'courses': [ java ] })
+
+    response = tutor_client.get('/view-tickets')
+    assert response.data.count(b'name="ticketID"') == 2
+    assert b'show all' in response.data
+
+    response = tutor_client.get('/view-tickets?all=1')
+    assert response.data.count(b'name="ticketID"') == 3
+
+def test_index_shows_available_tutors(admin_client: FlaskClient, create_super_user, app: Flask):
+    _create_tutor(create_super_user)
+    java, = _add_courses(app, '1620')
+
+    with app.app_context():
+        tutor_id = User.query.filter_by(email='tutor@email.com').one().id
+
+    admin_client.post('/admin/tutors/courses', data={ 'userID': tutor_id, 'courses': [ java ] })
+    _set_working(app, 'tutor@email.com', True)
+
+    response = app.test_client().get('/')
+    assert b'<td>CSCI 1620</td>\n            <td>1</td>' in response.data
+
+def test_rebuild_can_tutor_primary_key():
+    engine = create_engine('sqlite://')
+
+    # The table as created before it had a composite primary key
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE "CanTutor" (tutor INTEGER NOT NULL, courses INTEGER, PRIMARY KEY (tutor))'))
+        conn.execute(text('INSERT INTO "CanTutor" (tutor, courses) VALUES (1, 10), (2, NULL)'))
+
+    db.metadata.create_all(engine)
+    rebuild_tables(engine, db.metadata)
+
+    inspector = inspect(engine)
+    assert inspector.get_pk_constraint('CanTutor')['constrained_columns'] == [ 'tutor_id', 'course_id' ]
+    assert not inspector.has_table('CanTutor_old')
+
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT tutor_id, course_id FROM "CanTutor"')).all() == [ (1, 10) ]
+
+    # Nothing left to rebuild
+    rebuild_tables(engine, db.metadata)
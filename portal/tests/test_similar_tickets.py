@@ -0,0 +1,105 @@
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app.model import db
+from app.model import Course
+
+from app.similar_tickets import SimilarityIndex
+
+from datetime import datetime
+from datetime import timedelta
+
+def _index(window: float = 600):
+    index = SimilarityIndex(window=window, refresh_interval=3600, max_tickets=100)
+    index._loaded = True
+    index._next_refresh = float('inf')
+    return index
+
+def test_index_ranks_tickets_of_the_course():
+    index = _index()
+    now = datetime.now()
+
+    index.add(1, 1, 'Lab 3 my linked list loses nodes on insert', now)
+    index.add(2, 1, 'Lab 3 recursive factorial overflows', now)
+    index.add(3, 1, 'Lab 3 inserting into a linked list', now)
+    index.add(4, 2, 'Lab 3 my linked list loses nodes on insert', now)
+
+    matches = index.similar(1, 'Lab 3 linked list loses nodes', 5, 0.3)
+    assert [ ticket_id for ticket_id, _ in matches ] == [ 1, 3 ]
+    assert all(0 < similarity <= 1 for _, similarity in matches)
+
+    # Identical questions, and nothing for unrelated ones
+    assert index.similar(2, 'Lab 3 my linked list loses nodes on insert', 5, 0.99)[0][0] == 4
+    assert index.similar(1, 'Segmentation fault', 5, 0.1) == []
+
+    assert index.similar(1, 'linked list', 5, 0.1, among={ 3 }) == index.similar(1, 'linked list', 5, 0.1, exclude=1)
+
+def test_index_finds_questions_common_in_the_course():
+    index = _index()
+    now = datetime.now()
+    question = 'Lab 3 my linked list loses nodes on insert'
+
+    # During a crunch, every word of the question is used by many of the course's tickets
+    for ticket_id in range(1, 201):
+        index.add(ticket_id, 1, question if ticket_id % 7 == 0 else f'Homework {ticket_id} topic{ticket_id} error{ticket_id}', now)
+
+    matches = index.similar(1, question, 5, 0.5)
+    assert len(matches) == 5
+    assert all(ticket_id % 7 == 0 and similarity > 0.99 for ticket_id, similarity in matches)
+
+def test_index_tells_assignments_apart():
+    index = _index()
+    now = datetime.now()
+
+    index.add(1, 1, 'Lab 4 loop', now)
+    index.add(2, 1, 'Lab 3 loop', now)
+
+    (first, same), (second, other) = index.similar(1, 'Lab 3 loop', 5, 0.0)
+    assert (first, second) == (2, 1)
+    assert same > 0.99 > other
+
+def test_index_forgets_old_tickets(app: Flask):
+    index = _index(window=600)
+    index.add(1, 1, 'linked list', datetime.now() - timedelta(minutes=20))
+    index.add(2, 1, 'linked list', datetime.now())
+
+    with app.app_context():
+        index._next_refresh = 0.0
+        assert [ ticket_id for ticket_id, _ in index.similar(1, 'linked list', 5, 0.1) ] == [ 2 ]
+
+def test_similar_questions_api(client: FlaskClient, app: Flask, submit_ticket):
+    with app.app_context():
+        db.session.add(Course('CSCI', '1620', 'Java', True))
+        db.session.commit()
+
+    def _search(assignment: str, question: str, course: str = 'CSCI 1620'):
+        return client.get('/api/similar-tickets', query_string={ 'course': course, 'assignment': assignment, 'question': question }).json
+
+    submit_ticket(client, 'Linked lists', 'My linked list loses nodes when I insert at the head.', course='CSCI 1620')
+    submit_ticket(client, 'Recursion', 'How do I write a recursive factorial?', course='CSCI 1620')
+
+    assert _search('Linked lists', 'linked list insert loses nodes') == { 'tickets': [
+        { 'id': 1, 'assignment': 'Linked lists', 'question': 'My linked list loses nodes when I insert at the head.', 'status': 'Open' } ] }
+
+    # Indexed tickets are found without reading them again, long questions are cut short
+    submit_ticket(client, 'Recursion', 'Recursive factorial of a negative number? ' + 'Recursive factorial again. ' * 6, course='CSCI 1620')
+
+    tickets = _search('Recursion', 'recursive factorial')['tickets']
+    assert [ ticket['id'] for ticket in tickets ] == [ 2, 3 ]
+    assert tickets[1]['question'].startswith('Recursive factorial of a negative number? Recursive factorial again.')
+    assert tickets[1]['question'].endswith('...') and len(tickets[1]['question']) <= 123
+
+    # Only for courses in the catalog
+    assert _search('Recursion', 'recursive factorial', 'CSCI 9999') == { 'tickets': [] }
+    assert client.get('/api/similar-tickets', query_string={ 'assignment': 'Recursion', 'question': 'recursive factorial' }).json == { 'tickets': [] }
+    assert client.get('/api/similar-tickets').json == { 'tickets': [] }
+
+def test_board_lists_similar_tickets(tutor_client: FlaskClient, submit_ticket):
+    submit_ticket(tutor_client, 'Linked lists', 'My linked list loses nodes when I insert at the head.')
+    submit_ticket(tutor_client, 'Recursion', 'How do I write a recursive factorial?')
+    submit_ticket(tutor_client, 'Linked lists', 'Inserting at the head of my linked list loses nodes.')
+
+    response = tutor_client.get('/view-tickets')
+    assert response.data.count(b'Similar to:') == 2
+    assert b'Similar to: #3' in response.data
+    assert b'Similar to: #1' in response.data
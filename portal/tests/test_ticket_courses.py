@@ -0,0 +1,227 @@
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import create_engine
+from sqlalchemy import event
+from sqlalchemy import inspect
+from sqlalchemy import text
+
+from app.model import db
+from app.model import Course
+from app.model import Mode
+from app.model import Section
+from app.model import SectionMode
+from app.model import Season
+from app.model import Semester
+from app.model import Ticket
+
+from app.schema import upgrade_schema
+
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+
+def _add_course(app: Flask, department: str, number: str, section_number: int, start: date, end: date):
+    """Adds a course with one section in a semester between 'start' and 'end', returns (course id, section id)."""
+    with app.app_context():
+        semester = Semester(start.year, Season.Fall, start, end)
+        course = Course(department, number, f'{department} {number} course', True)
+        db.session.add_all([ semester, course ])
+        db.session.flush()
+
+        section = Section(section_number, 'Mon', None, None, SectionMode.InPerson, course.id, semester.id, None)
+        db.session.add(section)
+        db.session.commit()
+
+        return course.id, section.id
+
+def test_create_ticket_links_course(auth_client: FlaskClient, app: Flask):
+    today = date.today()
+    course_id, section_id = _add_course(app, 'CSCI', '1620', 1, today - timedelta(days=30), today + timedelta(days=30))
+
+    auth_client.post('/create-ticket', data={
+        'course': 'CSCI 1620',
+        'section': '001',
+        'assignment': 'Assignment 1',
+        'question': 'Question?',
+        'mode': Mode.Online.value
+    })
+
+    auth_client.post('/create-ticket', data={
+        'course': 'Course 1',
+        'section': 'Section 1',
+        'assignment': 'Assignment 1',
+        'question': 'Question?',
+        'mode': Mode.Online.value
+    })
+
+    # Courses that are not on display are turned away
+    with auth_client.session_transaction() as session:
+        assert session['_flashes'][-1] == ('error', 'Could not submit ticket, course is not valid!')
+
+    with app.app_context():
+        linked, = Ticket.query.order_by(Ticket.id).all()
+
+        assert (linked.course_id, linked.section_id) == (course_id, section_id)
+
+def test_create_ticket_validates_section(auth_client: FlaskClient, app: Flask):
+    today = date.today()
+    _add_course(app, 'CSCI', '1620', 1, today - timedelta(days=30), today + timedelta(days=30))
+    _, section_id = _add_course(app, 'CSCI', '1840', 2, today - timedelta(days=30), today + timedelta(days=30))
+
+    with app.app_context():
+        db.session.add(Course('CSCI', '4000', 'No sections this semester', True))
+        db.session.commit()
+
+    # The form suggests the same courses and sections
+    assert [ course['value'] for course in auth_client.get('/api/catalog/search?q=csci').json['courses'] ] == [ 'CSCI 1620', 'CSCI 1840', 'CSCI 4000' ]
+    assert auth_client.get('/api/catalog/search?course=CSCI 1840').json['sections'] == [ { 'id': section_id, 'value': '002', 'label': '2 - InPerson' } ]
+
+    def _submit(course: str, section: str):
+        auth_client.post('/create-ticket', data={
+            'course': course, 'section': section, 'assignment': 'Assignment 1', 'question': 'Question?', 'mode': Mode.Online.value
+        })
+
+        with auth_client.session_transaction() as session:
+            return session['_flashes'][-1]
+
+    # Section 2 is a section of CSCI 1840, not of CSCI 1620
+    assert _submit('CSCI 1620', '2') == ('error', 'Could not submit ticket, section is not valid!')
+    assert _submit('CSCI 1620', '') == ('error', 'Could not submit ticket, section is not valid!')
+    assert _submit('CSCI 1840', '002') == ('success', 'Ticket created successfully!')
+
+    # Any section goes for courses without sections in the current semester
+    assert _submit('CSCI 4000', '') == ('success', 'Ticket created successfully!')
+
+    with app.app_context():
+        assert [ ticket.section_id for ticket in Ticket.query.order_by(Ticket.id) ] == [ section_id, None ]
+
+def test_create_ticket_does_not_query_catalog(auth_client: FlaskClient, app: Flask):
+    today = date.today()
+    _add_course(app, 'CSCI', '1620', 1, today - timedelta(days=30), today + timedelta(days=30))
+    statements = []
+
+    def _on_execute(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    def _submit(problem: str):
+        auth_client.post('/create-ticket', data={
+            'course': 'CSCI 1620', 'section': '001', 'assignment': 'Assignment 1', 'question': 'Question?', 'problem': problem, 'mode': Mode.Online.value
+        })
+
+        with auth_client.session_transaction() as session:
+            return session['_flashes'][-1]
+
+    # Loads the catalog
+    auth_client.get('/create-ticket')
+
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', _on_execute)
+    assert _submit('2') == ('success', 'Ticket created successfully!')
+    assert _submit('3') == ('error', 'Could not submit ticket, problem type is not valid!')
+    event.remove(engine, 'before_cursor_execute', _on_execute)
+
+    assert not [ statement for statement in statements if any(table in statement for table in ('ProblemTypes', 'Courses', 'Sections')) ]
+
+    with app.app_context():
+        assert [ ticket.problem_type for ticket in Ticket.query ] == [ 2 ]
+
+def test_backfill_ticket_courses(app: Flask, add_ticket):
+    course_id, old_section_id = _add_course(app, 'CSCI', '1620', 1, date(2022, 8, 22), date(2022, 12, 16))
+
+    with app.app_context():
+        semester = Semester(2023, Season.Spring, date(2023, 1, 9), date(2023, 5, 12))
+        db.session.add(semester)
+        db.session.flush()
+
+        new_section = Section(1, 'Tue', None, None, SectionMode.Remote, course_id, semester.id, None)
+        db.session.add(new_section)
+        db.session.commit()
+        new_section_id = new_section.id
+
+    old = add_ticket(course='CSCI 1620', section='001', created=datetime(2022, 10, 1))
+    new = add_ticket(course='csci-1620: Java I', section='Section 1', created=datetime(2023, 2, 1))
+    no_section = add_ticket(course='CSCI 1620', section=None, created=datetime(2023, 2, 1))
+    unknown = add_ticket(course='Course 1', section='Section 1')
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=[ 'backfill-ticket-courses', '--batch-size', '2', '--pause', '0' ])
+
+    assert result.exit_code == 0
+    assert 'linked 3 of 4 tickets' in result.output
+
+    with app.app_context():
+        def _ids(id):
+            ticket = db.session.get(Ticket, id)
+            return ticket.course_id, ticket.section_id
+
+        # The section is picked by the semester the ticket was made in
+        assert _ids(old) == (course_id, old_section_id)
+        assert _ids(new) == (course_id, new_section_id)
+        assert _ids(no_section) == (course_id, None)
+        assert _ids(unknown) == (None, None)
+
+    # Running it again only looks at the tickets it could not link
+    result = runner.invoke(args=[ 'backfill-ticket-courses', '--pause', '0' ])
+    assert 'linked 0 of 1 tickets' in result.output
+
+def test_report_filters_by_course_and_semester(admin_client: FlaskClient, app: Flask, add_ticket):
+    today = date.today()
+    java_id, _ = _add_course(app, 'CSCI', '1620', 1, today - timedelta(days=30), today + timedelta(days=30))
+    _add_course(app, 'CSCI', '1840', 2, today - timedelta(days=30), today + timedelta(days=30))
+
+    for course, section in (('CSCI 1620', '1'), ('CSCI 1840', '2')):
+        admin_client.post('/create-ticket', data={ 'course': course, 'section': section, 'assignment': f'{course} homework', 'question': 'Question?' })
+
+    # A ticket from before courses were checked
+    ticket_id = add_ticket(course='Course 1', section='1')
+
+    with app.app_context():
+        db.session.get(Ticket, ticket_id).assignment_name = 'Course 1 homework'
+        db.session.commit()
+
+    with app.app_context():
+        semester_id = Semester.query.order_by(Semester.id).first().id
+
+    response = admin_client.post('/admin/reports/download', data={ 'creationDate': '2000-01-01', 'course': str(java_id) })
+
+    assert b'CSCI 1620 homework' in response.data
+    assert b'CSCI 1840 homework' not in response.data
+    assert b'Course 1 homework' not in response.data
+
+    response = admin_client.post('/admin/reports/download', data={ 'creationDate': '2000-01-01', 'semester': str(semester_id) })
+
+    assert b'CSCI 1620 homework' in response.data
+    assert b'CSCI 1840 homework' not in response.data
+
+    response = admin_client.post('/admin/reports/download', data={ 'creationDate': '2000-01-01' })
+
+    assert b'CSCI 1840 homework' in response.data
+    assert b'Course 1 homework' in response.data
+
+def test_upgrade_schema_adds_columns():
+    engine = create_engine('sqlite://')
+
+    # A Tickets table from before course_id and section_id were added
+    db.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(text('DROP TABLE "Tickets"'))
+        conn.execute(text('CREATE TABLE "Tickets" (id INTEGER PRIMARY KEY, student_email VARCHAR(120) NOT NULL, time_created DATETIME NOT NULL, course VARCHAR(120))'))
+        conn.execute(text('INSERT INTO "Tickets" (student_email, time_created, course) VALUES (\'student@email.com\', \'2023-01-01\', \'CSCI 1620\')'))
+
+    upgrade_schema(engine, db.metadata)
+
+    # Running it again is harmless
+    upgrade_schema(engine, db.metadata)
+
+    inspector = inspect(engine)
+    columns = { column['name'] for column in inspector.get_columns('Tickets') }
+    indexes = { index['name'] for index in inspector.get_indexes('Tickets') }
+
+    assert { 'course_id', 'section_id', 'status', 'tutor_id' } <= columns
+    assert { 'ix_Tickets_course_id', 'ix_Tickets_section_id' } <= indexes
+
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT course, course_id FROM "Tickets"')).one() == ('CSCI 1620', None)
@@ -0,0 +1,65 @@
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app.model import db
+from app.model import Status
+from app.model import Ticket
+
+from datetime import datetime
+from datetime import timedelta
+
+def _durations(app: Flask, id: int):
+    with app.app_context():
+        ticket = db.session.get(Ticket, id)
+        return ticket.wait_seconds, ticket.service_seconds
+
+def test_claim_and_close_store_durations(tutor_client: FlaskClient, app: Flask, add_ticket):
+    id = add_ticket(created=datetime.now() - timedelta(minutes=5))
+
+    tutor_client.post('/update-ticket', data={ 'ticketID': id, 'action': 'Claim' })
+    wait, service = _durations(app, id)
+
+    assert 299 <= wait <= 302
+    assert service is None
+
+    tutor_client.post('/update-ticket', data={ 'ticketID': id, 'action': 'Close' })
+    assert _durations(app, id) == (wait, 0)
+
+    # Reopening discards the service duration until it is closed again
+    tutor_client.post('/update-ticket', data={ 'ticketID': id, 'action': 'Open' })
+    assert _durations(app, id) == (wait, None)
+
+def test_backfill_ticket_durations(app: Flask, add_ticket):
+    created = datetime(2023, 2, 1, 10, 0, 0)
+
+    open_ticket = add_ticket(created=created)
+    claimed = add_ticket(created=created, time_claimed=created + timedelta(seconds=90), status=Status.Claimed)
+    closed = add_ticket(created=created, time_claimed=created + timedelta(seconds=90), time_closed=created + timedelta(minutes=11, seconds=30), status=Status.Closed)
+
+    result = app.test_cli_runner().invoke(args=[ 'backfill-ticket-durations', '--batch-size', '2', '--pause', '0' ])
+
+    assert result.exit_code == 0
+    # The claimed ticket's wait, and the closed ticket's wait and service duration
+    assert 'filled in 3 durations' in result.output
+
+    assert _durations(app, open_ticket) == (None, None)
+    assert _durations(app, claimed) == (90, None)
+    assert _durations(app, closed) == (90, 600)
+
+    # Nothing left to do the second time
+    result = app.test_cli_runner().invoke(args=[ 'backfill-ticket-durations', '--pause', '0' ])
+    assert 'filled in 0 durations' in result.output
+
+    # Durations can be queried in the database
+    with app.app_context():
+        assert Ticket.query.filter(Ticket.wait_seconds >= 60).count() == 2
+
+def test_report_session_duration(admin_client: FlaskClient, app: Flask, add_ticket):
+    created = datetime(2023, 2, 1, 10, 0, 0)
+    add_ticket(created=created, time_claimed=created + timedelta(seconds=90), time_closed=created + timedelta(minutes=11, seconds=30), status=Status.Closed)
+    app.test_cli_runner().invoke(args=[ 'backfill-ticket-durations', '--pause', '0' ])
+
+    response = admin_client.post('/admin/reports/download', data={ 'creationDate': '2000-01-01' })
+    header, row = response.data.decode().splitlines()
+
+    assert header.split(',').index('Session Duration') == row.split(',').index('0:10:00')
@@ -0,0 +1,86 @@
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app.model import db
+from app.model import Status
+from app.model import Ticket
+from app.model import TicketGroup
+
+from datetime import datetime
+from datetime import timedelta
+
+def _tickets(app: Flask):
+    with app.app_context():
+        return { ticket.id: (ticket.status, ticket.group_id) for ticket in Ticket.query }
+
+def test_board_offers_group_claims(tutor_client: FlaskClient, app: Flask, add_ticket):
+    add_ticket('Lab 3')
+    add_ticket('lab  3 ')
+    add_ticket('Lab 3', course='CSCI 1840')
+    add_ticket('Lab 4')
+
+    response = tutor_client.get('/view-tickets')
+    assert response.data.count(b'Claim all 2 as a group') == 2
+
+def test_claim_and_close_group(tutor_client: FlaskClient, app: Flask, add_ticket):
+    first = add_ticket('Lab 3', created=datetime.now() - timedelta(minutes=5))
+    second = add_ticket('Lab 3', created=datetime.now() - timedelta(minutes=2))
+    other = add_ticket('Lab 4')
+
+    response = tutor_client.post('/claim-group', data={ 'ticketID': [ first, second, other ] })
+    assert '302' in response.status
+
+    # Tickets about another assignment are left alone
+    assert _tickets(app) == { first: (Status.Claimed, 1), second: (Status.Claimed, 1), other: (Status.Open, None) }
+
+    with app.app_context():
+        waits = [ db.session.get(Ticket, id).wait_seconds for id in (first, second) ]
+        assert 299 <= waits[0] <= 302
+        assert 119 <= waits[1] <= 122
+
+    assert b'Group session #1' in tutor_client.get('/view-tickets').data
+
+    tutor_client.post('/close-group', data={ 'groupID': 1 })
+
+    assert _tickets(app) == { first: (Status.Closed, 1), second: (Status.Closed, 1), other: (Status.Open, None) }
+
+    with app.app_context():
+        group = db.session.get(TicketGroup, 1)
+        assert group.time_closed is not None
+        assert [ ticket.service_seconds for ticket in group.tickets ] == [ 0, 0 ]
+
+def test_group_claim_skips_claimed_tickets(tutor_client: FlaskClient, app: Flask, add_ticket):
+    first = add_ticket('Lab 3')
+    second = add_ticket('Lab 3')
+
+    tutor_client.post('/update-ticket', data={ 'ticketID': first, 'action': 'Claim' })
+    tutor_client.post('/claim-group', data={ 'ticketID': [ first, second ] })
+
+    assert _tickets(app) == { first: (Status.Claimed, None), second: (Status.Claimed, 1) }
+
+    tutor_client.post('/claim-group', data={ 'ticketID': [ first, second ] })
+
+    with tutor_client.session_transaction() as session:
+        assert session['_flashes'][-1] == ('error', 'Could not claim tickets, they were already claimed.')
+
+    # Reopening a ticket takes it out of its group
+    tutor_client.post('/update-ticket', data={ 'ticketID': second, 'action': 'Close' })
+    tutor_client.post('/update-ticket', data={ 'ticketID': second, 'action': 'Open' })
+    assert _tickets(app)[second] == (Status.Open, None)
+
+def test_report_credits_each_ticket(admin_client: FlaskClient, app: Flask, add_ticket):
+    first = add_ticket('Lab 3')
+    second = add_ticket('Lab 3')
+
+    admin_client.post('/claim-group', data={ 'ticketID': [ first, second ] })
+    admin_client.post('/close-group', data={ 'groupID': 1 })
+
+    response = admin_client.post('/admin/reports/download', data={ 'creationDate': '2000-01-01' })
+    header, *rows = response.data.decode().splitlines()
+
+    assert len(rows) == 2
+    assert all(row.split(',')[header.split(',').index('Group Session')] == '1' for row in rows)
+
+def test_group_requires_tutor(auth_client: FlaskClient):
+    assert '302' in auth_client.post('/claim-group', data={ 'ticketID': 1 }).status
+    assert '302' in auth_client.post('/close-group', data={ 'groupID': 1 }).status
@@ -0,0 +1,110 @@
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app.model import Status
+from app.model import Ticket
+
+from app import ticket_journal
+
+import fcntl
+import json
+import os
+import pytest
+
+@pytest.fixture()
+def journal_dir(app: Flask, tmp_path):
+    app.config['TICKET_JOURNAL_ENABLED'] = True
+    app.config['TICKET_JOURNAL_DIR'] = str(tmp_path)
+    return tmp_path
+
+def _tickets(app: Flask):
+    with app.app_context():
+        return [ (ticket.assignment_name, ticket.status) for ticket in Ticket.query.order_by(Ticket.id) ]
+
+def _flush(app: Flask):
+    with app.app_context():
+        ticket_journal.flush()
+
+def test_journaled_tickets_are_inserted_by_flush(client: FlaskClient, app: Flask, journal_dir, submit_ticket):
+    response = submit_ticket(client, 'first')
+    assert '302' in response.status
+    assert b'href="/"' in response.data
+
+    submit_ticket(client, 'second')
+
+    # Written to the journal, not the database
+    assert _tickets(app) == []
+    assert [ name.split('.')[1] for name in sorted(os.listdir(journal_dir)) ] == [ 'jsonl', 'lock' ]
+
+    _flush(app)
+
+    assert _tickets(app) == [ ('first', Status.Open), ('second', Status.Open) ]
+    assert [ name.split('.')[1] for name in os.listdir(journal_dir) ] == [ 'lock' ]
+
+    # The session finds its tickets once they were inserted
+    assert [ ticket['id'] for ticket in client.get('/my-tickets/status').json['tickets'] ] == [ 1, 2 ]
+
+def test_resubmitted_ticket_is_inserted_once(client: FlaskClient, app: Flask, journal_dir, submit_ticket):
+    submit_ticket(client, 'first', submission_key='key')
+    submit_ticket(client, 'first', submission_key='key')
+    _flush(app)
+
+    submit_ticket(client, 'first', submission_key='key')
+    _flush(app)
+
+    assert _tickets(app) == [ ('first', Status.Open) ]
+
+def test_journal_of_stopped_worker_is_recovered(client: FlaskClient, app: Flask, journal_dir, submit_ticket):
+    submit_ticket(client, 'first')
+
+    journal = next(name for name in os.listdir(journal_dir) if name.endswith('.jsonl'))
+
+    with open(journal_dir / journal, encoding='utf-8') as file:
+        entry = json.loads(file.read())
+
+    def _write(name: str, assignment: str, extra: str = ''):
+        with open(journal_dir / name, 'w', encoding='utf-8') as file:
+            file.write(json.dumps({ **entry, 'assignment_name': assignment, 'submission_key': assignment }) + '\n' + extra)
+
+    # Process ids are reused, e.g. by a restarted container, so they do not tell whether the journal was left behind
+    _write(f'journal-{os.getpid()}.jsonl', 'same pid')
+    _write('journal-1.jsonl', 'pid 1')
+    _write('journal-999999999-0123456789ab-1-0.batch', 'stopped', '{"student_email": "cut short')
+    (journal_dir / 'journal-999999999-0123456789ab.lock').touch()
+
+    # A worker that is still running holds the lock of its journal
+    _write('journal-1-ba9876543210.jsonl', 'running')
+
+    with open(journal_dir / 'journal-1-ba9876543210.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        _flush(app)
+
+    assert sorted(_tickets(app)) == [ ('first', Status.Open), ('pid 1', Status.Open), ('same pid', Status.Open), ('stopped', Status.Open) ]
+    assert sorted(name.split('.')[1] for name in os.listdir(journal_dir)) == [ 'jsonl', 'lock', 'lock' ]
+
+    # Until the worker stops
+    app.extensions['ticket_journal']._next_recovery = 0.0
+    _flush(app)
+
+    assert ('running', Status.Open) in _tickets(app)
+
+def test_invalid_ticket_is_not_journaled(client: FlaskClient, app: Flask, journal_dir, submit_ticket):
+    submit_ticket(client, '')
+
+    with client.session_transaction() as session:
+        assert session['_flashes'][-1] == ('error', 'Could not submit ticket, assignment name must not be empty!')
+
+    assert os.listdir(journal_dir) == []
+
+def test_journals_are_recovered_when_disabled(app: Flask, tmp_path):
+    app.config['TICKET_JOURNAL_DIR'] = str(tmp_path)
+
+    ticket_journal.init_app(app)
+    assert 'ticket_journal' not in app.extensions.get('leader_tasks', {})
+
+    # Journals written before the journal was turned off again
+    (tmp_path / 'journal-1.jsonl').touch()
+    ticket_journal.init_app(app)
+
+    task = app.extensions['leader_tasks']['ticket_journal']
+    assert task.interval == app.config['TICKET_JOURNAL_RECOVERY_INTERVAL']
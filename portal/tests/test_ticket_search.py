@@ -0,0 +1,67 @@
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app.model import db
+from app.model import Ticket
+
+from app import ticket_search
+
+def _search(app: Flask, query: str, page: int = 1, page_size: int = 10):
+    with app.app_context():
+        tickets, has_more = ticket_search.search_tickets(query, page, page_size)
+        return [ ticket.id for ticket in tickets ], has_more
+
+def test_search_ranks_matches(client: FlaskClient, app: Flask, submit_ticket):
+    submit_ticket(client, 'Linked lists', 'My linked list loses nodes when I insert at the head.')
+    submit_ticket(client, 'Recursion', 'How do I write a recursive factorial?')
+    submit_ticket(client, 'Linked lists', 'Is a linked list faster than an array? A doubly linked list?')
+
+    assert _search(app, 'recursion') == ([ 2 ], False)
+
+    # Matching stems, best match first
+    assert _search(app, 'linked lists')[0] == [ 3, 1 ]
+
+    # The last word may be the start of a word
+    assert _search(app, 'fact') == ([ 2 ], False)
+
+    # Query syntax is taken as words
+    assert _search(app, 'head" *') == ([ 1 ], False)
+    assert _search(app, '  ') == ([], False)
+
+def test_search_pages(client: FlaskClient, app: Flask, submit_ticket):
+    app.config['MAX_OPEN_TICKETS'] = 0
+
+    for number in range(5):
+        submit_ticket(client, f'Assignment {number}', 'Segmentation fault')
+
+    assert _search(app, 'segmentation', page=1, page_size=2) == ([ 1, 2 ], True)
+    assert _search(app, 'segmentation', page=3, page_size=2) == ([ 5 ], False)
+
+def test_search_follows_edits(tutor_client: FlaskClient, app: Flask, submit_ticket):
+    submit_ticket(tutor_client, 'Pointers', 'What is a dangling pointer?')
+
+    tutor_client.post('/edit-ticket', data={ 'ticketIDModal': '1', 'tutorNotes': 'Explained valgrind' })
+    assert _search(app, 'valgrind') == ([ 1 ], False)
+
+    with app.app_context():
+        db.session.get(Ticket, 1).specific_question = 'Why does free crash?'
+        db.session.commit()
+
+    assert _search(app, 'dangling') == ([], False)
+    assert _search(app, 'crash') == ([ 1 ], False)
+
+    with app.app_context():
+        db.session.delete(db.session.get(Ticket, 1))
+        db.session.commit()
+
+    assert _search(app, 'crash') == ([], False)
+
+def test_search_page(tutor_client: FlaskClient, submit_ticket):
+    submit_ticket(tutor_client, 'Sorting', 'Quicksort is slow on sorted input')
+
+    response = tutor_client.get('/search-tickets?q=quicksort')
+    assert '200' in response.status
+    assert b'Quicksort is slow on sorted input' in response.data
+
+def test_search_page_requires_tutor(auth_client: FlaskClient):
+    assert '302' in auth_client.get('/search-tickets?q=quicksort').status
@@ -0,0 +1,73 @@
+from flask import Flask
+
+from app.model import db
+from app.model import Config
+from app.model import Status
+from app.model import Ticket
+
+from app import ticket_sweeper
+
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+
+def _tickets(app: Flask):
+    with app.app_context():
+        return { ticket.id: (ticket.status, ticket.auto_closed) for ticket in Ticket.query }
+
+def test_center_hours_from_appconfig(app: Flask):
+    with app.app_context():
+        hours = ticket_sweeper.center_hours()
+
+    assert hours[0] == (time(9, 0), time(20, 0))
+    assert hours[5] == (time(10, 30), time(14, 30))
+    assert 6 not in hours
+
+def test_center_hours_from_config_table(app: Flask):
+    with app.app_context():
+        config = Config()
+
+        for name in ticket_sweeper.CONFIG_DAYS[:6]:
+            setattr(config, f'{name}_start', datetime(2023, 1, 1, 8, 0))
+            setattr(config, f'{name}_end', datetime(2023, 1, 1, 16, 0))
+
+        db.session.add(config)
+        db.session.commit()
+
+        assert ticket_sweeper.center_hours()[4] == (time(8, 0), time(16, 0))
+
+def test_last_closing():
+    hours = { 0: (time(9, 0), time(20, 0)), 2: (time(9, 0), time(17, 0)) }
+    grace = timedelta(minutes=30)
+
+    # Monday 2023-02-06, before and after closing time plus the grace period
+    assert ticket_sweeper.last_closing(datetime(2023, 2, 6, 20, 15), hours, grace) == datetime(2023, 2, 1, 17, 0)
+    assert ticket_sweeper.last_closing(datetime(2023, 2, 6, 20, 30), hours, grace) == datetime(2023, 2, 6, 20, 0)
+
+    # Closed on Tuesday, the last closing is Monday's
+    assert ticket_sweeper.last_closing(datetime(2023, 2, 7, 12, 0), hours, grace) == datetime(2023, 2, 6, 20, 0)
+    assert ticket_sweeper.last_closing(datetime(2023, 2, 7, 12, 0), {}, grace) is None
+
+def test_sweep_closes_stale_tickets_in_batches(app: Flask, add_ticket):
+    app.config['TICKET_SWEEPER_BATCH_SIZE'] = 2
+    app.config['TICKET_SWEEPER_GRACE_MINUTES'] = 0
+
+    with app.app_context():
+        closing = ticket_sweeper.last_closing(datetime.now(), ticket_sweeper.center_hours(), timedelta())
+
+    stale = [ add_ticket(created=closing - timedelta(hours=1), status=status) for status in (Status.Open, Status.Claimed, Status.Open) ]
+    closed = add_ticket(created=closing - timedelta(hours=1), status=Status.Closed)
+    recent = add_ticket(created=closing + timedelta(minutes=1))
+
+    with app.app_context():
+        assert ticket_sweeper.sweep_stale_tickets() == 3
+
+    assert _tickets(app) == {
+        **{ id: (Status.Closed, True) for id in stale },
+        closed: (Status.Closed, None),
+        recent: (Status.Open, None)
+    }
+
+    with app.app_context():
+        assert ticket_sweeper.sweep_stale_tickets() == 0
+        assert db.session.get(Ticket, stale[1]).service_seconds is None